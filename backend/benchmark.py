@@ -0,0 +1,446 @@
+"""
+Load test and benchmark for the API.
+
+Runs the app in-process through httpx's ASGI transport against a fresh
+SQLite database in a temporary directory, seeds it, and drives every
+scenario at every concurrency level:
+
+    python benchmark.py                   # compare with benchmark_baseline.json
+    python benchmark.py --save-baseline   # record a new baseline
+    python benchmark.py --concurrency 1,32 --requests 500 --users 5000
+
+Scenarios are login, slot search, booking races (``concurrency`` clients
+book the same slot at once and exactly one may win), the appointment feed
+and challenge search. The report gives throughput and p50/p95/p99 latency
+for each. The run fails (exit status 1) when a scenario's p95 latency or
+throughput is worse than the baseline by more than ``--tolerance``, or when
+a booking race does not have exactly one winner.
+
+Baselines depend on the machine; record one where you compare against it.
+bcrypt runs at HEALTHTRACK_BCRYPT_ROUNDS=4 unless set, so login measures the
+request path rather than the hash cost.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BASELINE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json"
+)
+
+SCENARIOS = [
+    "login",
+    "slot_search",
+    "booking_race",
+    "appointment_feed",
+    "challenge_search",
+]
+
+SPECIALTIES = ["Cardiology", "Pediatrics", "Dermatology", "Neurology", "General"]
+CHALLENGE_WORDS = [
+    "walk", "run", "swim", "cycle", "sleep", "water", "yoga", "stretch", "steps",
+    "健走", "跑步", "游泳", "睡眠", "喝水", "瑜伽",
+]
+PASSWORD = "benchmark-password"
+FIRST_SLOT = datetime(2030, 1, 7, 8, 0)
+SLOT_LENGTH = timedelta(minutes=30)
+SLOTS_PER_DAY = 18  # 08:00-17:00
+
+# Index of the next unbooked race slot
+_race_slots = itertools.count()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated")
+    parser.add_argument("--requests", type=int, default=200, help="per scenario/level")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--providers", type=int, default=200)
+    parser.add_argument("--slots-per-provider", type=int, default=100)
+    parser.add_argument("--appointments-per-user", type=int, default=20)
+    parser.add_argument("--challenges", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.5,
+        help="allowed relative regression of p95 latency and throughput",
+    )
+    args = parser.parse_args(argv)
+    args.concurrency = [int(level) for level in args.concurrency.split(",")]
+    args.scenarios = args.scenarios.split(",")
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+
+def slot_start(index: int) -> datetime:
+    day, slot = divmod(index, SLOTS_PER_DAY)
+    return FIRST_SLOT + timedelta(days=day) + slot * SLOT_LENGTH
+
+
+def seed(args, races: int):
+    """Fill the database; ``races`` extra slots are kept for the booking races"""
+    from sqlalchemy import insert
+
+    import health_ids
+    import models
+    import passwords
+    from database import SessionLocal
+
+    rng = random.Random(args.seed)
+    db = SessionLocal()
+    try:
+        password_hash = passwords.hash_password(PASSWORD)
+        ids = health_ids.allocate_many(db, args.users)
+        db.execute(
+            insert(models.User),
+            [
+                {
+                    "health_id": ids[i],
+                    "name": f"Benchmark User {i}",
+                    "phone_number": f"+1555{i:07d}",
+                    "phone_verified": True,
+                    "password_hash": password_hash,
+                }
+                for i in range(args.users)
+            ],
+        )
+        db.execute(
+            insert(models.Provider),
+            [
+                {
+                    "license_number": f"BENCH{i:06d}",
+                    "name": f"Dr. Benchmark {i}",
+                    "specialty": SPECIALTIES[i % len(SPECIALTIES)],
+                    "verified": True,
+                }
+                for i in range(args.providers + 1)
+            ],
+        )
+        # Provider ids are 1..providers; the last one only has race slots
+        db.execute(
+            insert(models.ProviderAvailability),
+            [
+                {
+                    "provider_id": provider_id,
+                    "start_time": slot_start(i),
+                    "end_time": slot_start(i) + SLOT_LENGTH,
+                    "is_booked": rng.random() < 0.3,
+                }
+                for provider_id in range(1, args.providers + 1)
+                for i in range(args.slots_per_provider)
+            ],
+        )
+        db.execute(
+            insert(models.ProviderAvailability),
+            [
+                {
+                    "provider_id": args.providers + 1,
+                    "start_time": slot_start(i),
+                    "end_time": slot_start(i) + SLOT_LENGTH,
+                    "is_booked": False,
+                }
+                for i in range(races)
+            ],
+        )
+        db.execute(
+            insert(models.Appointment),
+            [
+                {
+                    "user_id": user_id,
+                    "provider_id": rng.randint(1, args.providers),
+                    "user_name": f"Benchmark User {user_id - 1}",
+                    "provider_name": "Dr. Benchmark",
+                    "date_time": slot_start(rng.randrange(args.slots_per_provider)),
+                    "consultation_type": rng.choice(["online", "in-person"]),
+                    "cancelled": False,
+                }
+                for user_id in range(1, args.users + 1)
+                for _ in range(args.appointments_per_user)
+            ],
+        )
+        db.execute(
+            insert(models.Challenge),
+            [
+                {
+                    "challenge_id": f"BENCH-{i}",
+                    "creator_id": rng.randint(1, args.users),
+                    "title": " ".join(rng.sample(CHALLENGE_WORDS, 3)),
+                    "goal": " ".join(rng.sample(CHALLENGE_WORDS, 2)),
+                    "description": " ".join(rng.sample(CHALLENGE_WORDS, 5)),
+                    "start_date": datetime(2030, 1, 1) + timedelta(days=i % 365),
+                    "end_date": datetime(2030, 2, 1) + timedelta(days=i % 365),
+                    "participant_count": 0,
+                }
+                for i in range(args.challenges)
+            ],
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+class Scenario:
+    """One request of a scenario per ``run`` call; latencies in seconds"""
+
+    def __init__(self, client, args, rng):
+        self.client = client
+        self.args = args
+        self.rng = rng
+        self.latencies = []
+        self.errors = 0
+
+    async def timed(self, method, url, expected=(200,), **kwargs):
+        started = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        self.latencies.append(time.perf_counter() - started)
+        if response.status_code not in expected:
+            self.errors += 1
+        return response
+
+
+class Login(Scenario):
+    async def run(self):
+        i = self.rng.randrange(self.args.users)
+        await self.timed(
+            "POST",
+            "/auth/login",
+            json={"phone_number": f"+1555{i:07d}", "password": PASSWORD},
+        )
+
+
+class SlotSearch(Scenario):
+    async def run(self):
+        start = slot_start(self.rng.randrange(self.args.slots_per_provider))
+        await self.timed(
+            "GET",
+            "/providers-availability/search",
+            params={
+                "from": start.isoformat(),
+                "to": (start + timedelta(hours=4)).isoformat(),
+                "specialty": self.rng.choice(SPECIALTIES),
+                "limit": 50,
+            },
+        )
+
+
+class AppointmentFeed(Scenario):
+    async def run(self):
+        user_id = self.rng.randint(1, self.args.users)
+        await self.timed("GET", f"/appointments/user/{user_id}", params={"limit": 50})
+
+
+class ChallengeSearch(Scenario):
+    async def run(self):
+        keyword = " ".join(self.rng.sample(CHALLENGE_WORDS, self.rng.choice([1, 2])))
+        await self.timed(
+            "GET", "/challenges/search", params={"keyword": keyword, "limit": 20}
+        )
+
+
+class BookingRace(Scenario):
+    """``concurrency`` users book the same free slot and exactly one may win"""
+
+    async def race(self, contenders: int):
+        start = slot_start(next(_race_slots))
+        body = {
+            "provider_id": self.args.providers + 1,
+            "date_time": start.isoformat(),
+            "user_name": "Benchmark User",
+            "provider_name": "Dr. Race",
+            "consultation_type": "online",
+        }
+        responses = await asyncio.gather(
+            *(
+                self.timed(
+                    "POST",
+                    "/appointments/",
+                    # Losers get 409 mid-race or 400 once the slot is taken
+                    expected=(200, 400, 409),
+                    params={"user_id": self.rng.randint(1, self.args.users)},
+                    json=body,
+                )
+                for _ in range(contenders)
+            )
+        )
+        winners = sum(response.status_code == 200 for response in responses)
+        if winners != 1:
+            self.errors += contenders
+
+
+SCENARIO_CLASSES = {
+    "login": Login,
+    "slot_search": SlotSearch,
+    "booking_race": BookingRace,
+    "appointment_feed": AppointmentFeed,
+    "challenge_search": ChallengeSearch,
+}
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    index = min(len(sorted_values) - 1, round(fraction * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+async def drive(scenario, concurrency: int, requests: int) -> dict:
+    started = time.perf_counter()
+    if isinstance(scenario, BookingRace):
+        for _ in range(max(1, requests // concurrency)):
+            await scenario.race(concurrency)
+    else:
+        remaining = requests
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                await scenario.run()
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies = sorted(scenario.latencies)
+    return {
+        "requests": len(latencies),
+        "errors": scenario.errors,
+        "throughput": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+async def run_all(args) -> dict:
+    import httpx
+
+    from main import app
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://b") as client:
+        for name in args.scenarios:
+            for level in args.concurrency:
+                rng = random.Random(f"{args.seed}-{name}-{level}")
+                scenario = SCENARIO_CLASSES[name](client, args, rng)
+                if level == args.concurrency[0] and name != "booking_race":
+                    # One untimed request warms caches and pools
+                    await SCENARIO_CLASSES[name](client, args, rng).run()
+                results[f"{name}@{level}"] = await drive(scenario, level, args.requests)
+    return results
+
+
+def report(results: dict):
+    print(
+        f"{'scenario':<24}{'req':>6}{'err':>5}{'req/s':>10}"
+        f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    )
+    for key, result in results.items():
+        print(
+            f"{key:<24}{result['requests']:>6}{result['errors']:>5}"
+            f"{result['throughput']:>10.1f}{result['p50_ms']:>9.2f}"
+            f"{result['p95_ms']:>9.2f}{result['p99_ms']:>9.2f}"
+        )
+
+
+def settings(args) -> dict:
+    return {
+        "requests": args.requests,
+        "users": args.users,
+        "providers": args.providers,
+        "slots_per_provider": args.slots_per_provider,
+        "appointments_per_user": args.appointments_per_user,
+        "challenges": args.challenges,
+        "seed": args.seed,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Regressions of ``results`` against ``baseline`` as readable lines"""
+    regressions = []
+    for key, result in results.items():
+        base = baseline["results"].get(key)
+        if base is None:
+            continue
+        if result["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{key}: p95 {result['p95_ms']:.2f} ms vs baseline "
+                f"{base['p95_ms']:.2f} ms"
+            )
+        if result["throughput"] < base["throughput"] * (1 - tolerance):
+            regressions.append(
+                f"{key}: {result['throughput']:.1f} req/s vs baseline "
+                f"{base['throughput']:.1f} req/s"
+            )
+    return regressions
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    # Removed with the seeded database once the run is over
+    with tempfile.TemporaryDirectory(prefix="healthtrack-bench-") as workdir:
+        try:
+            return benchmark(args, workdir)
+        finally:
+            # Pooled connections keep the database file open
+            from database import engine
+
+            engine.dispose()
+
+
+def benchmark(args, workdir: str) -> int:
+    """Seed a database in ``workdir``, run every scenario and check the baseline"""
+    # The app reads its settings at import time, so point it at a scratch
+    # database before anything imports config
+    os.environ["HEALTHTRACK_DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+    os.environ.setdefault("HEALTHTRACK_BCRYPT_ROUNDS", "4")
+    os.environ.setdefault("HEALTHTRACK_LOG_LEVEL", "WARNING")
+
+    import migrations
+    from database import engine
+
+    migrations.upgrade(engine)
+    races = sum(max(1, args.requests // level) for level in args.concurrency)
+    started = time.perf_counter()
+    seed(args, races)
+    print(f"Seeded in {time.perf_counter() - started:.1f}s ({workdir})")
+
+    results = asyncio.run(run_all(args))
+    report(results)
+
+    failed = [key for key, result in results.items() if result["errors"]]
+    for key in failed:
+        print(f"FAIL {key}: {results[key]['errors']} failed requests")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"settings": settings(args), "results": results}, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["settings"] != settings(args):
+            print("Warning: baseline was recorded with different settings")
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            failed.append("baseline")
+    else:
+        print(f"No baseline at {args.baseline}; run with --save-baseline")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
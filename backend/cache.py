@@ -0,0 +1,256 @@
+"""
+Small caches in front of hot reads.
+
+`TTLCache` is a thread-safe LRU map whose entries also expire after a
+time-to-live. `SharedCache` keeps entries in a shared store (Redis, or the
+in-process `MemoryClient` stand-in), so every worker sees the same entries
+and the same invalidations. Both count hits and misses.
+
+`token_cache` holds the users resolved from verified access tokens so
+`auth.get_current_user` can skip the JWT check and the user query. Each
+entry records the user's generation when it was cached; crud bumps that
+generation whenever the user is updated or deleted, which orphans all of the
+user's tokens with one write.
+
+`directory_cache` holds providers and free-slot lists read through crud.
+List entries are keyed by a namespace generation: `invalidate_provider` and
+`invalidate_slots` bump the generation, which orphans every list in that
+namespace at once, and the orphans expire with their TTL.
+
+`TTLCache` lives in one process. With several workers, a change only clears
+the cache of the worker that handled it; keep the TTLs short in that setup or
+set HEALTHTRACK_CACHE_URL, which puts both caches in the shared store.
+"""
+
+import hashlib
+
+import math
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import config
+
+
+class TTLCache:
+    """LRU cache with a per-entry time-to-live"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._generations = {}  # namespace -> int, never expires
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: Optional[float] = None):
+        """Store ``value``; ``ttl`` can only shorten the cache's own TTL"""
+        if not self.enabled:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def generation(self, namespace: str) -> int:
+        with self._lock:
+            return self._generations.get(namespace, 0)
+
+    def bump(self, namespace: str):
+        """Orphan every entry keyed by the current generation of ``namespace``"""
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._generations.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+class MemoryClient:
+    """In-process stand-in for the part of the redis-py client SharedCache uses"""
+
+    def __init__(self):
+        self._data = {}  # name -> (expires_at or None, value)
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            entry = self._data.get(name)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[name]
+                return None
+            return value
+
+    def set(self, name, value, ex=None):
+        expires_at = None if ex is None else time.monotonic() + ex
+        with self._lock:
+            self._data[name] = (expires_at, value)
+
+    def delete(self, *names):
+        with self._lock:
+            for name in names:
+                self._data.pop(name, None)
+
+    def incr(self, name) -> int:
+        with self._lock:
+            _, value = self._data.get(name, (None, 0))
+            self._data[name] = (None, int(value) + 1)
+            return int(value) + 1
+
+    def flushdb(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SharedCache:
+    """Pickled entries with a TTL in a Redis-compatible store"""
+
+    def __init__(self, client, ttl: float, prefix: str = "healthtrack:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def get(self, key, default=None):
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return pickle.loads(raw)
+
+    def set(self, key, value, ttl: Optional[float] = None):
+        if not self.enabled:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=math.ceil(ttl))
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def generation(self, namespace: str) -> int:
+        return int(self.client.get(f"{self.prefix}generation:{namespace}") or 0)
+
+    def bump(self, namespace: str):
+        self.client.incr(f"{self.prefix}generation:{namespace}")
+
+    def clear(self):
+        self.client.flushdb()
+
+    def stats(self) -> dict:
+        # Counters are per process; the store is shared
+        return {"hits": self.hits, "misses": self.misses}
+
+
+def _backend(size: int, ttl: float):
+    if not config.CACHE_URL:
+        return TTLCache(size, ttl)
+    if config.CACHE_URL == "memory://":
+        return SharedCache(_memory_client, ttl)
+    import redis  # optional dependency: pip install .[redis]
+
+    return SharedCache(redis.Redis.from_url(config.CACHE_URL), ttl)
+
+
+# The one in-process store behind every cache when CACHE_URL is memory://
+_memory_client = MemoryClient()
+
+# access token digest -> (user generation, column values of the user)
+token_cache = _backend(config.AUTH_CACHE_SIZE, config.AUTH_CACHE_TTL_SECONDS)
+
+# provider and free-slot reads, see crud.get_provider and friends
+directory_cache = _backend(
+    config.DIRECTORY_CACHE_SIZE, config.DIRECTORY_CACHE_TTL_SECONDS
+)
+
+
+def stats() -> dict:
+    return {"auth": token_cache.stats(), "directory": directory_cache.stats()}
+
+
+def _token_key(token: str) -> str:
+    # Keeps bearer tokens themselves out of a shared store
+    return "token:" + hashlib.sha256(token.encode()).hexdigest()
+
+
+def get_token_user(token: str) -> Optional[dict]:
+    """Column values of the user ``token`` was verified for, if still current"""
+    entry = token_cache.get(_token_key(token))
+    if entry is None:
+        return None
+    generation, columns = entry
+    if generation != token_cache.generation(f"user:{columns['id']}"):
+        return None
+    return columns
+
+
+def set_token_user(token: str, columns: dict, ttl: Optional[float] = None):
+    generation = token_cache.generation(f"user:{columns['id']}")
+    token_cache.set(_token_key(token), (generation, columns), ttl=ttl)
+
+
+def invalidate_user(user_id: int):
+    """Forget every cached token of a user after the user row changed"""
+    token_cache.bump(f"user:{user_id}")
+
+
+def invalidate_slots(provider_id: int):
+    """Forget the free-slot lists after a slot of ``provider_id`` changed"""
+    directory_cache.bump(f"slots:{provider_id}")
+    directory_cache.bump("available")
+
+
+def invalidate_provider(provider_id: int):
+    """Forget a provider, the provider lists and its free slots"""
+    directory_cache.delete(f"provider:{provider_id}")
+    directory_cache.bump("providers")
+    invalidate_slots(provider_id)
@@ -0,0 +1,89 @@
+import os
+
+# Settings are read once from the environment at import time.
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Database connection
+DATABASE_URL = os.getenv("HEALTHTRACK_DATABASE_URL", "sqlite:///./healthtrack.db")
+
+# Apply pending migrations on startup instead of refusing to start; for local
+# development only, deployments run `python -m migrations` once per release
+AUTO_MIGRATE = _env_bool("HEALTHTRACK_AUTO_MIGRATE", False)
+# Refuse to start when a table or index declared in models.py is missing from
+# the database, instead of logging a warning for each one
+SCHEMA_STRICT = _env_bool("HEALTHTRACK_SCHEMA_STRICT", False)
+
+# Connection pool (ignored for in-memory SQLite, which uses a single connection)
+DB_POOL_SIZE = _env_int("HEALTHTRACK_DB_POOL_SIZE", 5)
+DB_MAX_OVERFLOW = _env_int("HEALTHTRACK_DB_MAX_OVERFLOW", 10)
+DB_POOL_TIMEOUT = _env_int("HEALTHTRACK_DB_POOL_TIMEOUT", 30)  # seconds
+DB_POOL_PRE_PING = _env_bool("HEALTHTRACK_DB_POOL_PRE_PING", False)
+DB_POOL_RECYCLE = _env_int("HEALTHTRACK_DB_POOL_RECYCLE", -1)  # seconds, -1 = never
+
+# Abort statements running longer than this; 0 disables the limit
+DB_STATEMENT_TIMEOUT_MS = _env_int("HEALTHTRACK_DB_STATEMENT_TIMEOUT_MS", 0)
+
+# Opt-in async routes (see routers/async_hot_paths.py)
+ASYNC_DB_ENABLED = _env_bool("HEALTHTRACK_ASYNC_DB", False)
+
+# "production" turns on WAL, the pragmas below and single-writer serialization
+# when the database is SQLite; "default" leaves SQLite's own settings alone.
+SQLITE_PROFILE = os.getenv("HEALTHTRACK_SQLITE_PROFILE", "default")
+SQLITE_MMAP_SIZE = _env_int("HEALTHTRACK_SQLITE_MMAP_SIZE", 256 * 1024 * 1024)  # bytes
+SQLITE_CACHE_SIZE_KB = _env_int("HEALTHTRACK_SQLITE_CACHE_SIZE_KB", 64 * 1024)
+SQLITE_BUSY_TIMEOUT_MS = _env_int("HEALTHTRACK_SQLITE_BUSY_TIMEOUT_MS", 5000)
+
+# Password hashing: bcrypt cost factor and the process pool it runs in.
+# PASSWORD_WORKERS=0 hashes inline in the calling thread.
+BCRYPT_ROUNDS = _env_int("HEALTHTRACK_BCRYPT_ROUNDS", 12)
+PASSWORD_WORKERS = _env_int("HEALTHTRACK_PASSWORD_WORKERS", os.cpu_count() or 1)
+# Jobs allowed in flight (running + queued) before requests get a 503
+PASSWORD_QUEUE_LIMIT = _env_int("HEALTHTRACK_PASSWORD_QUEUE_LIMIT", 64)
+PASSWORD_RETRY_AFTER_SECONDS = _env_int("HEALTHTRACK_PASSWORD_RETRY_AFTER", 1)
+
+# Verified-token cache used by auth.get_current_user; TTL 0 disables it. Kept
+# in the shared store as well when CACHE_URL is set (see below).
+AUTH_CACHE_TTL_SECONDS = _env_int("HEALTHTRACK_AUTH_CACHE_TTL", 60)
+AUTH_CACHE_SIZE = _env_int("HEALTHTRACK_AUTH_CACHE_SIZE", 10000)
+
+# Read-through cache for providers and free slots (see cache.py). An empty
+# CACHE_URL keeps both caches in-process; redis://... shares them between
+# workers and memory:// runs the shared code path against an in-process store.
+DIRECTORY_CACHE_TTL_SECONDS = _env_int("HEALTHTRACK_DIRECTORY_CACHE_TTL", 30)
+DIRECTORY_CACHE_SIZE = _env_int("HEALTHTRACK_DIRECTORY_CACHE_SIZE", 10000)
+CACHE_URL = os.getenv("HEALTHTRACK_CACHE_URL", "")
+
+# Health ID allocation (see health_ids.py). Changing the key after users exist
+# can produce IDs that are already taken, so set it once per deployment.
+HEALTH_ID_KEY = os.getenv("HEALTHTRACK_HEALTH_ID_KEY", "healthtrack-health-id")
+HEALTH_ID_BLOCK_SIZE = _env_int("HEALTHTRACK_HEALTH_ID_BLOCK_SIZE", 100)
+
+# Seconds between runs of the invitation expiry sweeper; 0 disables it
+INVITATION_SWEEP_INTERVAL_SECONDS = _env_int(
+    "HEALTHTRACK_INVITATION_SWEEP_INTERVAL", 300
+)
+
+# Request instrumentation: per-request database headers (debug only) and the
+# Prometheus /metrics endpoint
+DEBUG_HEADERS = _env_bool("HEALTHTRACK_DEBUG", False)
+METRICS_ENABLED = _env_bool("HEALTHTRACK_METRICS", True)
+
+# Opt-in fast JSON path: orjson-backed default response class and lean
+# serializers for the large list endpoints (see serializers.py)
+FAST_JSON = _env_bool("HEALTHTRACK_FAST_JSON", False)
+
+# Logging (see logging_setup.py): level name and "json" or "text" lines
+LOG_LEVEL = os.getenv("HEALTHTRACK_LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("HEALTHTRACK_LOG_FORMAT", "json")
@@ -0,0 +1,48 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import cache
+import migrations
+from database import get_db
+from main import app
+
+
+@pytest.fixture
+def engine():
+    """In-memory database with the migrated schema; override it for a file database"""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    migrations.upgrade(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine):
+    """Sessions on `engine`, with an empty directory cache"""
+    cache.directory_cache.clear()
+    return sessionmaker(bind=engine, autoflush=False)
+
+
+@pytest.fixture
+def client(session_factory):
+    """
+    Client whose requests get sessions from `session_factory`.
+
+    Modules seed their rows by overriding this fixture with one that takes it.
+    """
+
+    def override():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_db, None)
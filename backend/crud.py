@@ -1,42 +1,67 @@
-import os
-import sys
-
-from sqlalchemy import and_
-from sqlalchemy.orm import Session, joinedload
+import logging
+
+from sqlalchemy import (
+    and_,
+    delete,
+    exists,
+    insert,
+    inspect,
+    or_,
+    select,
+    tuple_,
+    union_all,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import (
+    Session,
+    aliased,
+    joinedload,
+    make_transient_to_detached,
+    selectinload,
+)
 from sqlalchemy.sql.expression import false, true
 
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-
-import random
-import string
 from datetime import datetime, timedelta
 from typing import List, Optional
 
-from passlib.context import CryptContext
-
+import cache
+import health_ids
 import models
+import passwords
 import schemas
+import search
+from database import serialized_write
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = logging.getLogger(__name__)
 
 
 def generate_unique_health_id(db: Session) -> str:
     """
-    Generate a unique 8-digit health ID
+    Generate a unique 8-digit health ID, see health_ids.py
     """
-    while True:
-        # Generate a random 8-digit number
-        health_id = "".join(random.choices(string.digits, k=8))
+    return health_ids.allocate(db)
 
-        # Check if this health_id already exists
-        existing_user = (
-            db.query(models.User).filter(models.User.health_id == health_id).first()
-        )
 
-        # If no user has this health_id, it's unique and we can use it
-        if not existing_user:
-            return health_id
+def _insert_user(db: Session, **fields):
+    """
+    Insert a user with a freshly allocated health ID.
+
+    Allocated IDs never repeat, but users created before the allocator existed
+    have random IDs that can occasionally be hit; those are skipped.
+    """
+    while True:
+        db_user = models.User(health_id=generate_unique_health_id(db), **fields)
+        db.add(db_user)
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            if get_user_by_health_id(db, db_user.health_id) is None:
+                raise
+            continue
+        db.refresh(db_user)
+        return db_user
 
 
 # User CRUD operations
@@ -52,40 +77,36 @@ def get_users(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.User).offset(skip).limit(limit).all()
 
 
+@serialized_write
 def create_user(db: Session, user: schemas.UserCreate):
-    # Generate a unique 8-digit health ID
-    health_id = generate_unique_health_id(db)
-
-    db_user = models.User(
-        health_id=health_id,
+    return _insert_user(
+        db,
         name=user.name,
         phone_number=user.phone_number,
         phone_verified=user.phone_verified,
     )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
 
 
 def create_user_with_password(db: Session, user: schemas.UserCreateWithPassword):
-    hashed_password = pwd_context.hash(user.password)
-    # Generate a unique 8-digit health ID
-    health_id = generate_unique_health_id(db)
+    # Hash before taking the write lock; bcrypt must not hold up other writes
+    hashed_password = passwords.hash_password(user.password)
+    return _create_user_with_hash(db, user, hashed_password)
+
 
-    db_user = models.User(
-        health_id=health_id,
+@serialized_write
+def _create_user_with_hash(
+    db: Session, user: schemas.UserCreateWithPassword, hashed_password: str
+):
+    return _insert_user(
+        db,
         name=user.name,
         phone_number=user.phone_number,
         phone_verified=user.phone_verified,
         password_hash=hashed_password,
     )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
 
 
+@serialized_write
 def update_user(db: Session, user_id: int, user_update: schemas.UserCreate):
     db_user = db.query(models.User).filter(models.User.id == user_id).first()
     if db_user:
@@ -94,21 +115,24 @@ def update_user(db: Session, user_id: int, user_update: schemas.UserCreate):
         db_user.phone_number = user_update.phone_number
         db_user.phone_verified = user_update.phone_verified
         db.commit()
+        cache.invalidate_user(user_id)
         db.refresh(db_user)
     return db_user
 
 
+@serialized_write
 def update_user_phone(db: Session, user_id: int, phone_number: str):
     db_user = db.query(models.User).filter(models.User.id == user_id).first()
     if db_user:
         db_user.phone_number = phone_number
         db.commit()
+        cache.invalidate_user(user_id)
         db.refresh(db_user)
     return db_user
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return passwords.verify_password(plain_password, hashed_password)
 
 
 def get_user_by_phone_number(db: Session, phone_number: str):
@@ -148,6 +172,7 @@ def get_email_by_address(db: Session, email_address: str):
     )
 
 
+@serialized_write
 def create_email(db: Session, email: schemas.EmailCreate):
     db_email = models.Email(email_address=email.email_address, verified=email.verified)
     db.add(db_email)
@@ -156,9 +181,43 @@ def create_email(db: Session, email: schemas.EmailCreate):
     return db_email
 
 
+def _columns(instance) -> dict:
+    return {
+        attr.key: getattr(instance, attr.key)
+        for attr in inspect(instance).mapper.column_attrs
+    }
+
+
+def _detached(model, columns: dict):
+    """
+    Rebuild a cached row as a detached instance.
+
+    Skips __init__ and the session, so a cached page costs a fraction of the
+    query it replaces; relationships of the copy cannot lazy-load.
+    """
+    instance = inspect(model).class_manager.new_instance()
+    instance.__dict__.update(columns)
+    make_transient_to_detached(instance)
+    return instance
+
+
+def _restore(db: Session, model, columns: dict):
+    """Attach a cached row to ``db`` without a query; relationships still lazy-load"""
+    return db.merge(_detached(model, columns), load=False)
+
+
 # Provider CRUD operations
 def get_provider(db: Session, provider_id: int):
-    return db.query(models.Provider).filter(models.Provider.id == provider_id).first()
+    key = f"provider:{provider_id}"
+    columns = cache.directory_cache.get(key)
+    if columns is not None:
+        return _restore(db, models.Provider, columns)
+    provider = (
+        db.query(models.Provider).filter(models.Provider.id == provider_id).first()
+    )
+    if provider is not None:
+        cache.directory_cache.set(key, _columns(provider))
+    return provider
 
 
 def get_provider_by_license(db: Session, license_number: str):
@@ -170,9 +229,19 @@ def get_provider_by_license(db: Session, license_number: str):
 
 
 def get_providers(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Provider).offset(skip).limit(limit).all()
-
-
+    # Read the generation first, so a page loaded while a provider is being
+    # created or deleted is stored under the generation that write retires
+    generation = cache.directory_cache.generation("providers")
+    key = f"providers:{generation}:{skip}:{limit}"
+    rows = cache.directory_cache.get(key)
+    if rows is not None:
+        return [_detached(models.Provider, columns) for columns in rows]
+    providers = db.query(models.Provider).offset(skip).limit(limit).all()
+    cache.directory_cache.set(key, [_columns(provider) for provider in providers])
+    return providers
+
+
+@serialized_write
 def create_provider(db: Session, provider: schemas.ProviderCreate):
     db_provider = models.Provider(
         license_number=provider.license_number,
@@ -183,6 +252,7 @@ def create_provider(db: Session, provider: schemas.ProviderCreate):
     db.add(db_provider)
     db.commit()
     db.refresh(db_provider)
+    cache.invalidate_provider(db_provider.id)
     return db_provider
 
 
@@ -194,6 +264,29 @@ def get_providers_by_user_id(session: Session, user_id: int):
         return []
 
 
+@serialized_write
+def add_email_to_user(db: Session, user_id: int, email_id: int) -> bool:
+    user = db.query(models.User).filter(models.User.id == user_id).first()
+    email = db.query(models.Email).filter(models.Email.id == email_id).first()
+    if user and email and email not in user.emails:
+        user.emails.append(email)
+        db.commit()
+        return True
+    return False
+
+
+@serialized_write
+def remove_email_from_user(db: Session, user_id: int, email_id: int) -> bool:
+    user = db.query(models.User).filter(models.User.id == user_id).first()
+    email = db.query(models.Email).filter(models.Email.id == email_id).first()
+    if user and email and email in user.emails:
+        user.emails.remove(email)
+        db.commit()
+        return True
+    return False
+
+
+@serialized_write
 def associate_provider_with_user(db: Session, user_id: int, provider_id: int):
     user = db.query(models.User).filter(models.User.id == user_id).first()
     provider = (
@@ -206,6 +299,7 @@ def associate_provider_with_user(db: Session, user_id: int, provider_id: int):
     return False
 
 
+@serialized_write
 def dissociate_provider_from_user(db: Session, user_id: int, provider_id: int):
     user = db.query(models.User).filter(models.User.id == user_id).first()
     provider = (
@@ -218,19 +312,35 @@ def dissociate_provider_from_user(db: Session, user_id: int, provider_id: int):
     return False
 
 
+@serialized_write
 def delete_user_by_phone_number(db: Session, phone_number):
     user = (
         db.query(models.User).filter(models.User.phone_number == phone_number).first()
     )
     if user:
+        user_id = user.id
+        # Deleting the user drops their memberships; keep the counts in step
+        participants = models.challenge_participant_association
+        db.query(models.Challenge).filter(
+            models.Challenge.id.in_(
+                select(participants.c.challenge_id).where(
+                    participants.c.user_id == user_id
+                )
+            )
+        ).update(
+            {models.Challenge.participant_count: models.Challenge.participant_count - 1},
+            synchronize_session=False,
+        )
         db.delete(user)
         db.commit()
+        cache.invalidate_user(user_id)
         return True
     else:
         return False
     return False
 
 
+@serialized_write
 def delete_provider(db: Session, provider_id: int):
     provider = (
         db.query(models.Provider).filter(models.Provider.id == provider_id).first()
@@ -240,6 +350,7 @@ def delete_provider(db: Session, provider_id: int):
         if len(provider.users) == 0:
             db.delete(provider)
             db.commit()
+            cache.invalidate_provider(provider_id)
             return True
         else:
             # 如果还有用户关联，不删除Provider
@@ -280,55 +391,118 @@ def get_appointments(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.Appointment).offset(skip).limit(limit).all()
 
 
-def get_user_appointments(db: Session, user_id: int):
-    # Get all appointments where the user is the patient, including provider data
-    user_appointments = (
-        db.query(models.Appointment)
-        .options(joinedload(models.Appointment.provider))
-        .filter(models.Appointment.user_id == user_id)
-        .all()
+def encode_cursor(moment: datetime, row_id: int) -> str:
+    """Opaque keyset cursor for a (datetime, id) ordering"""
+    return f"{moment.isoformat()}_{row_id}"
+
+
+def decode_cursor(cursor: str):
+    try:
+        moment, row_id = cursor.rsplit("_", 1)
+        return datetime.fromisoformat(moment), int(row_id)
+    except ValueError:
+        raise ValueError("Invalid cursor")
+
+
+def encode_appointment_cursor(appointment) -> str:
+    """Cursor pointing just after ``appointment`` in the appointment feed"""
+    return encode_cursor(appointment.date_time, appointment.id)
+
+
+# Past this many providers the feed reads them through one IN arm, which has
+# to sort its rows; SQLite caps a compound SELECT at 500 arms
+FEED_PROVIDER_ARMS = 50
+
+
+def user_provider_ids_statement(user_id: int):
+    """Providers of a user, read by ix_user_providers_user"""
+    return select(models.user_provider_association.c.provider_id).where(
+        models.user_provider_association.c.user_id == user_id
     )
 
-    # Get all providers associated with the user
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    if user:
-        # Get all provider IDs associated with the user
-        provider_ids = [provider.id for provider in user.providers]
 
-        # Get all appointments for these providers, including provider data
-        provider_appointments = (
-            db.query(models.Appointment)
-            .options(joinedload(models.Appointment.provider))
-            .filter(models.Appointment.provider_id.in_(provider_ids))
-            .all()
+def user_appointments_statement(
+    user_id: int,
+    provider_ids: List[int],
+    cursor: Optional[str] = None,
+    limit: int = 100,
+):
+    """
+    One page of a user's appointment feed as a single SELECT.
+
+    The feed is the user's own appointments plus those of the user's
+    providers (``provider_ids``). Each source is a UNION ALL arm that walks
+    its (user_id or provider_id, date_time, id) index from the cursor and
+    stops after ``limit`` rows; the provider arms skip the user's own
+    appointments so every appointment appears once. Only the at most
+    ``limit`` rows per arm are merged and sorted, so a page costs the same
+    however long the history is. Rows are (Appointment, provider name,
+    provider specialty).
+    """
+    after = None
+    if cursor is not None:
+        after_date_time, after_id = decode_cursor(cursor)
+        after = tuple_(models.Appointment.date_time, models.Appointment.id) > tuple_(
+            after_date_time, after_id
         )
 
-        # Combine and return all appointments
-        return user_appointments + provider_appointments
+    others = models.Appointment.user_id != user_id
+    sources = [models.Appointment.user_id == user_id]
+    if len(provider_ids) <= FEED_PROVIDER_ARMS:
+        sources += [
+            and_(models.Appointment.provider_id == provider_id, others)
+            for provider_id in provider_ids
+        ]
+    else:
+        sources.append(and_(models.Appointment.provider_id.in_(provider_ids), others))
+
+    arms = []
+    for source in sources:
+        arm = select(models.Appointment).where(source)
+        if after is not None:
+            arm = arm.where(after)
+        arm = arm.order_by(models.Appointment.date_time, models.Appointment.id)
+        arms.append(select(arm.limit(limit).subquery()))
+    page = (
+        union_all(*arms).order_by("date_time", "id").limit(limit).subquery()
+        if len(arms) > 1
+        else arms[0].subquery()
+    )
+    appointment = aliased(models.Appointment, page)
+    return (
+        select(appointment, models.Provider.name, models.Provider.specialty)
+        .outerjoin(models.Provider, models.Provider.id == appointment.provider_id)
+        .order_by(appointment.date_time, appointment.id)
+    )
 
-    return user_appointments
 
+def get_user_appointments(
+    db: Session, user_id: int, cursor: Optional[str] = None, limit: int = 100
+):
+    """See `user_appointments_statement`"""
+    provider_ids = db.execute(user_provider_ids_statement(user_id)).scalars().all()
+    return db.execute(
+        user_appointments_statement(user_id, provider_ids, cursor, limit)
+    ).all()
 
+
+@serialized_write
 def create_appointment(
     db: Session, appointment: schemas.AppointmentCreate, user_id: int
 ):
     # Check if the appointment time slot is available
-    available_slot = (
-        db.query(models.ProviderAvailability)
-        .filter(
-            and_(
-                models.ProviderAvailability.provider_id == appointment.provider_id,
-                models.ProviderAvailability.start_time <= appointment.date_time,
-                models.ProviderAvailability.end_time > appointment.date_time,
-                models.ProviderAvailability.is_booked == False,
-            )
-        )
-        .first()
+    available_slot = find_covering_slot(
+        db, appointment.provider_id, appointment.date_time, is_booked=False
     )
 
     if not available_slot:
         raise ValueError("Selected time slot is not available")
 
+    # Claim the slot first; a concurrent booking of the same slot fails here
+    if not _claim_slot(db, available_slot.id, booked=True):
+        db.rollback()
+        raise SlotConflictError("Selected time slot was just booked")
+
     db_appointment = models.Appointment(
         user_id=user_id,
         user_name=appointment.user_name,
@@ -339,15 +513,13 @@ def create_appointment(
         notes=appointment.notes,
     )
     db.add(db_appointment)
-
-    # Mark the availability slot as booked
-    available_slot.is_booked = True
-
     db.commit()
     db.refresh(db_appointment)
+    cache.invalidate_slots(appointment.provider_id)
     return db_appointment
 
 
+@serialized_write
 def cancel_appointment(db: Session, appointment_id: int, reason: str):
     db_appointment = (
         db.query(models.Appointment)
@@ -355,28 +527,36 @@ def cancel_appointment(db: Session, appointment_id: int, reason: str):
         .first()
     )
     if db_appointment and not db_appointment.cancelled:
-        db_appointment.cancelled = True
-        db_appointment.cancellation_reason = reason
-
-        # Find the associated availability slot and mark it as available again
-        availability_slot = (
-            db.query(models.ProviderAvailability)
+        # Compare-and-set so a concurrent cancel releases the slot only once
+        cancelled = (
+            db.query(models.Appointment)
             .filter(
-                and_(
-                    models.ProviderAvailability.provider_id
-                    == db_appointment.provider_id,
-                    models.ProviderAvailability.start_time <= db_appointment.date_time,
-                    models.ProviderAvailability.end_time > db_appointment.date_time,
-                    models.ProviderAvailability.is_booked == True,
-                )
+                models.Appointment.id == appointment_id,
+                models.Appointment.cancelled == False,
+            )
+            .update(
+                {
+                    models.Appointment.cancelled: True,
+                    models.Appointment.cancellation_reason: reason,
+                },
+                synchronize_session=False,
             )
-            .first()
+        )
+        if not cancelled:
+            db.rollback()
+            return False
+
+        # Find the associated availability slot and mark it as available again
+        availability_slot = find_covering_slot(
+            db, db_appointment.provider_id, db_appointment.date_time, is_booked=True
         )
 
         if availability_slot:
-            availability_slot.is_booked = False
+            _claim_slot(db, availability_slot.id, booked=False)
 
         db.commit()
+        if availability_slot:
+            cache.invalidate_slots(db_appointment.provider_id)
         return True
     return False
 
@@ -397,15 +577,11 @@ def get_challenge_by_challenge_id(db: Session, challenge_id: str):
 
 
 def get_challenges(db: Session, skip: int = 0, limit: int = 100):
-    return (
-        db.query(models.Challenge)
-        .options(joinedload(models.Challenge.creator))
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+    # schemas.Challenge only has creator_id, so the creator is not loaded
+    return db.query(models.Challenge).offset(skip).limit(limit).all()
 
 
+@serialized_write
 def create_challenge(db: Session, challenge: schemas.ChallengeCreate, creator_id: int):
     db_challenge = models.Challenge(
         title=challenge.title,
@@ -416,10 +592,10 @@ def create_challenge(db: Session, challenge: schemas.ChallengeCreate, creator_id
         start_date=challenge.start_date,
         end_date=challenge.end_date,
     )
-    db_user = db.query(models.User).filter(models.User.id == creator_id).first()
-    if db_user:
-        db_challenge.participants.append(db_user)
     db.add(db_challenge)
+    db.flush()
+    if get_user(db, creator_id):
+        _add_participant(db, db_challenge.id, creator_id)
     db.commit()
     db.refresh(db_challenge)
     return db_challenge
@@ -428,14 +604,8 @@ def create_challenge(db: Session, challenge: schemas.ChallengeCreate, creator_id
 def search_challenges_by_title(
     db: Session, keyword: str, skip: int = 0, limit: int = 100
 ):
-    return (
-        db.query(models.Challenge)
-        .filter(models.Challenge.title.ilike(f"%{keyword}%"))
-        .options(joinedload(models.Challenge.creator))
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+    """Ranked full-text search over title, goal and description, see search.py"""
+    return search.search_challenges(db, keyword=keyword, skip=skip, limit=limit)
 
 
 def filter_challenges_by_date_range(
@@ -444,27 +614,99 @@ def filter_challenges_by_date_range(
     end_date: datetime = None,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
 ):
+    """
+    Challenges inside the date range, ordered by (start_date, id).
+
+    Pass ``cursor`` (see `encode_challenge_cursor`) instead of ``skip`` to page
+    on the keyset: the range scan on ix_challenges_start_date_id then starts
+    right after the previous page rather than counting past skipped rows.
+    """
     query = db.query(models.Challenge).options(joinedload(models.Challenge.creator))
     if start_date is not None:
         query = query.filter(models.Challenge.start_date >= start_date)
     if end_date is not None:
         query = query.filter(models.Challenge.end_date <= end_date)
+    if cursor is not None:
+        after_start_date, after_id = decode_cursor(cursor)
+        query = query.filter(
+            tuple_(models.Challenge.start_date, models.Challenge.id)
+            > tuple_(after_start_date, after_id)
+        )
+    query = query.order_by(models.Challenge.start_date, models.Challenge.id)
     return query.offset(skip).limit(limit).all()
 
 
-def add_participant_to_challenge(db: Session, challenge_id: int, user_id: int):
-    challenge = (
-        db.query(models.Challenge).filter(models.Challenge.id == challenge_id).first()
+def encode_challenge_cursor(challenge) -> str:
+    """Cursor pointing just after ``challenge`` in the date-range filter"""
+    return encode_cursor(challenge.start_date, challenge.id)
+
+
+def is_challenge_participant(db: Session, challenge_id: int, user_id: int) -> bool:
+    """Keyed lookup on uq_challenge_participants_challenge_user"""
+    participants = models.challenge_participant_association
+    return db.query(
+        exists().where(
+            participants.c.challenge_id == challenge_id,
+            participants.c.user_id == user_id,
+        )
+    ).scalar()
+
+
+def _add_participant(db: Session, challenge_id: int, user_id: int) -> bool:
+    """
+    Add a participant and bump the challenge's participant_count.
+
+    Runs in the caller's transaction; returns False if the user already takes
+    part. ON CONFLICT DO NOTHING lets the unique index settle two concurrent
+    joins without an error, so no savepoint is needed (on pysqlite a SAVEPOINT
+    starts the real transaction and its RELEASE would commit the row alone).
+    """
+    dialect_insert = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}[
+        db.get_bind().dialect.name
+    ]
+    added = db.execute(
+        dialect_insert(models.challenge_participant_association)
+        .values(challenge_id=challenge_id, user_id=user_id)
+        .on_conflict_do_nothing()
     )
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    if challenge and user and user not in challenge.participants:
-        challenge.participants.append(user)
+    if added.rowcount != 1:
+        return False
+    db.query(models.Challenge).filter(models.Challenge.id == challenge_id).update(
+        {models.Challenge.participant_count: models.Challenge.participant_count + 1},
+        synchronize_session=False,
+    )
+    return True
+
+
+def get_challenge_participants(
+    db: Session, challenge_id: int, after_id: Optional[int] = None, limit: int = 100
+):
+    """One page of a challenge's participants ordered by user id"""
+    participants = models.challenge_participant_association
+    query = (
+        db.query(models.User)
+        .join(participants, participants.c.user_id == models.User.id)
+        .filter(participants.c.challenge_id == challenge_id)
+    )
+    if after_id is not None:
+        query = query.filter(models.User.id > after_id)
+    return query.order_by(models.User.id).limit(limit).all()
+
+
+@serialized_write
+def add_participant_to_challenge(db: Session, challenge_id: int, user_id: int):
+    challenge = get_challenge(db, challenge_id)
+    user = get_user(db, user_id)
+    if challenge and user and _add_participant(db, challenge_id, user_id):
         db.commit()
         return True
+    db.rollback()
     return False
 
 
+@serialized_write
 def delete_challenge(db: Session, challenge_id: int):
     """Delete a challenge, removing participants and related invitations first."""
     challenge = (
@@ -473,9 +715,12 @@ def delete_challenge(db: Session, challenge_id: int):
     if not challenge:
         return False
 
-    # Clear participants from the association table
-    if challenge.participants:
-        challenge.participants.clear()
+    # Clear participants from the association table without loading them
+    db.execute(
+        delete(models.challenge_participant_association).where(
+            models.challenge_participant_association.c.challenge_id == challenge_id
+        )
+    )
 
     # Delete related invitations that reference this challenge
     db.query(models.Invitation).filter(
@@ -490,7 +735,11 @@ def delete_challenge(db: Session, challenge_id: int):
 
 # Family Group CRUD operations
 def get_family_groups(db: Session):
-    return db.query(models.FamilyGroup).all()
+    return (
+        db.query(models.FamilyGroup)
+        .options(selectinload(models.FamilyGroup.family_group_members))
+        .all()
+    )
 
 
 def get_family_group_by_id(db: Session, family_group_id: int):
@@ -502,6 +751,7 @@ def get_family_group_by_id(db: Session, family_group_id: int):
     )
 
 
+@serialized_write
 def create_group_member(
     db: Session, user_id: int, family_group_id: int, role: str = "member"
 ):
@@ -513,16 +763,28 @@ def create_group_member(
     return family_group_member
 
 
+@serialized_write
 def create_family_group(
-    db: Session, family_group: schemas.FamilyGroupCreate, owner_id: Optional[int] = None
+    db: Session,
+    family_group: schemas.FamilyGroupCreate,
+    owner_id: Optional[int] = None,
+    owner_name: str = "",
 ):
+    """Create a family group; the owner joins it as admin in the same commit"""
     db_family_group = models.FamilyGroup(name=family_group.name, owner_id=owner_id)
     db.add(db_family_group)
+    if owner_id is not None:
+        db_family_group.family_group_members.append(
+            models.FamilyGroupMember(
+                user_id=owner_id, role="admin", user_name=owner_name
+            )
+        )
     db.commit()
     db.refresh(db_family_group)
     return db_family_group
 
 
+@serialized_write
 def add_member_to_family_group(
     db: Session,
     family_group_id: int,
@@ -539,7 +801,6 @@ def add_member_to_family_group(
         )
         .first()
     )
-    print(user_id)
     if existing_member:
         return False
 
@@ -552,6 +813,25 @@ def add_member_to_family_group(
     return True
 
 
+@serialized_write
+def remove_member_from_family_group(db: Session, family_group_id: int, user_id: int):
+    """Delete a membership and return its id, or None if there was none"""
+    membership = (
+        db.query(models.FamilyGroupMember)
+        .filter(
+            models.FamilyGroupMember.family_group_id == family_group_id,
+            models.FamilyGroupMember.user_id == user_id,
+        )
+        .first()
+    )
+    if membership is None:
+        return None
+    membership_id = membership.id
+    db.delete(membership)
+    db.commit()
+    return membership_id
+
+
 # def get_user_by_phone_number(db: Session, phone_number: str):
 #     return (
 #         db.query(models.User).filter(models.User.phone_number == phone_number).first()
@@ -561,40 +841,40 @@ def add_member_to_family_group(
 def get_family_groups_by_user_id(db: Session, user_id: int):
     """
     Get all family groups that a user is a member of
+
+    Two queries however many groups and members there are: the groups, then
+    the members of all of them at once (selectinload).
     """
-    user = (
-        db.query(models.User)
-        .options(
-            joinedload(models.User.family_group_memberships).joinedload(
-                models.FamilyGroupMember.family_group
-            )
+    return (
+        db.query(models.FamilyGroup)
+        .join(
+            models.FamilyGroupMember,
+            models.FamilyGroupMember.family_group_id == models.FamilyGroup.id,
         )
-        .filter(models.User.id == user_id)
-        .first()
+        .filter(models.FamilyGroupMember.user_id == user_id)
+        .options(selectinload(models.FamilyGroup.family_group_members))
+        .order_by(models.FamilyGroup.id)
+        .all()
     )
-    if user:
-        # Get family groups through family_group_memberships
-        return [membership.family_group for membership in user.family_group_memberships]
-    return []
 
 
 def get_family_members(db: Session, family_group_id: int):
-    family_group = get_family_group_by_id(db, family_group_id)
-    if not family_group:
-        return []
-    members = family_group.family_group_members  # This gives FamilyGroupMember objects
-    ids = [member.user_id for member in members]
-    user_names = [
-        db.query(models.User).filter(models.User.id == uid).first().name for uid in ids
-    ]
+    """Members of a family group with their current user names, in one query"""
+    rows = (
+        db.query(models.FamilyGroupMember, models.User.name)
+        .outerjoin(models.User, models.User.id == models.FamilyGroupMember.user_id)
+        .filter(models.FamilyGroupMember.family_group_id == family_group_id)
+        .order_by(models.FamilyGroupMember.id)
+        .all()
+    )
     members_expanded = []
-    for i, member in enumerate(members):
+    for member, user_name in rows:
         member_data = {
             "id": member.id,
             "user_id": member.user_id,
             "role": member.role,
             "joined_at": member.joined_at,
-            "user_name": user_names[i],
+            "user_name": user_name if user_name is not None else member.user_name,
         }
         members_expanded.append(member_data)
     return members_expanded
@@ -609,6 +889,7 @@ def get_invitation(db: Session, invitation_id: int):
     )
 
 
+@serialized_write
 def create_invitation(
     db: Session, invitation: schemas.InvitationCreate, sender_id: int
 ):
@@ -628,33 +909,82 @@ def create_invitation(
 
 def get_user_invitations(db: Session, user_id: int):
     """
-    Get all invitations for a user by their email or phone number
-    """
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    if not user:
-        return []
+    Get all open invitations for a user by their email or phone number
 
-    # Get invitations by user's emails and phone number
-    invitations = (
+    A single query: the user's addresses and phone number are subqueries, so
+    each side of the OR is a lookup on its recipient index. Expiry is checked
+    against expired_at, not only the is_expired flag the sweeper sets later.
+    """
+    email_addresses = (
+        select(models.Email.email_address)
+        .join(
+            models.user_email_association,
+            models.user_email_association.c.email_id == models.Email.id,
+        )
+        .where(models.user_email_association.c.user_id == user_id)
+    )
+    phone_number = (
+        select(models.User.phone_number)
+        .where(models.User.id == user_id)
+        .scalar_subquery()
+    )
+    return (
         db.query(models.Invitation)
         .filter(
-            (
-                (
-                    models.Invitation.recipient_email.in_(
-                        [email.email_address for email in user.emails]
-                    )
-                )
-                | (models.Invitation.recipient_phone == user.phone_number)
-            )
-            & ~models.Invitation.is_expired
-            & ~models.Invitation.is_accepted
-            & ~models.Invitation.is_rejected
+            or_(
+                models.Invitation.recipient_email.in_(email_addresses),
+                models.Invitation.recipient_phone == phone_number,
+            ),
+            or_(
+                models.Invitation.expired_at.is_(None),
+                models.Invitation.expired_at > datetime.utcnow(),
+            ),
+            ~models.Invitation.is_expired,
+            ~models.Invitation.is_accepted,
+            ~models.Invitation.is_rejected,
         )
         .all()
     )
-    return invitations
 
 
+@serialized_write
+def _expire_invitation_batch(db: Session, now: datetime, batch_size: int) -> int:
+    ids = [
+        invitation_id
+        for (invitation_id,) in db.query(models.Invitation.id)
+        .filter(
+            models.Invitation.is_expired == False,
+            models.Invitation.expired_at <= now,
+        )
+        .limit(batch_size)
+    ]
+    if ids:
+        db.query(models.Invitation).filter(models.Invitation.id.in_(ids)).update(
+            {models.Invitation.is_expired: True}, synchronize_session=False
+        )
+        db.commit()
+    return len(ids)
+
+
+def expire_invitations(
+    db: Session, now: Optional[datetime] = None, batch_size: int = 1000
+) -> int:
+    """
+    Set is_expired on every invitation past its expired_at, in batches
+
+    Each batch is its own short transaction so the sweep never holds the
+    write lock for long. Returns the number of invitations expired.
+    """
+    now = now or datetime.utcnow()
+    total = 0
+    while True:
+        expired = _expire_invitation_batch(db, now, batch_size)
+        total += expired
+        if expired < batch_size:
+            return total
+
+
+@serialized_write
 def accept_invitation(db: Session, invitation_id: int, user_id: int = None):
     db_invitation = (
         db.query(models.Invitation)
@@ -679,14 +1009,10 @@ def accept_invitation(db: Session, invitation_id: int, user_id: int = None):
                 and db_invitation.invitation_type == "challenge"
                 and db_invitation.challenge_id is not None
             ):
-                challenge = (
-                    db.query(models.Challenge)
-                    .filter(models.Challenge.id == db_invitation.challenge_id)
-                    .first()
-                )
-                user = db.query(models.User).filter(models.User.id == user_id).first()
-                if challenge and user and user not in challenge.participants:
-                    challenge.participants.append(user)
+                challenge = get_challenge(db, db_invitation.challenge_id)
+                user = get_user(db, user_id)
+                if challenge and user:
+                    _add_participant(db, challenge.id, user.id)
 
             db.commit()
             return True
@@ -697,6 +1023,7 @@ def accept_invitation(db: Session, invitation_id: int, user_id: int = None):
     return False
 
 
+@serialized_write
 def reject_invitation(db: Session, invitation_id: int):
     db_invitation = (
         db.query(models.Invitation)
@@ -724,6 +1051,112 @@ def reject_invitation(db: Session, invitation_id: int):
 
 
 # Provider Availability CRUD operations
+class SlotConflictError(ValueError):
+    """The slot changed hands between reading it and claiming it"""
+
+
+def _claim_slot(db: Session, availability_id: int, booked: bool) -> bool:
+    """
+    Atomically flip a slot's is_booked flag.
+
+    A single conditional UPDATE (compare-and-set on is_booked) so two requests
+    can never both claim the same slot; returns False if the slot was not in
+    the expected state any more. Runs inside the caller's transaction.
+    """
+    claimed = (
+        db.query(models.ProviderAvailability)
+        .filter(
+            models.ProviderAvailability.id == availability_id,
+            models.ProviderAvailability.is_booked == (not booked),
+        )
+        .update(
+            {models.ProviderAvailability.is_booked: booked},
+            synchronize_session=False,
+        )
+    )
+    return claimed == 1
+
+
+def find_covering_slot(
+    db: Session, provider_id: int, moment: datetime, is_booked: bool = False
+):
+    """
+    Find the provider slot that covers ``moment``.
+
+    Walking ix_provider_availabilities_provider_booked_end forward from
+    ``moment`` stops at the first slot that has not ended yet, so the cost
+    depends on the provider's upcoming schedule rather than on its history.
+    """
+    return (
+        db.query(models.ProviderAvailability)
+        .filter(
+            models.ProviderAvailability.provider_id == provider_id,
+            models.ProviderAvailability.is_booked == is_booked,
+            models.ProviderAvailability.end_time > moment,
+            models.ProviderAvailability.start_time <= moment,
+        )
+        .order_by(models.ProviderAvailability.end_time)
+        .first()
+    )
+
+
+def search_available_slots_statement(
+    start_time: datetime,
+    end_time: datetime,
+    specialty: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+):
+    """
+    Free slots that fit inside [start_time, end_time], with provider details.
+
+    Rows are (ProviderAvailability, provider name, provider specialty)
+    ordered by (start_time, id), the order of
+    ix_provider_availabilities_booked_start_id, so the window is one range
+    scan with no sort. Pass ``cursor`` (see `encode_slot_cursor`) instead of
+    ``skip`` to start right after the previous page.
+    """
+    slot = models.ProviderAvailability
+    after = None
+    if cursor is not None:
+        after = decode_cursor(cursor)
+        # Seek straight to the cursor rather than scanning from the window start
+        start_time = max(start_time, after[0])
+    statement = (
+        select(slot, models.Provider.name, models.Provider.specialty)
+        .join(models.Provider, models.Provider.id == slot.provider_id)
+        .where(
+            slot.is_booked == False,
+            slot.start_time >= start_time,
+            slot.start_time < end_time,
+            slot.end_time <= end_time,
+        )
+    )
+    if specialty is not None:
+        statement = statement.where(models.Provider.specialty == specialty)
+    if after is not None:
+        statement = statement.where(tuple_(slot.start_time, slot.id) > tuple_(*after))
+    return statement.order_by(slot.start_time, slot.id).offset(skip).limit(limit)
+
+
+def search_available_slots(
+    db: Session,
+    start_time: datetime,
+    end_time: datetime,
+    specialty: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+):
+    """See `search_available_slots_statement`"""
+    return db.execute(
+        search_available_slots_statement(
+            start_time, end_time, specialty, skip, limit, cursor
+        )
+    ).all()
+
+
 def get_provider_availability(db: Session, availability_id: int):
     return (
         db.query(models.ProviderAvailability)
@@ -746,7 +1179,12 @@ def get_provider_availabilities(
 
 def get_available_provider_slots(db: Session, provider_id: int):
     """Get all available (not booked) time slots for a provider"""
-    return (
+    generation = cache.directory_cache.generation(f"slots:{provider_id}")
+    key = f"slots:{provider_id}:{generation}"
+    rows = cache.directory_cache.get(key)
+    if rows is not None:
+        return [_detached(models.ProviderAvailability, columns) for columns in rows]
+    slots = (
         db.query(models.ProviderAvailability)
         .filter(
             and_(
@@ -756,26 +1194,184 @@ def get_available_provider_slots(db: Session, provider_id: int):
         )
         .all()
     )
+    cache.directory_cache.set(key, [_columns(slot) for slot in slots])
+    return slots
 
 
-def get_all_providers_available_slots(db: Session):
-    """Get all available (not booked) time slots for all providers"""
-    try:
-        result = (
-            db.query(models.ProviderAvailability)
-            .filter(models.ProviderAvailability.is_booked == False)
-            .all()
+def encode_slot_cursor(slot) -> str:
+    """Cursor pointing just after ``slot`` in the free-slot list"""
+    return encode_cursor(slot.start_time, slot.id)
+
+
+def _available_slots_page(
+    db: Session,
+    cursor: Optional[str],
+    limit: int,
+    start_time: Optional[datetime],
+    end_time: Optional[datetime],
+):
+    """
+    One page of free slots in (start_time, id) order.
+
+    ix_provider_availabilities_booked_start_id returns the rows in that order
+    both with and without a time window, so a page stops after ``limit`` rows
+    instead of sorting every free slot in the window.
+    """
+    query = (
+        db.query(
+            models.ProviderAvailability,
+            models.Provider.name,
+            models.Provider.specialty,
         )
-        print(f"Found {len(result)} available slots")
+        .join(
+            models.Provider,
+            models.Provider.id == models.ProviderAvailability.provider_id,
+        )
+        .filter(models.ProviderAvailability.is_booked == False)
+    )
+    if cursor is not None:
+        after_start_time, after_id = decode_cursor(cursor)
+        slot = models.ProviderAvailability
+        query = query.filter(
+            tuple_(slot.start_time, slot.id) > tuple_(after_start_time, after_id)
+        )
+        # Seek straight to the cursor rather than scanning from the window start
+        if start_time is None or start_time < after_start_time:
+            start_time = after_start_time
+    if start_time is not None:
+        query = query.filter(models.ProviderAvailability.start_time >= start_time)
+    if end_time is not None:
+        query = query.filter(models.ProviderAvailability.end_time <= end_time)
+    return (
+        query.order_by(
+            models.ProviderAvailability.start_time, models.ProviderAvailability.id
+        )
+        .limit(limit)
+        .all()
+    )
+
+
+def get_all_providers_available_slots(
+    db: Session,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+):
+    """
+    Get one page of available (not booked) slots for all providers.
+
+    Keyset-paginated on (start_time, id): pass `encode_slot_cursor` of the
+    last slot of the previous page as ``cursor``. Rows are
+    (ProviderAvailability, provider name, provider specialty), so the provider
+    is joined in the same query. Only the first page is cached; deeper pages
+    would fill the cache one key per page.
+    """
+    if cursor is not None:
+        result = _available_slots_page(db, cursor, limit, start_time, end_time)
+        logger.debug("Found %d available slots", len(result))
         return result
-    except Exception as e:
-        print(f"Error in get_all_providers_available_slots: {str(e)}")
-        raise
+
+    generation = cache.directory_cache.generation("available")
+    key = f"available:{generation}:{limit}:{start_time}:{end_time}"
+    rows = cache.directory_cache.get(key)
+    if rows is not None:
+        return [
+            (_detached(models.ProviderAvailability, columns), name, specialty)
+            for columns, name, specialty in rows
+        ]
+    result = _available_slots_page(db, None, limit, start_time, end_time)
+    logger.debug("Found %d available slots", len(result))
+    cache.directory_cache.set(
+        key, [(_columns(slot), name, specialty) for slot, name, specialty in result]
+    )
+    return result
+
+
+def iter_all_providers_available_slots(
+    db: Session,
+    cursor: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    batch_size: int = 500,
+):
+    """Yield every available slot page by page, holding one batch in memory."""
+    while True:
+        # Straight from the database: caching an export would keep every
+        # batch of it in the directory cache
+        rows = _available_slots_page(db, cursor, batch_size, start_time, end_time)
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        cursor = encode_slot_cursor(rows[-1][0])
+        # Drop the finished batch from the identity map so memory stays flat.
+        db.expunge_all()
+
+
+def _lock_provider_schedule(db: Session, provider_id: int):
+    """
+    Lock the provider row until the transaction ends, so the overlap check
+    and the insert after it run for one request at a time per provider.
+
+    PostgreSQL takes a row lock with SELECT ... FOR UPDATE. SQLite has no row
+    locks; the first write of a transaction takes the database write lock, so
+    a no-op UPDATE of the provider row serializes the writers instead.
+    """
+    query = db.query(models.Provider).filter(models.Provider.id == provider_id)
+    if db.get_bind().dialect.name == "postgresql":
+        query.with_entities(models.Provider.id).with_for_update().first()
+    else:
+        query.update(
+            {models.Provider.id: models.Provider.id}, synchronize_session=False
+        )
+
+
+def _check_no_overlap(db: Session, provider_id: int, intervals: List[tuple]):
+    """
+    Raise ValueError if a sorted, non-overlapping list of intervals overlaps
+    an existing slot of the provider: one range query, then a merge sweep.
+    """
+    existing = (
+        db.query(
+            models.ProviderAvailability.start_time,
+            models.ProviderAvailability.end_time,
+        )
+        .filter(
+            models.ProviderAvailability.provider_id == provider_id,
+            models.ProviderAvailability.end_time > intervals[0][0],
+            models.ProviderAvailability.start_time < intervals[-1][1],
+        )
+        .order_by(models.ProviderAvailability.start_time)
+        .all()
+    )
+    i = 0
+    for existing_start, existing_end in existing:
+        # Skip new slots that end before this existing one starts
+        while i < len(intervals) and intervals[i][1] <= existing_start:
+            i += 1
+        if i < len(intervals) and intervals[i][0] < existing_end:
+            raise ValueError(
+                f"Slot starting at {intervals[i][0]} overlaps an existing slot"
+            )
 
 
+@serialized_write
 def create_provider_availability(
     db: Session, availability: schemas.ProviderAvailabilityCreate
 ):
+    """Create one slot; raises ValueError if it overlaps one of the provider's"""
+    if availability.end_time <= availability.start_time:
+        raise ValueError("A slot must end after it starts")
+    _lock_provider_schedule(db, availability.provider_id)
+    try:
+        _check_no_overlap(
+            db,
+            availability.provider_id,
+            [(availability.start_time, availability.end_time)],
+        )
+    except ValueError:
+        db.rollback()
+        raise
     db_availability = models.ProviderAvailability(
         provider_id=availability.provider_id,
         start_time=availability.start_time,
@@ -785,9 +1381,97 @@ def create_provider_availability(
     db.add(db_availability)
     db.commit()
     db.refresh(db_availability)
+    cache.invalidate_slots(db_availability.provider_id)
     return db_availability
 
 
+# Upper bound for one bulk request (a 12-week, 7-day, 15-minute schedule is 8064)
+MAX_BULK_SLOTS = 10000
+
+
+def expand_recurrence(rule: schemas.AvailabilityRecurrence):
+    """Expand a weekly recurrence into (start_time, end_time) pairs"""
+    if rule.slot_minutes <= 0:
+        raise ValueError("slot_minutes must be positive")
+    if not 0 < rule.weeks <= schemas.MAX_RECURRENCE_WEEKS:
+        raise ValueError(
+            f"weeks must be between 1 and {schemas.MAX_RECURRENCE_WEEKS}"
+        )
+    if not rule.weekdays:
+        raise ValueError("weekdays must not be empty")
+    if rule.day_end <= rule.day_start:
+        raise ValueError("day_end must be after day_start")
+    if any(day < 0 or day > 6 for day in rule.weekdays):
+        raise ValueError("weekdays must be between 0 (Monday) and 6 (Sunday)")
+
+    length = timedelta(minutes=rule.slot_minutes)
+    weekdays = set(rule.weekdays)
+    intervals = []
+    for offset in range(rule.weeks * 7):
+        day = rule.start_date + timedelta(days=offset)
+        if day.weekday() not in weekdays:
+            continue
+        start = datetime.combine(day, rule.day_start)
+        day_end = datetime.combine(day, rule.day_end)
+        # A trailing remainder shorter than one slot is dropped
+        while start + length <= day_end:
+            intervals.append((start, start + length))
+            start += length
+            if len(intervals) > MAX_BULK_SLOTS:
+                raise ValueError(f"At most {MAX_BULK_SLOTS} slots per request")
+    return intervals
+
+
+@serialized_write
+def create_provider_availabilities_bulk(
+    db: Session, provider_id: int, intervals: List[tuple]
+) -> int:
+    """
+    Insert many slots for one provider in a single transaction.
+
+    Intervals are half-open [start, end). They are sorted once; an overlap
+    within the batch is then always between neighbours, and the existing
+    slots in the covered range (one range query) are checked with a merge
+    sweep under the provider lock, so concurrent requests for the same
+    provider cannot both pass it. Nothing is written if any interval overlaps.
+    """
+    if not intervals:
+        return 0
+    if len(intervals) > MAX_BULK_SLOTS:
+        raise ValueError(f"At most {MAX_BULK_SLOTS} slots per request")
+    intervals = sorted(intervals)
+    for start, end in intervals:
+        if end <= start:
+            raise ValueError(f"Slot starting at {start} must end after it starts")
+    for (prev_start, prev_end), (start, end) in zip(intervals, intervals[1:]):
+        if start < prev_end:
+            raise ValueError(f"Slots starting at {prev_start} and {start} overlap")
+
+    _lock_provider_schedule(db, provider_id)
+    try:
+        _check_no_overlap(db, provider_id, intervals)
+    except ValueError:
+        db.rollback()
+        raise
+
+    db.execute(
+        insert(models.ProviderAvailability),
+        [
+            {
+                "provider_id": provider_id,
+                "start_time": start,
+                "end_time": end,
+                "is_booked": False,
+            }
+            for start, end in intervals
+        ],
+    )
+    db.commit()
+    cache.invalidate_slots(provider_id)
+    return len(intervals)
+
+
+@serialized_write
 def book_provider_slot(db: Session, availability_id: int):
     """Mark a provider availability slot as booked"""
     db_availability = (
@@ -795,14 +1479,16 @@ def book_provider_slot(db: Session, availability_id: int):
         .filter(models.ProviderAvailability.id == availability_id)
         .first()
     )
-    if db_availability and not db_availability.is_booked:
-        db_availability.is_booked = True
+    if db_availability and _claim_slot(db, availability_id, booked=True):
         db.commit()
         db.refresh(db_availability)
+        cache.invalidate_slots(db_availability.provider_id)
         return db_availability
+    db.rollback()
     return None
 
 
+@serialized_write
 def delete_provider_availability(db: Session, availability_id: int):
     """Delete a provider availability slot"""
     db_availability = (
@@ -811,8 +1497,10 @@ def delete_provider_availability(db: Session, availability_id: int):
         .first()
     )
     if db_availability:
+        provider_id = db_availability.provider_id
         db.delete(db_availability)
         db.commit()
+        cache.invalidate_slots(provider_id)
         return True
     return False
 
@@ -827,14 +1515,13 @@ def get_challenge_by_user(db: Session, user_id: int):
     # return (
     #     db.query(models.Challenge).options(joinedload(models.Challenge.creator)).all()
     # )
+    participants = models.challenge_participant_association
     return (
         db.query(models.Challenge)
-        # 按参与者包含该 user_id 进行筛选
-        .filter(models.Challenge.participants.any(models.User.id == user_id))
-        # 需要的话，预加载 creator 和 participants，避免 N+1
-        .options(
-            joinedload(models.Challenge.creator),
-            joinedload(models.Challenge.participants),
-        )
+        # 按参与者包含该 user_id 进行筛选（走 ix_challenge_participants_user）
+        .join(participants, participants.c.challenge_id == models.Challenge.id)
+        .filter(participants.c.user_id == user_id)
+        # 只预加载 creator；参与者人数见 participant_count
+        .options(joinedload(models.Challenge.creator))
         .all()
     )
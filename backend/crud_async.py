@@ -0,0 +1,145 @@
+"""
+Async versions of the crud functions on the hottest request paths.
+
+They mirror the functions of the same name in crud.py but take an
+AsyncSession, so the routes in routers/async_hot_paths.py never hold a
+threadpool worker while waiting on the database.
+"""
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import cache
+import models
+import passwords
+import schemas
+from crud import (
+    SlotConflictError,
+    search_available_slots_statement,
+    user_appointments_statement,
+    user_provider_ids_statement,
+)
+from database import async_serialized_write
+
+
+# User operations
+async def get_user(db: AsyncSession, user_id: int):
+    return await db.get(models.User, user_id)
+
+
+async def get_user_by_phone_number(db: AsyncSession, phone_number: str):
+    result = await db.execute(
+        select(models.User).where(models.User.phone_number == phone_number)
+    )
+    return result.scalars().first()
+
+
+async def authenticate_user(db: AsyncSession, phone_number: str, password: str):
+    user = await get_user_by_phone_number(db, phone_number)
+    if not user or not user.password_hash:
+        return False
+    # bcrypt runs in the password process pool, off the event loop
+    if not await passwords.verify_password_async(password, user.password_hash):
+        return False
+    return user
+
+
+# Provider operations
+async def get_provider(db: AsyncSession, provider_id: int):
+    return await db.get(models.Provider, provider_id)
+
+
+# Provider availability operations
+async def find_covering_slot(
+    db: AsyncSession, provider_id: int, moment: datetime, is_booked: bool = False
+):
+    """Find the provider slot that covers ``moment``, see crud.find_covering_slot"""
+    result = await db.execute(
+        select(models.ProviderAvailability)
+        .where(
+            models.ProviderAvailability.provider_id == provider_id,
+            models.ProviderAvailability.is_booked == is_booked,
+            models.ProviderAvailability.end_time > moment,
+            models.ProviderAvailability.start_time <= moment,
+        )
+        .order_by(models.ProviderAvailability.end_time)
+        .limit(1)
+    )
+    return result.scalars().first()
+
+
+async def search_available_slots(
+    db: AsyncSession,
+    start_time: datetime,
+    end_time: datetime,
+    specialty: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+):
+    """See crud.search_available_slots_statement"""
+    result = await db.execute(
+        search_available_slots_statement(
+            start_time, end_time, specialty, skip, limit, cursor
+        )
+    )
+    return result.all()
+
+
+# Appointment operations
+async def get_user_appointments(
+    db: AsyncSession, user_id: int, cursor: Optional[str] = None, limit: int = 100
+):
+    """See crud.user_appointments_statement"""
+    provider_ids = (
+        (await db.execute(user_provider_ids_statement(user_id))).scalars().all()
+    )
+    result = await db.execute(
+        user_appointments_statement(user_id, provider_ids, cursor, limit)
+    )
+    return result.all()
+
+
+async def create_appointment(
+    db: AsyncSession, appointment: schemas.AppointmentCreate, user_id: int
+):
+    async with async_serialized_write():
+        # Check if the appointment time slot is available
+        available_slot = await find_covering_slot(
+            db, appointment.provider_id, appointment.date_time, is_booked=False
+        )
+
+        if not available_slot:
+            raise ValueError("Selected time slot is not available")
+
+        # Compare-and-set on is_booked, see crud._claim_slot
+        claimed = await db.execute(
+            update(models.ProviderAvailability)
+            .where(
+                models.ProviderAvailability.id == available_slot.id,
+                models.ProviderAvailability.is_booked == False,
+            )
+            .values(is_booked=True)
+            .execution_options(synchronize_session=False)
+        )
+        if claimed.rowcount != 1:
+            await db.rollback()
+            raise SlotConflictError("Selected time slot was just booked")
+
+        db_appointment = models.Appointment(
+            user_id=user_id,
+            user_name=appointment.user_name,
+            provider_name=appointment.provider_name,
+            provider_id=appointment.provider_id,
+            date_time=appointment.date_time,
+            consultation_type=appointment.consultation_type,
+            notes=appointment.notes,
+        )
+        db.add(db_appointment)
+        await db.commit()
+    cache.invalidate_slots(appointment.provider_id)
+    await db.refresh(db_appointment)
+    return db_appointment
@@ -0,0 +1,110 @@
+"""
+Collision-free 8-digit health IDs.
+
+Every new ID comes from a counter in the ``id_sequences`` table. Each process
+reserves a block of counter values with one UPDATE, so IDs stay unique
+across API processes and most allocations never touch the database.
+
+A counter value is not used as the ID directly. A keyed Feistel permutation
+maps it onto the range 00000000-99999999 first. That mapping is a
+bijection, so distinct counters always give distinct IDs and nobody can
+guess a neighbour's ID from their own.
+"""
+
+import hashlib
+import hmac
+import threading
+from typing import List
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+import config
+import models
+
+SEQUENCE_NAME = "health_id"
+
+# IDs are 8 digits: a 10^4 x 10^4 Feistel network covers exactly that range
+DIGITS = 8
+HALF = 10 ** (DIGITS // 2)
+SPACE = HALF * HALF
+ROUNDS = 4
+
+_lock = threading.Lock()
+_next = 0
+_end = 0  # exclusive end of the reserved block
+
+
+def _round(key: bytes, i: int, value: int) -> int:
+    digest = hmac.new(key, f"{i}:{value}".encode(), hashlib.sha256).digest()
+    return int.from_bytes(digest[:8], "big") % HALF
+
+
+def permute(counter: int, key: str = None) -> int:
+    """Map ``counter`` in [0, 10^8) onto a unique value in the same range"""
+    if not 0 <= counter < SPACE:
+        raise ValueError("Health ID space exhausted")
+    secret = (key or config.HEALTH_ID_KEY).encode()
+    left, right = divmod(counter, HALF)
+    for i in range(ROUNDS):
+        left, right = right, (left + _round(secret, i, right)) % HALF
+    return left * HALF + right
+
+
+def format_health_id(counter: int) -> str:
+    return str(permute(counter)).zfill(DIGITS)
+
+
+def reserve_block(db: Session, size: int) -> int:
+    """
+    Reserve ``size`` counter values and return the first one.
+
+    Runs in its own short transaction so the reservation is committed even if
+    the caller's transaction rolls back; the values are then simply skipped.
+    """
+    bind = db.get_bind()
+    sequences = models.IdSequence.__table__
+    while True:
+        try:
+            with bind.begin() as conn:
+                bumped = conn.execute(
+                    update(sequences)
+                    .where(sequences.c.name == SEQUENCE_NAME)
+                    .values(next_value=sequences.c.next_value + size)
+                )
+                if bumped.rowcount == 0:
+                    conn.execute(
+                        sequences.insert().values(name=SEQUENCE_NAME, next_value=size)
+                    )
+                    return 0
+                end = conn.execute(
+                    select(sequences.c.next_value).where(
+                        sequences.c.name == SEQUENCE_NAME
+                    )
+                ).scalar_one()
+        except IntegrityError:
+            # Another process created the sequence row first; bump that one
+            continue
+        return end - size
+
+
+def allocate(db: Session) -> str:
+    """Next unused health ID"""
+    return allocate_many(db, 1)[0]
+
+
+def allocate_many(db: Session, count: int) -> List[str]:
+    """``count`` unused health IDs, e.g. for bulk registration"""
+    global _next, _end
+    with _lock:
+        counters = []
+        while len(counters) < count:
+            if _next >= _end:
+                size = max(config.HEALTH_ID_BLOCK_SIZE, count - len(counters))
+                _next = reserve_block(db, size)
+                _end = _next + size
+            take = min(count - len(counters), _end - _next)
+            counters.extend(range(_next, _next + take))
+            _next += take
+    return [format_health_id(counter) for counter in counters]
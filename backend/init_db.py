@@ -1,7 +1,7 @@
-from database import engine, Base
-from models import *
+import migrations
+from database import engine
 
-# Create all tables
-Base.metadata.create_all(bind=engine)
+# Create the tables and apply every pending migration
+applied = migrations.upgrade(engine)
 
-print("Database tables created successfully!")
\ No newline at end of file
+print(f"Database is up to date (applied migrations: {applied or 'none'})")
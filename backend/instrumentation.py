@@ -0,0 +1,221 @@
+"""
+Per-request database instrumentation and Prometheus metrics.
+
+`instrument_engine` hooks the SQLAlchemy cursor events of an engine. For
+each statement it adds to the count, the total database time and the
+slowest statement of the request that ran it. The request is found through
+a context variable. `InstrumentationMiddleware` opens that context for every
+HTTP request. With HEALTHTRACK_DEBUG it reports the numbers in response
+headers, and it feeds per-route histograms that `render_metrics` serves in
+the Prometheus text format on /metrics.
+
+Metrics are kept per process; scrape every worker.
+"""
+
+import contextvars
+import threading
+import time
+
+from sqlalchemy import event
+
+import config
+
+# Histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class RequestStats:
+    """Database work done while serving one request"""
+
+    __slots__ = ("statements", "db_time", "slowest_time", "slowest_statement")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement = None
+
+    def record(self, statement: str, duration: float):
+        self.statements += 1
+        self.db_time += duration
+        if duration > self.slowest_time:
+            self.slowest_time = duration
+            self.slowest_statement = statement
+
+
+_current = contextvars.ContextVar("healthtrack_request_stats", default=None)
+
+
+def current_stats():
+    """Stats of the request being served, or None outside a request"""
+    return _current.get()
+
+
+def instrument_engine(engine):
+    """Record every statement run through ``engine`` on the current request"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.setdefault("instrumentation_started", [])
+        started.append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["instrumentation_started"].pop()
+        stats = _current.get()
+        if stats is not None:
+            stats.record(statement, time.perf_counter() - started)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        # A failed statement never reaches after_cursor_execute; drop its start
+        # time here so the next statement on the connection is timed correctly
+        conn = context.connection
+        started = conn.info.get("instrumentation_started") if conn else None
+        if not started or context.execution_context is None:
+            return
+        duration = time.perf_counter() - started.pop()
+        stats = _current.get()
+        if stats is not None:
+            stats.record(context.statement, duration)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += 1
+        self.sum += value
+
+
+class Metrics:
+    """Per-route request histograms"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}  # (method, route, status) -> histograms
+
+    def observe(self, method, route, status, duration, stats):
+        key = (method, route, str(status))
+        with self._lock:
+            histograms = self._routes.get(key)
+            if histograms is None:
+                histograms = self._routes[key] = (
+                    Histogram(DURATION_BUCKETS),
+                    Histogram(STATEMENT_BUCKETS),
+                    Histogram(DURATION_BUCKETS),
+                )
+            request_duration, db_statements, db_time = histograms
+            request_duration.observe(duration)
+            db_statements.observe(stats.statements)
+            db_time.observe(stats.db_time)
+
+    def render(self) -> str:
+        names = (
+            ("healthtrack_request_duration_seconds", "Request latency"),
+            ("healthtrack_db_statements_per_request", "SQL statements per request"),
+            ("healthtrack_db_time_seconds", "Time spent in the database per request"),
+        )
+        lines = []
+        with self._lock:
+            items = sorted(self._routes.items())
+            for index, (name, help_text) in enumerate(names):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for (method, route, status), histograms in items:
+                    histogram = histograms[index]
+                    labels = (
+                        f'method="{method}",route="{_escape(route)}",status="{status}"'
+                    )
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+                    lines.append(
+                        f'{name}_bucket{{{labels},le="+Inf"}} {histogram.total}'
+                    )
+                    lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+                    lines.append(f"{name}_count{{{labels}}} {histogram.total}")
+        return "\n".join(lines) + "\n"
+
+
+def _ms(seconds: float) -> bytes:
+    return f"{seconds * 1000:.2f}".encode()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+metrics = Metrics()
+
+
+def render_metrics(gauges: dict = None) -> str:
+    """Prometheus text exposition of the request metrics plus extra gauges"""
+    text = metrics.render()
+    for name, value in (gauges or {}).items():
+        text += f"# TYPE {name} gauge\n{name} {value}\n"
+    return text
+
+
+class InstrumentationMiddleware:
+    """Pure ASGI middleware, so it adds no task or thread hop per request"""
+
+    def __init__(self, app, debug_headers: bool = None):
+        self.app = app
+        self.debug_headers = (
+            config.DEBUG_HEADERS if debug_headers is None else debug_headers
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.debug_headers:
+                    # Streaming responses may still run queries after this point
+                    headers = list(message.get("headers", []))
+                    headers += [
+                        (b"x-db-statements", str(stats.statements).encode()),
+                        (b"x-db-time-ms", _ms(stats.db_time)),
+                        (b"x-db-slowest-ms", _ms(stats.slowest_time)),
+                    ]
+                    if stats.slowest_statement:
+                        slowest = " ".join(stats.slowest_statement.split())[:200]
+                        headers.append(
+                            (
+                                b"x-db-slowest-statement",
+                                slowest.encode("latin-1", "replace"),
+                            )
+                        )
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            metrics.observe(
+                scope["method"],
+                # The route template keeps label cardinality bounded
+                getattr(route, "path", None) or "unmatched",
+                status,
+                time.perf_counter() - started,
+                stats,
+            )
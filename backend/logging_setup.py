@@ -0,0 +1,78 @@
+"""
+Application logging.
+
+Modules log through ``logging.getLogger(__name__)``. `configure` gives the
+root logger a single QueueHandler, so a request thread only formats the
+record and puts it on a queue; a QueueListener thread does the blocking write
+to stderr. Calls below HEALTHTRACK_LOG_LEVEL return at the ``isEnabledFor``
+check, so debug logging on hot paths costs nothing when it is off.
+
+HEALTHTRACK_LOG_FORMAT=json writes one JSON object per line with the fields
+passed in ``extra``; "text" writes a plain line for local development.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+from datetime import datetime, timezone
+
+import config
+
+# LogRecord attributes that are not ``extra`` fields
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener = None
+_handler = None
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure():
+    """Route all logging through a background queue; safe to call repeatedly"""
+    global _listener, _handler
+    if _listener is not None:
+        return
+
+    if config.LOG_FORMAT == "json":
+        formatter = JSONFormatter()
+    else:
+        formatter = logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    # The queue handler formats the record in the calling thread, so the
+    # listener's handler only writes the finished line
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler())
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    _handler = logging.handlers.QueueHandler(log_queue)
+    _handler.setFormatter(formatter)
+    root = logging.getLogger()
+    root.setLevel(config.LOG_LEVEL)
+    root.addHandler(_handler)
+
+
+def shutdown():
+    """Write out the queued records and detach the queue; `configure` may run again"""
+    global _listener, _handler
+    if _listener is None:
+        return
+    logging.getLogger().removeHandler(_handler)
+    _listener.stop()
+    atexit.unregister(_listener.stop)
+    _listener = _handler = None
@@ -1,17 +1,57 @@
-from fastapi import FastAPI
+import asyncio
+import contextlib
+
+from fastapi import FastAPI, Request
+from fastapi.datastructures import Default
 from fastapi.middleware.cors import CORSMiddleware
-import uvicorn
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+import cache
+import config
+import instrumentation
+import logging_setup
+import migrations
+import passwords
+import serializers
+import sweeper
 
-from database import engine, Base
+from database import engine, ASYNC_DB_ENABLED
 from routers import users, providers, appointments, challenges, family_groups, invitations, auth, providers_availability
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Structured logging through a background queue (see logging_setup.py).
+    # Configured here rather than on import, so importing the app for tests
+    # or tooling leaves the root logger alone.
+    logging_setup.configure()
+    # Schema changes are applied by `python -m migrations`, not by workers
+    if config.AUTO_MIGRATE:
+        migrations.upgrade(engine)
+    else:
+        migrations.check(engine)
+    migrations.verify(engine, strict=config.SCHEMA_STRICT)
+    sweeper_task = None
+    if config.INVITATION_SWEEP_INTERVAL_SECONDS > 0:
+        sweeper_task = asyncio.create_task(sweeper.run_invitation_sweeper())
+    yield
+    if sweeper_task is not None:
+        sweeper_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await sweeper_task
+    logging_setup.shutdown()
+
 
 app = FastAPI(
     title="HealthTrack API",
     description="Backend API for the HealthTrack Personal Wellness Platform",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    # Default() keeps FastAPI's own Pydantic-to-JSON path for routes with a
+    # response_model; the class is used for everything else
+    default_response_class=Default(
+        serializers.FastJSONResponse if config.FAST_JSON else JSONResponse
+    ),
 )
 
 # CORS middleware to allow frontend to communicate with backend
@@ -21,8 +61,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-After-Id", "X-Next-Cursor"],
 )
 
+# Statement counts, DB time and latency per request (see instrumentation.py)
+if config.METRICS_ENABLED or config.DEBUG_HEADERS:
+    app.add_middleware(instrumentation.InstrumentationMiddleware)
+
+# Async versions of the hottest routes go first so they shadow the sync ones
+if ASYNC_DB_ENABLED:
+    from routers import async_hot_paths
+
+    app.include_router(async_hot_paths.router)
+
 # Include all routers
 app.include_router(users.router)
 app.include_router(providers.router)
@@ -33,13 +84,50 @@ app.include_router(invitations.router)
 app.include_router(auth.router)
 app.include_router(providers_availability.router)
 
+@app.exception_handler(passwords.PasswordPoolSaturated)
+async def password_pool_saturated_handler(
+    request: Request, exc: passwords.PasswordPoolSaturated
+):
+    # Shed load instead of queueing logins behind a full bcrypt pool
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy, please retry shortly"},
+        headers={"Retry-After": str(config.PASSWORD_RETRY_AFTER_SECONDS)},
+    )
+
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to HealthTrack API"}
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "password_pool": passwords.stats(),
+        "caches": cache.stats(),
+    }
+
+if config.METRICS_ENABLED:
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        pool = passwords.stats()
+        gauges = {
+            "healthtrack_password_pool_in_flight": pool["in_flight"],
+            "healthtrack_password_pool_completed": pool["completed"],
+            "healthtrack_password_pool_rejected": pool["rejected"],
+        }
+        for name, counters in cache.stats().items():
+            gauges[f"healthtrack_{name}_cache_hits"] = counters["hits"]
+            gauges[f"healthtrack_{name}_cache_misses"] = counters["misses"]
+        return PlainTextResponse(
+            instrumentation.render_metrics(gauges),
+            media_type="text/plain; version=0.0.4",
+        )
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    import uvicorn
+
+    # log_config=None sends uvicorn's own logs through logging_setup as well
+    uvicorn.run(app, host="0.0.0.0", port=8000, log_config=None)
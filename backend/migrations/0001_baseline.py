@@ -0,0 +1,160 @@
+"""
+Tables of the original schema, as the first release created them.
+
+Frozen here instead of taken from ``models``: later migrations add what came
+after, so a new database goes through the same steps as one created by the
+first release and both end up with the same schema.
+"""
+
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Integer,
+    MetaData,
+    String,
+    Table,
+)
+
+metadata = MetaData()
+
+Table(
+    "user_emails",
+    metadata,
+    Column("user_id", Integer, ForeignKey("users.id")),
+    Column("email_id", Integer, ForeignKey("emails.id")),
+)
+
+Table(
+    "user_providers",
+    metadata,
+    Column("user_id", Integer, ForeignKey("users.id")),
+    Column("provider_id", Integer, ForeignKey("providers.id")),
+)
+
+Table(
+    "challenge_participants",
+    metadata,
+    Column("challenge_id", Integer, ForeignKey("challenges.id")),
+    Column("user_id", Integer, ForeignKey("users.id")),
+)
+
+Table(
+    "users",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("health_id", String, unique=True, index=True),
+    Column("name", String, index=True),
+    Column("phone_number", String, unique=True, index=True),
+    Column("phone_verified", Boolean),
+    Column("password_hash", String),
+    Column("primary_provider_id", Integer, ForeignKey("providers.id"), nullable=True),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "emails",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("email_address", String, unique=True, index=True),
+    Column("verified", Boolean),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "providers",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("license_number", String, unique=True, index=True),
+    Column("name", String, index=True),
+    Column("specialty", String),
+    Column("verified", Boolean),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "appointments",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id")),
+    Column("provider_id", Integer, ForeignKey("providers.id")),
+    Column("user_name", String),
+    Column("provider_name", String),
+    Column("date_time", DateTime),
+    Column("consultation_type", String),
+    Column("notes", String, nullable=True),
+    Column("cancelled", Boolean),
+    Column("cancellation_reason", String, nullable=True),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "challenges",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("challenge_id", String, unique=True, index=True),
+    Column("creator_id", Integer, ForeignKey("users.id"), nullable=True),
+    Column("goal", String),
+    Column("start_date", DateTime),
+    Column("end_date", DateTime),
+    Column("created_at", DateTime),
+    Column("progress", Integer),
+    Column("title", String),
+    Column("description", String),
+)
+
+Table(
+    "family_groups",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("owner_id", Integer, ForeignKey("users.id")),
+    Column("name", String),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "family_group_members",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("family_group_id", Integer, ForeignKey("family_groups.id")),
+    Column("user_id", Integer, ForeignKey("users.id")),
+    Column("user_name", String, nullable=True),
+    Column("role", String),
+    Column("joined_at", DateTime),
+)
+
+Table(
+    "invitations",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("sender_id", Integer, ForeignKey("users.id")),
+    Column("recipient_email", String, nullable=True),
+    Column("recipient_phone", String, nullable=True),
+    Column("invitation_type", String),
+    Column("challenge_id", Integer, ForeignKey("challenges.id"), nullable=True),
+    Column("family_group_id", Integer, ForeignKey("family_groups.id"), nullable=True),
+    Column("sent_at", DateTime),
+    Column("accepted_at", DateTime, nullable=True),
+    Column("expired_at", DateTime, nullable=True),
+    Column("is_accepted", Boolean),
+    Column("is_expired", Boolean),
+    Column("is_rejected", Boolean),
+    Column("rejected_at", DateTime, nullable=True),
+)
+
+Table(
+    "provider_availabilities",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("provider_id", Integer, ForeignKey("providers.id")),
+    Column("start_time", DateTime),
+    Column("end_time", DateTime),
+    Column("is_booked", Boolean),
+    Column("created_at", DateTime),
+)
+
+
+def upgrade(connection):
+    # Only creates what is missing, so existing databases are left as they are
+    metadata.create_all(connection)
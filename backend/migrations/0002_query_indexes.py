@@ -0,0 +1,29 @@
+"""Indexes for the slot search, appointment feed and challenge date filter"""
+
+from migrations import create_indexes
+
+# Index builds only; see migrations/__init__.py
+TRANSACTIONAL = False
+
+
+def upgrade(connection):
+    create_indexes(connection, "providers", "ix_providers_specialty")
+    create_indexes(
+        connection,
+        "provider_availabilities",
+        "ix_provider_availabilities_provider_booked_end",
+        "ix_provider_availabilities_booked_id",
+        "ix_provider_availabilities_booked_start",
+    )
+    create_indexes(
+        connection,
+        "appointments",
+        "ix_appointments_user_date",
+        "ix_appointments_provider_date",
+    )
+    create_indexes(
+        connection,
+        "challenges",
+        "ix_challenges_start_date_id",
+        "ix_challenges_end_date",
+    )
@@ -0,0 +1,57 @@
+"""Unique challenge membership, participant lookups and participant_count"""
+
+from sqlalchemy import inspect, text
+
+from migrations import create_indexes
+
+
+def upgrade(connection):
+    columns = {
+        column["name"] for column in inspect(connection).get_columns("challenges")
+    }
+    if "participant_count" not in columns:
+        connection.execute(
+            text(
+                "ALTER TABLE challenges "
+                "ADD COLUMN participant_count INTEGER NOT NULL DEFAULT 0"
+            )
+        )
+
+    # The unique index cannot be built over duplicate memberships
+    duplicates = connection.execute(
+        text(
+            "SELECT challenge_id, user_id FROM challenge_participants "
+            "GROUP BY challenge_id, user_id HAVING count(*) > 1"
+        )
+    ).all()
+    for challenge_id, user_id in duplicates:
+        pair = {"challenge_id": challenge_id, "user_id": user_id}
+        connection.execute(
+            text(
+                "DELETE FROM challenge_participants "
+                "WHERE challenge_id = :challenge_id AND user_id = :user_id"
+            ),
+            pair,
+        )
+        connection.execute(
+            text(
+                "INSERT INTO challenge_participants (challenge_id, user_id) "
+                "VALUES (:challenge_id, :user_id)"
+            ),
+            pair,
+        )
+
+    create_indexes(
+        connection,
+        "challenge_participants",
+        "uq_challenge_participants_challenge_user",
+        "ix_challenge_participants_user",
+    )
+
+    connection.execute(
+        text(
+            "UPDATE challenges SET participant_count = ("
+            "SELECT count(*) FROM challenge_participants "
+            "WHERE challenge_participants.challenge_id = challenges.id)"
+        )
+    )
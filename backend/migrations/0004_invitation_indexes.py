@@ -0,0 +1,17 @@
+"""Recipient lookups for the invitation inbox and the expiry sweeper"""
+
+from migrations import create_indexes
+
+# Index builds only; see migrations/__init__.py
+TRANSACTIONAL = False
+
+
+def upgrade(connection):
+    create_indexes(connection, "user_emails", "ix_user_emails_user")
+    create_indexes(
+        connection,
+        "invitations",
+        "ix_invitations_recipient_email",
+        "ix_invitations_recipient_phone",
+        "ix_invitations_expiry",
+    )
@@ -0,0 +1,15 @@
+"""Foreign-key lookups on family_group_members"""
+
+from migrations import create_indexes
+
+# Index builds only; see migrations/__init__.py
+TRANSACTIONAL = False
+
+
+def upgrade(connection):
+    create_indexes(
+        connection,
+        "family_group_members",
+        "ix_family_group_members_group",
+        "ix_family_group_members_user",
+    )
@@ -0,0 +1,14 @@
+"""Full-text index over challenge title, goal and description, see search.py"""
+
+import search
+from migrations import _online, drop_invalid_index
+
+# Index build only; see migrations/__init__.py
+TRANSACTIONAL = False
+
+
+def upgrade(connection):
+    online = _online(connection)
+    if online:
+        drop_invalid_index(connection, search.PG_INDEX)
+    search.install(connection, concurrently=online)
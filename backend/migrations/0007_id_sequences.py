@@ -0,0 +1,7 @@
+"""Counter table that health IDs are reserved from, see health_ids.py"""
+
+import models
+
+
+def upgrade(connection):
+    models.IdSequence.__table__.create(connection, checkfirst=True)
@@ -0,0 +1,10 @@
+"""Provider lookup of the appointment feed on user_providers"""
+
+from migrations import create_indexes
+
+# Index builds only; see migrations/__init__.py
+TRANSACTIONAL = False
+
+
+def upgrade(connection):
+    create_indexes(connection, "user_providers", "ix_user_providers_user")
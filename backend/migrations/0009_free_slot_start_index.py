@@ -0,0 +1,14 @@
+"""Free slots in (start_time, id) order for keyset pagination"""
+
+from migrations import create_indexes
+
+# Index builds only; see migrations/__init__.py
+TRANSACTIONAL = False
+
+
+def upgrade(connection):
+    create_indexes(
+        connection,
+        "provider_availabilities",
+        "ix_provider_availabilities_booked_start_id",
+    )
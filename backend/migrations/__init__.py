@@ -0,0 +1,217 @@
+"""
+Versioned schema migrations.
+
+Every module in this package named ``NNNN_description.py`` is one migration
+with an ``upgrade(connection)`` function. `upgrade` applies the pending ones
+in order, each in its own transaction, and records the version in the
+``schema_migrations`` table.
+
+Migrations only add to the schema and must be safe to run on a database
+that already has the change (``checkfirst``/``IF NOT EXISTS``), because
+databases created before this package existed have no version history.
+
+A migration that only builds indexes sets ``TRANSACTIONAL = False``. On
+Postgres it then runs on an autocommit connection, where `create_indexes`
+builds indexes with CREATE INDEX CONCURRENTLY so writes to a large table are
+not blocked while the index is built. SQLite has no online index builds, so
+there it still runs in one transaction.
+
+Run ``python -m migrations`` to apply pending migrations. The app does not
+change the schema itself: on startup it only checks, with `check`, that no
+migration is pending, and compares the database with ``models`` using
+`verify`.
+"""
+
+import importlib
+import logging
+import pkgutil
+import re
+from datetime import datetime
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    inspect,
+    select,
+    text,
+)
+from sqlalchemy.schema import CreateIndex
+
+import models
+import search
+
+_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+logger = logging.getLogger(__name__)
+
+_MODULE_NAME = re.compile(r"^(\d{4})_(\w+)$")
+
+
+class SchemaOutOfDate(RuntimeError):
+    pass
+
+
+def versions() -> dict:
+    """{version: name} of every migration, without importing them"""
+    found = {}
+    for module_info in pkgutil.iter_modules(__path__):
+        match = _MODULE_NAME.match(module_info.name)
+        if match:
+            found[int(match.group(1))] = module_info.name
+    return dict(sorted(found.items()))
+
+
+def available():
+    """(version, name, module) of every migration, oldest first"""
+    found = []
+    for version, module_name in versions().items():
+        module = importlib.import_module(f"{__name__}.{module_name}")
+        found.append((version, _MODULE_NAME.match(module_name).group(2), module))
+    return found
+
+
+def applied_versions(connection) -> set:
+    schema_migrations.create(connection, checkfirst=True)
+    return set(connection.execute(select(schema_migrations.c.version)).scalars())
+
+
+def pending(engine) -> list:
+    """Versions not applied to the database behind ``engine``; read-only"""
+    with engine.connect() as connection:
+        if inspect(connection).has_table(schema_migrations.name):
+            done = set(
+                connection.execute(select(schema_migrations.c.version)).scalars()
+            )
+        else:
+            done = set()
+    return [version for version in versions() if version not in done]
+
+
+def check(engine):
+    """Raise SchemaOutOfDate unless every migration has been applied"""
+    missing = pending(engine)
+    if missing:
+        raise SchemaOutOfDate(
+            f"Database schema is missing migrations {missing}; "
+            "run `python -m migrations` first"
+        )
+
+
+def missing_objects(engine) -> list:
+    """Tables and indexes of ``models`` and the search index the database lacks"""
+    missing = []
+    with engine.connect() as connection:
+        inspector = inspect(connection)
+        existing = set(inspector.get_table_names())
+        for table in models.Base.metadata.sorted_tables:
+            if table.name not in existing:
+                missing.append(f"table {table.name}")
+                continue
+            indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in sorted(table.indexes, key=lambda index: index.name):
+                if index.name not in indexes:
+                    missing.append(f"index {index.name} on {table.name}")
+        missing.extend(search.missing_objects(connection))
+    return missing
+
+
+def verify(engine, strict: bool = False) -> list:
+    """
+    Log every table and index of ``models`` missing from the database.
+
+    With ``strict`` raise SchemaOutOfDate instead, so the app does not serve
+    without the indexes its queries rely on.
+    """
+    missing = missing_objects(engine)
+    if missing and strict:
+        raise SchemaOutOfDate(
+            f"Database schema does not match models: missing {', '.join(missing)}"
+        )
+    for name in missing:
+        logger.warning("Database schema is missing %s", name, extra={"object": name})
+    return missing
+
+
+def upgrade(engine) -> list:
+    """Apply every pending migration and return the versions that ran"""
+    with engine.begin() as connection:
+        done = applied_versions(connection)
+    online = engine.dialect.name == "postgresql"
+    ran = []
+    for version, name, module in available():
+        if version in done:
+            continue
+        record = schema_migrations.insert().values(
+            version=version, name=name, applied_at=datetime.utcnow()
+        )
+        if getattr(module, "TRANSACTIONAL", True) or not online:
+            with engine.begin() as connection:
+                module.upgrade(connection)
+                connection.execute(record)
+        else:
+            # Idempotent by contract, so a failure part-way is fixed by
+            # running the migration again
+            autocommit = engine.execution_options(isolation_level="AUTOCOMMIT")
+            with autocommit.connect() as connection:
+                module.upgrade(connection)
+            with engine.begin() as connection:
+                connection.execute(record)
+        ran.append(version)
+    return ran
+
+
+def _online(connection) -> bool:
+    return (
+        connection.dialect.name == "postgresql"
+        and connection.get_isolation_level() == "AUTOCOMMIT"
+    )
+
+
+def drop_invalid_index(connection, index_name: str):
+    """Drop the invalid index a failed CREATE INDEX CONCURRENTLY left behind"""
+    invalid = connection.execute(
+        text(
+            "SELECT NOT indisvalid FROM pg_index "
+            "WHERE indexrelid = to_regclass(:name)"
+        ),
+        {"name": index_name},
+    ).scalar()
+    if invalid:
+        connection.execute(text(f'DROP INDEX CONCURRENTLY "{index_name}"'))
+
+
+def create_indexes(connection, table_name: str, *index_names: str):
+    """
+    Create indexes declared on ``models`` unless they already exist.
+
+    On Postgres outside a transaction the index is built CONCURRENTLY. A
+    concurrent build that failed leaves an invalid index behind, which is
+    dropped and rebuilt.
+    """
+    table = models.Base.metadata.tables[table_name]
+    indexes = {index.name: index for index in table.indexes}
+    online = _online(connection)
+    for index_name in index_names:
+        index = indexes[index_name]
+        if not online:
+            index.create(connection, checkfirst=True)
+            continue
+        drop_invalid_index(connection, index_name)
+        options = index.dialect_options["postgresql"]
+        options["concurrently"] = True
+        try:
+            connection.execute(CreateIndex(index, if_not_exists=True))
+        finally:
+            options["concurrently"] = False
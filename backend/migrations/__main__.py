@@ -0,0 +1,46 @@
+"""
+python -m migrations [upgrade|status|check]
+
+upgrade (the default) applies the pending migrations to the database in
+HEALTHTRACK_DATABASE_URL. status lists every migration and whether it has
+been applied. check exits with status 1 if a migration is pending or a table
+or index declared in models.py is missing, for use before rolling out new
+workers.
+"""
+
+import argparse
+import sys
+
+import migrations
+from database import engine
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m migrations")
+    parser.add_argument(
+        "command", nargs="?", default="upgrade", choices=["upgrade", "status", "check"]
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == "upgrade":
+        applied = migrations.upgrade(engine)
+        print(f"Database is up to date (applied migrations: {applied or 'none'})")
+        return 0
+
+    pending = migrations.pending(engine)
+    if args.command == "status":
+        for version, name in migrations.versions().items():
+            state = "pending" if version in pending else "applied"
+            print(f"{name:40} {state}")
+        return 0
+    if pending:
+        print(f"Pending migrations: {pending}")
+        return 1
+    missing = migrations.missing_objects(engine)
+    for name in missing:
+        print(f"Missing {name}")
+    return 1 if missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,17 @@
 from datetime import datetime
 from typing import List, Optional
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, Table
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Table,
+    text,
+)
 from sqlalchemy.orm import declarative_base, relationship
 
 Base = declarative_base()
@@ -12,6 +22,8 @@ user_email_association = Table(
     Base.metadata,
     Column("user_id", Integer, ForeignKey("users.id")),
     Column("email_id", Integer, ForeignKey("emails.id")),
+    # A user's addresses (invitation inbox)
+    Index("ix_user_emails_user", "user_id"),
 )
 
 # Association table for user-provider relationships
@@ -20,6 +32,8 @@ user_provider_association = Table(
     Base.metadata,
     Column("user_id", Integer, ForeignKey("users.id")),
     Column("provider_id", Integer, ForeignKey("providers.id")),
+    # Providers of a user, read by every appointment feed page
+    Index("ix_user_providers_user", "user_id", "provider_id"),
 )
 
 # Association table for challenge participants
@@ -28,6 +42,16 @@ challenge_participant_association = Table(
     Base.metadata,
     Column("challenge_id", Integer, ForeignKey("challenges.id")),
     Column("user_id", Integer, ForeignKey("users.id")),
+    # Membership lookups and the paginated participant list; also stops a
+    # user from joining twice
+    Index(
+        "uq_challenge_participants_challenge_user",
+        "challenge_id",
+        "user_id",
+        unique=True,
+    ),
+    # Challenges of a user
+    Index("ix_challenge_participants_user", "user_id"),
 )
 
 
@@ -92,7 +116,7 @@ class Provider(Base):
         String, unique=True, index=True
     )  # Unique medical license number
     name = Column(String, index=True)
-    specialty = Column(String)
+    specialty = Column(String, index=True)
     verified = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
@@ -123,6 +147,14 @@ class Appointment(Base):
     user = relationship("User", back_populates="appointments")
     provider = relationship("Provider", back_populates="appointments")
 
+    __table_args__ = (
+        # Appointment feed (crud.user_appointments_statement): every UNION ALL
+        # arm walks one of these from the cursor in keyset order and stops
+        # after a page.
+        Index("ix_appointments_user_date", "user_id", "date_time", "id"),
+        Index("ix_appointments_provider_date", "provider_id", "date_time", "id"),
+    )
+
 
 class Challenge(Base):
     __tablename__ = "challenges"
@@ -137,6 +169,9 @@ class Challenge(Base):
     progress = Column(Integer, default=0)  # e.g., JSON string to track progress
     title = Column(String)
     description = Column(String, default="")
+    # Kept in step with challenge_participants by crud, so listing challenges
+    # never has to count or load the participants
+    participant_count = Column(Integer, nullable=False, default=0, server_default="0")
     # Relationships
     creator = relationship(
         "User", foreign_keys=[creator_id], back_populates="challenges_created"
@@ -147,6 +182,12 @@ class Challenge(Base):
         back_populates="challenges_participating",
     )
 
+    __table_args__ = (
+        # Date-range filter, paged on the (start_date, id) keyset
+        Index("ix_challenges_start_date_id", "start_date", "id"),
+        Index("ix_challenges_end_date", "end_date"),
+    )
+
 
 class FamilyGroup(Base):
     __tablename__ = "family_groups"
@@ -184,6 +225,12 @@ class FamilyGroupMember(Base):
     family_group = relationship("FamilyGroup", back_populates="family_group_members")
     user = relationship("User", back_populates="family_group_memberships")
 
+    __table_args__ = (
+        # Members of a group, and the groups of a user
+        Index("ix_family_group_members_group", "family_group_id"),
+        Index("ix_family_group_members_user", "user_id"),
+    )
+
 
 class Invitation(Base):
     __tablename__ = "invitations"
@@ -207,6 +254,23 @@ class Invitation(Base):
     is_rejected = Column(Boolean, default=False)
     rejected_at = Column(DateTime, nullable=True)
 
+    __table_args__ = (
+        # Inbox lookups (crud.get_user_invitations), one index per recipient
+        # column so the OR between them stays a pair of index lookups
+        Index("ix_invitations_recipient_email", "recipient_email", "expired_at"),
+        Index("ix_invitations_recipient_phone", "recipient_phone", "expired_at"),
+        # Expiry sweeper (crud.expire_invitations). Partial, so it only covers
+        # invitations still waiting to be swept and the inbox query, which
+        # spells the flag as NOT is_expired, can never pick it over the
+        # recipient indexes.
+        Index(
+            "ix_invitations_expiry",
+            "expired_at",
+            sqlite_where=text("is_expired = 0"),
+            postgresql_where=text("is_expired = false"),
+        ),
+    )
+
 
 class ProviderAvailability(Base):
     __tablename__ = "provider_availabilities"
@@ -220,3 +284,44 @@ class ProviderAvailability(Base):
 
     # Relationships
     provider = relationship("Provider", back_populates="availabilities")
+
+    __table_args__ = (
+        # Slot lookup for a single provider (booking / cancellation). Scanning
+        # forward on end_time only touches the provider's upcoming schedule,
+        # never the booking history that accumulates behind it.
+        Index(
+            "ix_provider_availabilities_provider_booked_end",
+            "provider_id",
+            "is_booked",
+            "end_time",
+            "start_time",
+        ),
+        # Free slots in id order, read by releases that paged GET
+        # /all/available on id; kept because migrations only add.
+        Index("ix_provider_availabilities_booked_id", "is_booked", "id"),
+        # Keyset pagination over free slots in start-time order, with or
+        # without a time window (GET /all/available).
+        Index(
+            "ix_provider_availabilities_booked_start_id",
+            "is_booked",
+            "start_time",
+            "id",
+        ),
+        # Free slots inside a time window, read by releases before the
+        # (start_time, id) keyset; kept because migrations only add.
+        Index(
+            "ix_provider_availabilities_booked_start",
+            "is_booked",
+            "start_time",
+            "end_time",
+        ),
+    )
+
+
+class IdSequence(Base):
+    """Named counters handed out in blocks, see health_ids.py"""
+
+    __tablename__ = "id_sequences"
+
+    name = Column(String, primary_key=True)
+    next_value = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,146 @@
+"""
+Password hashing on a bounded process pool.
+
+bcrypt is deliberately slow and holds the GIL while it runs, so hashing in
+the request thread serializes every login in the process. Jobs are sent to a
+pool of worker processes instead; once PASSWORD_QUEUE_LIMIT jobs are in
+flight new ones are refused with PasswordPoolSaturated, which the API turns
+into a 503 with Retry-After.
+"""
+
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from starlette.concurrency import run_in_threadpool
+
+import config
+
+
+class PasswordPoolSaturated(Exception):
+    """Too many hash/verify jobs are already queued"""
+
+
+# Built on first use in every process (API process and pool workers)
+_context = None
+
+_executor = None
+_lock = threading.Lock()
+_in_flight = 0
+_completed = 0
+_rejected = 0
+
+
+def _get_context():
+    global _context
+    if _context is None:
+        from passlib.context import CryptContext
+
+        _context = CryptContext(
+            schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=config.BCRYPT_ROUNDS
+        )
+    return _context
+
+
+def _hash(password: str) -> str:
+    return _get_context().hash(password)
+
+
+def _verify(password: str, hashed_password: str) -> bool:
+    return _get_context().verify(password, hashed_password)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        # spawn: forking a process that already runs server threads is unsafe
+        _executor = ProcessPoolExecutor(
+            max_workers=config.PASSWORD_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+def _discard_executor(broken):
+    """Forget a pool whose worker died, so the next job starts a new one"""
+    global _executor
+    with _lock:
+        if _executor is broken:
+            _executor = None
+    broken.shutdown(wait=False)
+
+
+def _job_done(future):
+    global _in_flight, _completed
+    with _lock:
+        _in_flight -= 1
+        _completed += 1
+
+
+def _submit(func, *args):
+    global _in_flight, _rejected
+    with _lock:
+        if _in_flight >= config.PASSWORD_QUEUE_LIMIT:
+            _rejected += 1
+            raise PasswordPoolSaturated()
+        _in_flight += 1
+    try:
+        executor = _get_executor()
+        try:
+            future = executor.submit(func, *args)
+        except BrokenProcessPool:
+            # A killed worker (OOM, ...) breaks the whole pool for good
+            _discard_executor(executor)
+            future = _get_executor().submit(func, *args)
+    except Exception:
+        with _lock:
+            _in_flight -= 1
+        raise
+    future.add_done_callback(_job_done)
+    return future
+
+
+def _run(func, *args):
+    try:
+        return _submit(func, *args).result()
+    except BrokenProcessPool:
+        # The worker died while running the job; submitting again finds the
+        # pool broken and starts a new one. Retried once only.
+        return _submit(func, *args).result()
+
+
+def hash_password(password: str) -> str:
+    if config.PASSWORD_WORKERS == 0:
+        return _hash(password)
+    return _run(_hash, password)
+
+
+def verify_password(password: str, hashed_password: str) -> bool:
+    if config.PASSWORD_WORKERS == 0:
+        return _verify(password, hashed_password)
+    return _run(_verify, password, hashed_password)
+
+
+async def verify_password_async(password: str, hashed_password: str) -> bool:
+    """Like `verify_password`, but awaits the pool instead of blocking a thread"""
+    if config.PASSWORD_WORKERS == 0:
+        return await run_in_threadpool(_verify, password, hashed_password)
+    try:
+        return await asyncio.wrap_future(_submit(_verify, password, hashed_password))
+    except BrokenProcessPool:
+        # See _run
+        return await asyncio.wrap_future(_submit(_verify, password, hashed_password))
+
+
+def stats() -> dict:
+    """Pool size and queue depth counters"""
+    with _lock:
+        return {
+            "workers": config.PASSWORD_WORKERS,
+            "queue_limit": config.PASSWORD_QUEUE_LIMIT,
+            "in_flight": _in_flight,
+            "completed": _completed,
+            "rejected": _rejected,
+        }
@@ -0,0 +1,6 @@
+"""
+API routers, one module per resource; main.py includes them.
+
+Modules import their siblings in the backend directory (``import crud``) as
+top-level modules, so run the app, scripts and tests from backend/.
+"""
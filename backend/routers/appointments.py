@@ -1,25 +1,28 @@
-import os
-import sys
-from typing import List
+import logging
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
+import config
 import crud
 import models
 import schemas
+import serializers
 from database import get_db
 
 router = APIRouter(prefix="/appointments", tags=["appointments"])
+logger = logging.getLogger(__name__)
 
 
 @router.post("/", response_model=schemas.Appointment)
 def create_appointment(
     appointment: schemas.AppointmentCreate, user_id: int, db: Session = Depends(get_db)
 ):
-    print("appointment", appointment, user_id)
+    logger.debug(
+        "Creating appointment",
+        extra={"user_id": user_id, "provider_id": appointment.provider_id},
+    )
     # Verify user exists
     db_user = crud.get_user(db, user_id=user_id)
     if db_user is None:
@@ -32,6 +35,8 @@ def create_appointment(
 
     try:
         return crud.create_appointment(db=db, appointment=appointment, user_id=user_id)
+    except crud.SlotConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -51,22 +56,36 @@ def read_appointments(skip: int = 0, limit: int = 100, db: Session = Depends(get
 
 
 @router.get("/user/{user_id}", response_model=List[schemas.AppointmentExpand])
-def read_user_appointments(user_id: int, db: Session = Depends(get_db)):
+def read_user_appointments(
+    user_id: int,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+):
+    """
+    Appointments of the user and of the user's providers, ordered by date.
+
+    Pass the ``X-Next-Cursor`` header of a page as ``cursor`` to fetch the
+    next one.
+    """
     # Verify user exists
     db_user = crud.get_user(db, user_id=user_id)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    # 获取Provider的信息
-    appointments = crud.get_user_appointments(db, user_id=user_id)
-    providers_ids = [appt.provider_id for appt in appointments]
-    providers = [crud.get_provider(db, provider_id=pid) for pid in providers_ids]
-    appointments_expanded = []
-    for appt, provider in zip(appointments, providers):
-        appt_data = schemas.Appointment.from_orm(appt).dict()
-        appt_data["provider_name"] = provider.name if provider else None
-        appt_data["provider_specialty"] = provider.specialty if provider else None
-        appointments_expanded.append(appt_data)
-    return appointments_expanded
+    try:
+        rows = crud.get_user_appointments(
+            db, user_id=user_id, cursor=cursor, limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(rows) == limit:
+        response.headers["X-Next-Cursor"] = crud.encode_appointment_cursor(rows[-1][0])
+    if config.FAST_JSON:
+        return serializers.list_response(
+            [serializers.appointment_row(*row) for row in rows], response
+        )
+    return [serializers.appointment_row(*row) for row in rows]
 
 
 @router.put("/{appointment_id}/cancel")
@@ -0,0 +1,137 @@
+"""
+Async implementations of the busiest routes.
+
+Only mounted when HEALTHTRACK_ASYNC_DB=1. main.py includes this router ahead
+of the resource routers, so these handlers take over the same paths while
+every other route keeps its sync implementation.
+"""
+
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import config
+import crud
+import crud_async
+import schemas
+import serializers
+from database import get_async_db
+from routers.auth import (
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    LoginRequest,
+    Token,
+    create_access_token,
+)
+
+router = APIRouter(include_in_schema=False)
+
+
+@router.post("/auth/login", response_model=Token)
+async def login_for_access_token(
+    login_request: LoginRequest, db: AsyncSession = Depends(get_async_db)
+):
+    user = await crud_async.authenticate_user(
+        db, login_request.phone_number, login_request.password
+    )
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect phone number or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data={"sub": user.phone_number}, expires_delta=access_token_expires
+    )
+    return {"access_token": access_token, "token_type": "bearer"}
+
+
+@router.get(
+    "/providers-availability/search",
+    response_model=List[schemas.ProviderAvailabilityExpand],
+)
+async def search_available_slots(
+    response: Response,
+    start_time: datetime = Query(..., alias="from"),
+    end_time: datetime = Query(..., alias="to"),
+    specialty: Optional[str] = None,
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    if end_time <= start_time:
+        raise HTTPException(status_code=400, detail="'to' must be after 'from'")
+
+    try:
+        rows = await crud_async.search_available_slots(
+            db,
+            start_time=start_time,
+            end_time=end_time,
+            specialty=specialty,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(rows) == limit:
+        response.headers["X-Next-Cursor"] = crud.encode_slot_cursor(rows[-1][0])
+    return [serializers.slot_row(*row) for row in rows]
+
+
+@router.post("/appointments/", response_model=schemas.Appointment)
+async def create_appointment(
+    appointment: schemas.AppointmentCreate,
+    user_id: int,
+    db: AsyncSession = Depends(get_async_db),
+):
+    # Verify user exists
+    db_user = await crud_async.get_user(db, user_id=user_id)
+    if db_user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    # Verify provider exists
+    db_provider = await crud_async.get_provider(db, provider_id=appointment.provider_id)
+    if db_provider is None:
+        raise HTTPException(status_code=404, detail="Provider not found")
+
+    try:
+        return await crud_async.create_appointment(
+            db=db, appointment=appointment, user_id=user_id
+        )
+    except crud_async.SlotConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get(
+    "/appointments/user/{user_id}", response_model=List[schemas.AppointmentExpand]
+)
+async def read_user_appointments(
+    user_id: int,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db),
+):
+    # Verify user exists
+    db_user = await crud_async.get_user(db, user_id=user_id)
+    if db_user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    try:
+        rows = await crud_async.get_user_appointments(
+            db, user_id=user_id, cursor=cursor, limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(rows) == limit:
+        response.headers["X-Next-Cursor"] = crud.encode_appointment_cursor(rows[-1][0])
+    if config.FAST_JSON:
+        return serializers.list_response(
+            [serializers.appointment_row(*row) for row in rows], response
+        )
+    return [serializers.appointment_row(*row) for row in rows]
@@ -1,18 +1,16 @@
-import os
-import sys
+import time
 from typing import Annotated, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
 
 from datetime import datetime, timedelta
 
-from jose import JWTError, jwt
-
+import cache
 import crud
+import models
 import schemas
 from database import get_db
 
@@ -26,6 +24,15 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 
+def _jose():
+    # python-jose loads its crypto backends (ecdsa, rsa, ...) on import, which
+    # is about 50 ms of every worker's cold start; only tokens need it
+    import jose
+    import jose.jwt
+
+    return jose
+
+
 class Token(schemas.BaseModel):
     access_token: str
     token_type: str
@@ -47,10 +54,31 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = _jose().jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
+def _cache_user(token: str, user: models.User, expires_at: Optional[int]):
+    columns = {
+        attr.key: getattr(user, attr.key) for attr in inspect(user).mapper.column_attrs
+    }
+    ttl = None
+    if expires_at is not None:
+        # Never serve a token from the cache after it has expired
+        ttl = expires_at - time.time()
+    cache.set_token_user(token, columns, ttl=ttl)
+
+
+def _cached_user(db: Session, token: str):
+    columns = cache.get_token_user(token)
+    if columns is None:
+        return None
+    # Attach a copy to this session without a query; relationships still lazy-load
+    user = models.User(**columns)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
 def get_current_user(
     db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
 ):
@@ -59,17 +87,23 @@ def get_current_user(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    # Only tokens that already passed verification are ever cached
+    user = _cached_user(db, token)
+    if user is not None:
+        return user
+    jose = _jose()
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jose.jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         phone_number: str = payload.get("sub")
         if phone_number is None:
             raise credentials_exception
         token_data = TokenData(phone_number=phone_number)
-    except JWTError:
+    except jose.JWTError:
         raise credentials_exception
     user = crud.get_user_by_phone_number(db, phone_number=token_data.phone_number)
     if user is None:
         raise credentials_exception
+    _cache_user(token, user, payload.get("exp"))
     return user
 
 
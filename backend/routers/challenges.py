@@ -1,26 +1,30 @@
-import os
-import sys
+import logging
+from datetime import datetime
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import schema
 
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
+import config
 import crud
 import models
 import schemas
+import serializers
 from database import get_db
 
 router = APIRouter(prefix="/challenges", tags=["challenges"])
+logger = logging.getLogger(__name__)
 
 
 @router.post("/", response_model=schemas.Challenge)
 def create_challenge(
     challenge: schemas.ChallengeCreate, creator_id: int, db: Session = Depends(get_db)
 ):
-    print(challenge)
+    logger.debug(
+        "Creating challenge",
+        extra={"challenge_id": challenge.challenge_id, "creator_id": creator_id},
+    )
     # Verify creator exists
     db_user = crud.get_user(db, user_id=creator_id)
     if db_user is None:
@@ -29,6 +33,50 @@ def create_challenge(
     return crud.create_challenge(db=db, challenge=challenge, creator_id=creator_id)
 
 
+@router.get("/search", response_model=List[schemas.Challenge])
+def search_challenges(
+    keyword: str,
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+):
+    """Challenges matching every word of ``keyword``, best matches first"""
+    return crud.search_challenges_by_title(
+        db=db, keyword=keyword, skip=skip, limit=limit
+    )
+
+
+@router.get("/filter-by-date", response_model=List[schemas.Challenge])
+def filter_challenges_by_date(
+    response: Response,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Challenges inside the date range, ordered by start date.
+
+    Pass the ``X-Next-Cursor`` header of a page as ``cursor`` to fetch the
+    next one.
+    """
+    try:
+        sd = datetime.fromisoformat(start_date) if start_date else None
+        ed = datetime.fromisoformat(end_date) if end_date else None
+        challenges = crud.filter_challenges_by_date_range(
+            db=db, start_date=sd, end_date=ed, skip=skip, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(challenges) == limit:
+        response.headers["X-Next-Cursor"] = crud.encode_challenge_cursor(
+            challenges[-1]
+        )
+    return challenges
+
+
 @router.get("/{challenge_id}", response_model=schemas.Challenge)
 def read_challenge(challenge_id: int, db: Session = Depends(get_db)):
     db_challenge = crud.get_challenge(db, challenge_id=challenge_id)
@@ -44,11 +92,45 @@ def read_user_challenge(user_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/", response_model=List[schemas.Challenge])
-def read_challenges(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_challenges(
+    response: Response, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)
+):
     challenges = crud.get_challenges(db, skip=skip, limit=limit)
+    if config.FAST_JSON:
+        return serializers.list_response(
+            [serializers.challenge_row(challenge) for challenge in challenges],
+            response,
+        )
     return challenges
 
 
+@router.get(
+    "/{challenge_id}/participants", response_model=List[schemas.ChallengeParticipant]
+)
+def read_challenge_participants(
+    challenge_id: int,
+    response: Response,
+    after_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+):
+    """
+    Participants of a challenge ordered by user id.
+
+    Pass the ``X-Next-After-Id`` header of a page as ``after_id`` to fetch the
+    next one; the total is the challenge's ``participant_count``.
+    """
+    db_challenge = crud.get_challenge(db, challenge_id=challenge_id)
+    if db_challenge is None:
+        raise HTTPException(status_code=404, detail="Challenge not found")
+    participants = crud.get_challenge_participants(
+        db, challenge_id=challenge_id, after_id=after_id, limit=limit
+    )
+    if len(participants) == limit:
+        response.headers["X-Next-After-Id"] = str(participants[-1].id)
+    return participants
+
+
 @router.post("/{challenge_id}/participants/{user_id}")
 def add_participant_to_challenge(
     challenge_id: int, user_id: int, db: Session = Depends(get_db)
@@ -74,35 +156,6 @@ def add_participant_to_challenge(
     return {"message": "Participant added to challenge successfully"}
 
 
-@router.get("/search", response_model=List[schemas.Challenge])
-def search_challenges(
-    keyword: str,
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
-):
-    return crud.search_challenges_by_title(
-        db=db, keyword=keyword, skip=skip, limit=limit
-    )
-
-
-@router.get("/filter-by-date", response_model=List[schemas.Challenge])
-def filter_challenges_by_date(
-    start_date: Optional[str] = None,
-    end_date: Optional[str] = None,
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
-):
-    from datetime import datetime
-
-    sd = datetime.fromisoformat(start_date) if start_date else None
-    ed = datetime.fromisoformat(end_date) if end_date else None
-    return crud.filter_challenges_by_date_range(
-        db=db, start_date=sd, end_date=ed, skip=skip, limit=limit
-    )
-
-
 @router.delete("/{challenge_id}")
 def delete_challenge(challenge_id: int, db: Session = Depends(get_db)):
     # Verify challenge exists
@@ -1,12 +1,8 @@
-import os
-import sys
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
 import crud
 import models
 import schemas
@@ -19,21 +15,14 @@ router = APIRouter(prefix="/family_groups", tags=["family_groups"])
 def create_family_group(
     family_group: schemas.FamilyGroupCreate, user_id: int, db: Session = Depends(get_db)
 ):
-    # crate family member
+    # The creator joins as admin
     db_user = crud.get_user(db, user_id=user_id)
-    family_group = crud.create_family_group(
-        db=db, family_group=family_group, owner_id=user_id
-    )
-    family_member = models.FamilyGroupMember(
-        family_group_id=family_group.id,
-        user_id=user_id,
-        role="admin",
-        user_name=db_user.name if db_user else "",
+    return crud.create_family_group(
+        db=db,
+        family_group=family_group,
+        owner_id=user_id,
+        owner_name=db_user.name if db_user else "",
     )
-    db.add(family_member)
-    db.commit()
-    db.refresh(family_member)
-    return family_group
 
 
 @router.get("/", response_model=List[schemas.FamilyGroup])
@@ -51,31 +40,10 @@ def read_family_group(family_group_id: int, db: Session = Depends(get_db)):
 
 @router.get("/user/{user_id}", response_model=List[schemas.FamilyGroup])
 def read_family_groups_by_user(user_id: int, db: Session = Depends(get_db)):
-    db_user = crud.get_user(db, user_id=user_id)
-    if db_user is None:
+    family_groups = crud.get_family_groups_by_user_id(db, user_id=user_id)
+    # Only an empty result needs to tell "no groups" from "no such user"
+    if not family_groups and crud.get_user(db, user_id=user_id) is None:
         raise HTTPException(status_code=404, detail="User not found")
-    user_members = db_user.family_group_memberships
-    family_groups = [m.family_group for m in user_members]
-    # family_groups_expanded = []
-    # for fg in family_groups:
-    #     group_members = fg.family_group_members
-    #     members_info = []
-    #     for member in group_members:
-    #         user = crud.get_user(db, user_id=member.user_id)
-    #         members_info.append(
-    #             {
-    #                 "id": user.id,
-    #                 "name": user.name,
-    #                 "role": member.role,
-    #                 "joined_at": member.joined_at,
-    #             }
-    #         )
-    #     fg_dict = fg.__dict__
-    #     fg_dict["members"] = members_info
-    #     family_groups_expanded.append(fg_dict)
-    # family_groups = family_groups_expanded
-    # db_family_groups = crud.get_family_groups_by_user_id(db, user_id=user_id)
-    # return family_groups
     return family_groups
 
 
@@ -186,33 +154,11 @@ def remove_member_from_family_group(
     if db_family_group is None:
         raise HTTPException(status_code=404, detail="Family group not found")
 
-    db_family_member = (
-        db.query(models.FamilyGroupMember)
-        .filter(
-            models.FamilyGroupMember.family_group_id == family_group_id,
-            models.FamilyGroupMember.user_id == user_id,
-        )
-        .first()
+    membership_id = crud.remove_member_from_family_group(
+        db, family_group_id=family_group_id, user_id=user_id
     )
-    if db_family_member is None:
+    if membership_id is None:
         raise HTTPException(status_code=404, detail="Family group member not found")
-    # Find membership record
-    membership = (
-        db.query(models.FamilyGroupMember)
-        .filter(
-            models.FamilyGroupMember.user_id == user_id,
-            models.FamilyGroupMember.family_group_id == family_group_id,
-        )
-        .first()
-    )
-    if membership is None:
-        raise HTTPException(status_code=404, detail="Family group member not found")
-
-    # Delete membership
-    membership_id = membership.id
-    db.delete(membership)
-    db.delete(db_family_member)
-    db.commit()
 
     return {
         "message": "Member removed from family group successfully",
@@ -3,15 +3,14 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
 
-import sys
-import os
+import logging
 
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 # import logger
 import crud, models, schemas
 from database import get_db
 
 router = APIRouter(prefix="/providers", tags=["providers"])
+logger = logging.getLogger(__name__)
 
 
 @router.post("/", response_model=schemas.Provider)
@@ -41,8 +40,7 @@ def delete_provider_by_license(license_number: str, db: Session = Depends(get_db
     DELETE http://<host>:<port>/providers/license/{license_number}
     其中 license_number 替换为要删除的提供商执照号码。
     """
-    print(f"Deleting provider with license number: {license_number}")
-    # print(license_number)
+    logger.info("Deleting provider", extra={"license_number": license_number})
     db_provider = crud.get_provider_by_license(db, license_number=license_number)
     if db_provider is None:
         raise HTTPException(status_code=404, detail="Provider not found")
@@ -1,14 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-import sys
-import os
 from datetime import datetime
 
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
+import config
 import crud, models, schemas
+import serializers
 from database import get_db
 
 router = APIRouter(prefix="/providers-availability", tags=["providers-availability"])
@@ -23,7 +22,73 @@ def create_provider_availability(
     if db_provider is None:
         raise HTTPException(status_code=404, detail="Provider not found")
 
-    return crud.create_provider_availability(db=db, availability=availability)
+    try:
+        return crud.create_provider_availability(db=db, availability=availability)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/bulk", response_model=schemas.ProviderAvailabilityBulkResult)
+def create_provider_availabilities_bulk(
+    request: schemas.ProviderAvailabilityBulkCreate, db: Session = Depends(get_db)
+):
+    """
+    Create a list of slots and/or the slots of a weekly recurrence at once.
+
+    All slots are inserted in one transaction; if any of them overlaps another
+    one in the request or an existing slot of the provider, none are created.
+    """
+    db_provider = crud.get_provider(db, provider_id=request.provider_id)
+    if db_provider is None:
+        raise HTTPException(status_code=404, detail="Provider not found")
+
+    try:
+        intervals = [(slot.start_time, slot.end_time) for slot in request.slots]
+        if request.recurrence is not None:
+            intervals.extend(crud.expand_recurrence(request.recurrence))
+        created = crud.create_provider_availabilities_bulk(
+            db, provider_id=request.provider_id, intervals=intervals
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"provider_id": request.provider_id, "created": created}
+
+
+@router.get("/search", response_model=List[schemas.ProviderAvailabilityExpand])
+def search_available_slots(
+    response: Response,
+    start_time: datetime = Query(..., alias="from"),
+    end_time: datetime = Query(..., alias="to"),
+    specialty: Optional[str] = None,
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Free slots that fit inside the [from, to] window, optionally by specialty.
+
+    Pass the ``X-Next-Cursor`` header of a page as ``cursor`` to fetch the
+    next one.
+    """
+    if end_time <= start_time:
+        raise HTTPException(status_code=400, detail="'to' must be after 'from'")
+
+    try:
+        rows = crud.search_available_slots(
+            db,
+            start_time=start_time,
+            end_time=end_time,
+            specialty=specialty,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(rows) == limit:
+        response.headers["X-Next-Cursor"] = crud.encode_slot_cursor(rows[-1][0])
+    return [serializers.slot_row(*row) for row in rows]
 
 
 @router.get("/{provider_id}", response_model=List[schemas.ProviderAvailability])
@@ -42,40 +107,48 @@ def read_provider_availabilities(
 
 
 @router.get("/all/available", response_model=List[schemas.ProviderAvailabilityExpand])
-def read_all_providers_available_slots(db: Session = Depends(get_db)):
-    print("Getting all providers available slots")
-    availabilities = crud.get_all_providers_available_slots(db)
-    # print(22222, availabilities[0].start_time)
-    # available_slots = [
-    #     slot for slot in availabilities if slot.end_time > datetime.now()
-    # ]
-    available_slots = availabilities
-    """available_slot 
-    {"provider_id": provider_id, 
-    "start_time": start_time, 
-    "end_time": end_time,
-    "is_booked": is_booked,
-    "id": id,
-    "created_at": created_at}
+def read_all_providers_available_slots(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    start_time: Optional[datetime] = Query(None, alias="from"),
+    end_time: Optional[datetime] = Query(None, alias="to"),
+    stream: bool = False,
+    db: Session = Depends(get_db),
+):
+    """
+    Free slots of all providers ordered by start time.
+
+    Pass the ``X-Next-Cursor`` header of a page as ``cursor`` to fetch the
+    next one. With ``stream=true`` every remaining slot is sent as NDJSON,
+    one object per line, without building the full list in memory.
     """
-    # 根据Providerid找到Provider用户的名称，license和name
-    res = []
-    for slot in available_slots:
-        res.append(
-            {
-                "provider_id": slot.provider_id,
-                "start_time": slot.start_time,
-                "end_time": slot.end_time,
-                "is_booked": slot.is_booked,
-                "id": slot.id,
-                "created_at": slot.created_at,
-                "name": slot.provider.name,
-                "specialty": slot.provider.specialty,
-            }
+    if cursor is not None:
+        try:
+            crud.decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    if stream:
+
+        def generate():
+            for row in crud.iter_all_providers_available_slots(
+                db, cursor=cursor, start_time=start_time, end_time=end_time
+            ):
+                yield serializers.dumps(serializers.slot_row(*row)) + b"\n"
+
+        return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+    rows = crud.get_all_providers_available_slots(
+        db, cursor=cursor, limit=limit, start_time=start_time, end_time=end_time
+    )
+    if len(rows) == limit:
+        response.headers["X-Next-Cursor"] = crud.encode_slot_cursor(rows[-1][0])
+    if config.FAST_JSON:
+        return serializers.list_response(
+            [serializers.slot_row(*row) for row in rows], response
         )
-    print(res)
-    print(f"Returning {len(res)} availabilities")
-    return res
+    return [serializers.slot_row(*row) for row in rows]
 
 
 @router.get(
@@ -1,19 +1,17 @@
-import os
-import sys
+import logging
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from starlette.types import Message
 
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
 import crud
 import models
 import schemas
 from database import get_db
 
 router = APIRouter(prefix="/users", tags=["users"])
+logger = logging.getLogger(__name__)
 
 
 @router.post("/", response_model=schemas.User)
@@ -54,7 +52,6 @@ def read_user_by_email(email_address: str, db: Session = Depends(get_db)):
 
 @router.get("/phone/{phone_number}", response_model=schemas.User)
 def read_user_by_phone(phone_number: str, db: Session = Depends(get_db)):
-    print("phone_number:", phone_number)
     db_user = crud.get_user_by_phone_number(db, phone_number=phone_number)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
@@ -125,10 +122,7 @@ def add_email_to_user(
                 status_code=400, detail="Email already associated with other user"
             )
 
-    if db_email not in db_user.emails:
-        db_user.emails.append(db_email)
-        db.commit()
-    else:
+    if not crud.add_email_to_user(db, user_id=user_id, email_id=db_email.id):
         raise HTTPException(
             status_code=400, detail="Email already associated with user"
         )
@@ -146,8 +140,7 @@ def delete_email_from_user(
     db_email = crud.get_email_by_address(db, email_address=email_address)
     if db_email is None or db_email not in db_user.emails:
         raise HTTPException(status_code=404, detail="Email not associated with user")
-    db_user.emails.remove(db_email)
-    db.commit()
+    crud.remove_email_from_user(db, user_id=user_id, email_id=db_email.id)
     return {"message": "Email dissociated from user successfully"}
 
 
@@ -175,7 +168,10 @@ def dissociate_provider_from_user(
     result = crud.dissociate_provider_from_user(
         db, user_id=user_id, provider_id=provider_id
     )
-    print(user_id, provider_id)
+    logger.debug(
+        "Dissociated provider from user",
+        extra={"user_id": user_id, "provider_id": provider_id},
+    )
     if not result:
         raise HTTPException(
             status_code=404,
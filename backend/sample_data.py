@@ -1,8 +1,17 @@
-from database import SessionLocal
-from models import User, Email, Provider, Appointment, Challenge, FamilyGroup
+import argparse
+import functools
+import random
+import time
 from datetime import datetime, timedelta
 import uuid
 
+from sqlalchemy import DateTime, func, select
+from sqlalchemy.orm import Session
+
+import models
+from database import SessionLocal
+from models import User, Email, Provider, Appointment, Challenge, FamilyGroup
+
 def create_sample_data():
     # Create a database session
     db = SessionLocal()
@@ -101,6 +110,7 @@ def create_sample_data():
         # Add participants to challenge
         challenge1.participants.append(user1)
         challenge1.participants.append(user2)
+        challenge1.participant_count = len(challenge1.participants)
         
         # Create sample family group
         family_group = FamilyGroup(
@@ -123,5 +133,470 @@ def create_sample_data():
     finally:
         db.close()
 
+
+
+# Synthetic data at production scale
+#
+# `generate` fills a database with users, providers, availability slots and
+# the appointment, challenge, family group and invitation graphs around them.
+# The same seed and sizes always produce the same rows. Rows go to the driver
+# with executemany in batches, with values converted the way SQLAlchemy binds
+# them, so 10^7 slots take minutes instead of the hours one db.add per row
+# would. Every user can log in with DEFAULT_PASSWORD; its bcrypt salt is the
+# only value that differs between two runs.
+
+GENERATED_AT = datetime(2030, 1, 1)
+FIRST_SLOT = datetime(2030, 1, 7, 8, 0)
+SLOT_LENGTH = timedelta(minutes=30)
+SLOTS_PER_DAY = 18  # 08:00-17:00
+DEFAULT_PASSWORD = "healthtrack"
+
+SPECIALTIES = [
+    "Cardiology",
+    "Pediatrics",
+    "Dermatology",
+    "Neurology",
+    "General Practice",
+    "Orthopedics",
+    "Psychiatry",
+    "Ophthalmology",
+]
+FIRST_NAMES = [
+    "Wei", "Fang", "Min", "Jing", "Lei", "Yan", "John", "Jane", "Maria", "David",
+    "Sarah", "Ahmed", "Priya", "Carlos", "Anna", "Kenji", "Olga", "Noah",
+]
+LAST_NAMES = [
+    "Wang", "Li", "Zhang", "Liu", "Chen", "Smith", "Johnson", "Garcia", "Kim",
+    "Nguyen", "Patel", "Müller", "Rossi", "Silva", "Tanaka", "Ivanova",
+]
+CHALLENGE_WORDS = [
+    "walk", "run", "swim", "cycle", "sleep", "water", "yoga", "stretch", "steps",
+    "健走", "跑步", "游泳", "睡眠", "喝水", "瑜伽", "早起",
+]
+
+
+def phone_number(user_id: int) -> str:
+    return f"+1555{user_id:07d}"
+
+
+def email_address(user_id: int) -> str:
+    return f"user{user_id}@example.com"
+
+
+def slot_start(index: int) -> datetime:
+    """Start of a provider's ``index``-th slot; every provider has the same grid"""
+    day, slot = divmod(index, SLOTS_PER_DAY)
+    return FIRST_SLOT + timedelta(days=day) + slot * SLOT_LENGTH
+
+
+class _BulkWriter:
+    """Buffered executemany of one table's rows straight to the DBAPI cursor"""
+
+    def __init__(self, connection, table, columns, batch_size):
+        dialect = connection.dialect
+        compiled = table.insert().compile(dialect=dialect, column_keys=columns)
+        self.connection = connection
+        self.table = table.name
+        self.sql = str(compiled)
+        self.columns = columns
+        self.positional = compiled.positional
+        # Reorder our tuples into the order of the statement's placeholders
+        names = compiled.positiontup if compiled.positional else columns
+        self.order = [columns.index(name) for name in names]
+        # (placeholder position, converter) for the columns that need one
+        self.converters = []
+        for position, name in enumerate(names):
+            column_type = table.c[name].type
+            process = column_type.dialect_impl(dialect).bind_processor(dialect)
+            if process is None:
+                continue
+            # The same datetimes repeat across millions of rows; convert each once
+            if isinstance(column_type, DateTime):
+                process = functools.lru_cache(maxsize=65536)(process)
+            self.converters.append((position, process))
+        self.batch_size = batch_size
+        self.buffer = []
+        self.count = 0
+
+    def add(self, row: tuple):
+        values = [row[i] for i in self.order]
+        for position, process in self.converters:
+            if values[position] is not None:
+                values[position] = process(values[position])
+        if self.positional:
+            self.buffer.append(tuple(values))
+        else:
+            self.buffer.append(dict(zip(self.columns, values)))
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.connection.exec_driver_sql(self.sql, self.buffer)
+            self.count += len(self.buffer)
+            self.buffer = []
+
+
+def _next_id(connection, table) -> int:
+    return (connection.execute(select(func.max(table.c.id))).scalar() or 0) + 1
+
+
+def _pick_distinct(rng, first: int, count: int, k: int, exclude=None):
+    """``k`` distinct ids from first..first+count-1, without ``exclude``"""
+    k = min(k, count - (exclude is not None))
+    picked = set()
+    while len(picked) < k:
+        candidate = first + rng.randrange(count)
+        if candidate != exclude:
+            picked.add(candidate)
+    return sorted(picked)
+
+
+def generate(
+    engine,
+    users: int = 1000,
+    providers: int = 100,
+    slots: int = 10000,
+    challenges: int = 100,
+    seed: int = 0,
+    booked_fraction: float = 0.3,
+    password: str = DEFAULT_PASSWORD,
+    batch_size: int = 10000,
+    log=print,
+) -> dict:
+    """
+    Add a synthetic dataset to the migrated database behind ``engine``.
+
+    ``slots`` are spread evenly over the providers. Every booked slot has an
+    appointment. Challenges get a long-tailed number of participants, with
+    participant_count kept equal to the rows as crud._add_participant does.
+    Users join about one family group in five, and about half the users
+    have sent an invitation. Returns the number of rows written per table.
+    """
+    import passwords
+    from health_ids import allocate_many
+
+    started = time.perf_counter()
+    password_hash = passwords.hash_password(password)
+    with Session(bind=engine) as db:
+        health_ids = allocate_many(db, users)
+
+    tables = models.Base.metadata.tables
+    written = {}
+    with engine.begin() as connection:
+        if connection.dialect.name == "sqlite":
+            # A bigger page cache keeps index maintenance in memory
+            connection.exec_driver_sql("PRAGMA cache_size = -262144")
+
+        def writer(name, columns):
+            return _BulkWriter(connection, tables[name], columns, batch_size)
+
+        def done(*writers):
+            for w in writers:
+                w.flush()
+                written[w.table] = w.count
+            counts = ", ".join(f"{w.count} {w.table}" for w in writers)
+            log(f"{counts} ({time.perf_counter() - started:.0f}s)")
+
+        first_user = _next_id(connection, tables["users"])
+        first_provider = _next_id(connection, tables["providers"])
+        first_email = _next_id(connection, tables["emails"])
+        first_challenge = _next_id(connection, tables["challenges"])
+        first_group = _next_id(connection, tables["family_groups"])
+        user_ids = range(first_user, first_user + users)
+
+        # Providers
+        rng = random.Random(f"{seed}:providers")
+        provider_names = []
+        rows = writer(
+            "providers",
+            ["id", "license_number", "name", "specialty", "verified", "created_at"],
+        )
+        for i in range(providers):
+            provider_id = first_provider + i
+            name = f"Dr. {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            provider_names.append(name)
+            rows.add(
+                (
+                    provider_id,
+                    f"L{provider_id:08d}",
+                    name,
+                    rng.choice(SPECIALTIES),
+                    rng.random() < 0.9,
+                    GENERATED_AT,
+                )
+            )
+        done(rows)
+
+        # Users, their e-mail addresses and their providers
+        rng = random.Random(f"{seed}:users")
+        user_names = []
+        rows = writer(
+            "users",
+            [
+                "id",
+                "health_id",
+                "name",
+                "phone_number",
+                "phone_verified",
+                "password_hash",
+                "primary_provider_id",
+                "created_at",
+            ],
+        )
+        emails = writer("emails", ["id", "email_address", "verified", "created_at"])
+        user_emails = writer("user_emails", ["user_id", "email_id"])
+        user_providers = writer("user_providers", ["user_id", "provider_id"])
+        has_email = []
+        for i, user_id in enumerate(user_ids):
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            user_names.append(name)
+            linked = (
+                _pick_distinct(rng, first_provider, providers, rng.randint(0, 2))
+                if providers
+                else []
+            )
+            rows.add(
+                (
+                    user_id,
+                    health_ids[i],
+                    name,
+                    phone_number(user_id),
+                    rng.random() < 0.8,
+                    password_hash,
+                    linked[0] if linked else None,
+                    GENERATED_AT,
+                )
+            )
+            for provider_id in linked:
+                user_providers.add((user_id, provider_id))
+            if rng.random() < 0.6:
+                email_id = first_email + len(has_email)
+                emails.add((email_id, email_address(user_id), True, GENERATED_AT))
+                user_emails.add((user_id, email_id))
+                has_email.append(user_id)
+        done(rows, emails, user_emails, user_providers)
+
+        # Slots; each booked slot gets an appointment, some free slots have a
+        # cancelled one
+        rng = random.Random(f"{seed}:slots")
+        rows = writer(
+            "provider_availabilities",
+            ["provider_id", "start_time", "end_time", "is_booked", "created_at"],
+        )
+        appointments = writer(
+            "appointments",
+            [
+                "user_id",
+                "provider_id",
+                "user_name",
+                "provider_name",
+                "date_time",
+                "consultation_type",
+                "notes",
+                "cancelled",
+                "cancellation_reason",
+                "created_at",
+            ],
+        )
+        per_provider, extra = divmod(slots, providers) if providers else (0, 0)
+        grid = [
+            (slot_start(index), slot_start(index) + SLOT_LENGTH)
+            for index in range(per_provider + 1)
+        ]
+        for i in range(providers):
+            provider_id = first_provider + i
+            for start, end in grid[: per_provider + (i < extra)]:
+                booked = rng.random() < booked_fraction
+                rows.add((provider_id, start, end, booked, GENERATED_AT))
+                if users and (booked or rng.random() < 0.05):
+                    user_index = rng.randrange(users)
+                    appointments.add(
+                        (
+                            first_user + user_index,
+                            provider_id,
+                            user_names[user_index],
+                            provider_names[i],
+                            start,
+                            rng.choice(("online", "in-person")),
+                            None,
+                            not booked,
+                            None if booked else "Schedule conflict",
+                            GENERATED_AT,
+                        )
+                    )
+        done(rows, appointments)
+
+        # Challenges and participants
+        rng = random.Random(f"{seed}:challenges")
+        rows = writer(
+            "challenges",
+            [
+                "id",
+                "challenge_id",
+                "creator_id",
+                "goal",
+                "start_date",
+                "end_date",
+                "created_at",
+                "progress",
+                "title",
+                "description",
+                "participant_count",
+            ],
+        )
+        participants = writer("challenge_participants", ["challenge_id", "user_id"])
+        for i in range(challenges):
+            challenge_id = first_challenge + i
+            # Long tail: most challenges are small, a few are very popular
+            size = min(users, int(rng.paretovariate(1.2)) - 1, 10000)
+            members = _pick_distinct(rng, first_user, users, size)
+            start = GENERATED_AT + timedelta(days=rng.randrange(365))
+            rows.add(
+                (
+                    challenge_id,
+                    f"CH{challenge_id:08d}",
+                    first_user + rng.randrange(users) if users else None,
+                    " ".join(rng.sample(CHALLENGE_WORDS, 2)),
+                    start,
+                    start + timedelta(days=rng.choice((7, 14, 30, 90))),
+                    GENERATED_AT,
+                    0,
+                    " ".join(rng.sample(CHALLENGE_WORDS, 3)),
+                    " ".join(rng.sample(CHALLENGE_WORDS, 6)),
+                    len(members),
+                )
+            )
+            for user_id in members:
+                participants.add((challenge_id, user_id))
+        done(rows, participants)
+
+        # Family groups: an owner plus one to five members
+        rng = random.Random(f"{seed}:family_groups")
+        rows = writer("family_groups", ["id", "owner_id", "name", "created_at"])
+        members = writer(
+            "family_group_members",
+            ["family_group_id", "user_id", "user_name", "role", "joined_at"],
+        )
+        groups = users // 5 if users > 1 else 0
+        for i in range(groups):
+            group_id = first_group + i
+            owner = first_user + rng.randrange(users)
+            owner_name = user_names[owner - first_user]
+            rows.add((group_id, owner, f"{owner_name}'s family", GENERATED_AT))
+            members.add((group_id, owner, owner_name, "admin", GENERATED_AT))
+            for user_id in _pick_distinct(
+                rng, first_user, users, rng.randint(1, 5), exclude=owner
+            ):
+                role = "caregiver" if rng.random() < 0.2 else "member"
+                name = user_names[user_id - first_user]
+                members.add((group_id, user_id, name, role, GENERATED_AT))
+        done(rows, members)
+
+        # Invitations: pending, accepted, rejected and expired
+        rng = random.Random(f"{seed}:invitations")
+        rows = writer(
+            "invitations",
+            [
+                "sender_id",
+                "recipient_email",
+                "recipient_phone",
+                "invitation_type",
+                "challenge_id",
+                "family_group_id",
+                "sent_at",
+                "accepted_at",
+                "expired_at",
+                "is_accepted",
+                "is_expired",
+                "is_rejected",
+                "rejected_at",
+            ],
+        )
+        for _ in range(users // 2 if users > 1 else 0):
+            sender = first_user + rng.randrange(users)
+            recipient = _pick_distinct(rng, first_user, users, 1, exclude=sender)[0]
+            if has_email and rng.random() < 0.5:
+                email, phone = email_address(rng.choice(has_email)), None
+            else:
+                email, phone = None, phone_number(recipient)
+            kind = rng.choice(("challenge", "family_group", "data_sharing"))
+            challenge_id = (
+                first_challenge + rng.randrange(challenges)
+                if kind == "challenge" and challenges
+                else None
+            )
+            group_id = (
+                first_group + rng.randrange(groups)
+                if kind == "family_group" and groups
+                else None
+            )
+            sent_at = GENERATED_AT - timedelta(minutes=rng.randrange(30 * 24 * 60))
+            state = rng.random()
+            rows.add(
+                (
+                    sender,
+                    email,
+                    phone,
+                    kind,
+                    challenge_id,
+                    group_id,
+                    sent_at,
+                    sent_at + timedelta(days=1) if 0.6 <= state < 0.8 else None,
+                    sent_at + timedelta(days=7),
+                    0.6 <= state < 0.8,
+                    state >= 0.9,
+                    0.8 <= state < 0.9,
+                    sent_at + timedelta(days=1) if 0.8 <= state < 0.9 else None,
+                )
+            )
+        done(rows)
+
+        if connection.dialect.name == "postgresql":
+            # Explicit ids were written; move the serial sequences past them
+            for name in ("users", "providers", "emails", "challenges", "family_groups"):
+                connection.exec_driver_sql(
+                    f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), "
+                    f"(SELECT max(id) FROM {name}))"
+                )
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Without options, add the hand-written sample rows. With any "
+        "size option, generate a synthetic dataset instead."
+    )
+    parser.add_argument("--users", type=int)
+    parser.add_argument("--providers", type=int)
+    parser.add_argument("--slots", type=int)
+    parser.add_argument("--challenges", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--booked-fraction", type=float, default=0.3)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args(argv)
+
+    sizes = {
+        name: getattr(args, name)
+        for name in ("users", "providers", "slots", "challenges")
+        if getattr(args, name) is not None
+    }
+    if not sizes:
+        create_sample_data()
+        return
+
+    import migrations
+    from database import engine
+
+    migrations.upgrade(engine)
+    generate(
+        engine,
+        seed=args.seed,
+        booked_fraction=args.booked_fraction,
+        batch_size=args.batch_size,
+        **sizes,
+    )
+
+
 if __name__ == "__main__":
-    create_sample_data()
\ No newline at end of file
+    main()
@@ -1,7 +1,7 @@
-from datetime import date, datetime
+from datetime import date, datetime, time, timedelta
 from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 
 
 # User schemas
@@ -122,6 +122,16 @@ class Challenge(ChallengeBase):
     creator_id: Optional[int] = None
     created_at: datetime
     progress: int = 0
+    participant_count: int = 0
+
+    class Config:
+        from_attributes = True
+
+
+class ChallengeParticipant(BaseModel):
+    id: int
+    health_id: str
+    name: str
 
     class Config:
         from_attributes = True
@@ -221,3 +231,44 @@ class ProviderAvailabilityExpand(ProviderAvailabilityBase):
 
     class Config:
         from_attributes = True
+
+
+class AvailabilitySlot(BaseModel):
+    start_time: datetime
+    end_time: datetime
+
+
+# Longest weekly recurrence a single bulk request may expand
+MAX_RECURRENCE_WEEKS = 52
+
+
+class AvailabilityRecurrence(BaseModel):
+    """Weekly schedule, e.g. Mon-Fri 09:00-17:00 in 30 minute slots for 12 weeks"""
+
+    weekdays: List[int] = Field(min_length=1)  # 0 = Monday ... 6 = Sunday
+    day_start: time
+    day_end: time
+    slot_minutes: int = Field(30, gt=0)
+    start_date: date
+    weeks: int = Field(1, ge=1, le=MAX_RECURRENCE_WEEKS)
+
+    @model_validator(mode="after")
+    def _slot_fits_in_the_day(self):
+        # Otherwise no day yields a slot and nothing bounds the expansion
+        window = datetime.combine(date.min, self.day_end) - datetime.combine(
+            date.min, self.day_start
+        )
+        if window < timedelta(minutes=self.slot_minutes):
+            raise ValueError("slot_minutes must fit between day_start and day_end")
+        return self
+
+
+class ProviderAvailabilityBulkCreate(BaseModel):
+    provider_id: int
+    slots: List[AvailabilitySlot] = []
+    recurrence: Optional[AvailabilityRecurrence] = None
+
+
+class ProviderAvailabilityBulkResult(BaseModel):
+    provider_id: int
+    created: int
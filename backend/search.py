@@ -0,0 +1,204 @@
+"""
+Full-text search over challenges.
+
+SQLite uses an external-content FTS5 table, ``challenges_fts``, over title,
+goal and description. Triggers on ``challenges`` keep it in sync, so
+create_challenge, delete_challenge and any other write update the index in
+the same transaction.
+
+The table uses the trigram tokenizer. It matches substrings the way the old
+LIKE search did, including Chinese text that has no spaces between words.
+Trigrams cannot index search terms shorter than three characters, so those
+terms are checked with LIKE against the rows the index returned, or with a
+LIKE scan when no term is long enough.
+
+PostgreSQL uses a GIN index on the matching to_tsvector expression instead.
+When neither is available, for example on SQLite older than 3.34, search
+falls back to a LIKE scan.
+
+Migration 0006 creates the index with `install`; requests only look up which
+of the three the database has.
+"""
+
+import sqlite3
+import weakref
+
+from sqlalchemy import (
+    Column,
+    Integer,
+    MetaData,
+    Table,
+    func,
+    literal_column,
+    or_,
+    text,
+)
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, joinedload
+
+import models
+
+FTS_TABLE = "challenges_fts"
+PG_INDEX = "ix_challenges_search"
+
+# The FTS5 table as seen by queries; not part of models.Base.metadata
+challenges_fts = Table(FTS_TABLE, MetaData(), Column("rowid", Integer))
+
+_SQLITE_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, goal, description,
+        content='challenges', content_rowid='id', tokenize='trigram'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS challenges_fts_insert AFTER INSERT ON challenges
+    BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, goal, description)
+        VALUES (new.id, new.title, new.goal, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS challenges_fts_delete AFTER DELETE ON challenges
+    BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, goal, description)
+        VALUES ('delete', old.id, old.title, old.goal, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS challenges_fts_update AFTER UPDATE ON challenges
+    BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, goal, description)
+        VALUES ('delete', old.id, old.title, old.goal, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, title, goal, description)
+        VALUES (new.id, new.title, new.goal, new.description);
+    END""",
+]
+
+_PG_DOCUMENT = (
+    "to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(goal, '')"
+    " || ' ' || coalesce(description, ''))"
+)
+
+# engine -> "fts5" / "tsvector" / "like", looked up once per engine
+_mode = weakref.WeakKeyDictionary()
+
+
+def install(connection, concurrently: bool = False) -> str:
+    """
+    Create the search index on ``connection`` if needed and return the mode.
+
+    With ``concurrently`` the Postgres index is built with CREATE INDEX
+    CONCURRENTLY, which needs a connection outside a transaction.
+    """
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        exists = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE name = ?", (FTS_TABLE,)
+        ).first()
+        try:
+            for statement in _SQLITE_DDL:
+                connection.exec_driver_sql(statement)
+        except OperationalError:
+            # SQLite without FTS5 or the trigram tokenizer
+            return "like"
+        if not exists:
+            # Index the challenges written before the table existed
+            connection.exec_driver_sql(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+            )
+        return "fts5"
+    if dialect == "postgresql":
+        create = "CREATE INDEX CONCURRENTLY" if concurrently else "CREATE INDEX"
+        connection.exec_driver_sql(
+            f"{create} IF NOT EXISTS {PG_INDEX} ON challenges "
+            f"USING gin ({_PG_DOCUMENT})"
+        )
+        return "tsvector"
+    return "like"
+
+
+def _sqlite_supported(connection) -> bool:
+    options = {
+        row[0] for row in connection.exec_driver_sql("PRAGMA compile_options")
+    }
+    # The trigram tokenizer arrived in SQLite 3.34
+    return "ENABLE_FTS5" in options and sqlite3.sqlite_version_info >= (3, 34)
+
+
+def missing_objects(connection) -> list:
+    """The search index `install` would create but the database lacks"""
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        if not _sqlite_supported(connection):
+            return []
+        found = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE name = ?", (FTS_TABLE,)
+        ).first()
+        return [] if found else [f"table {FTS_TABLE}"]
+    if dialect == "postgresql":
+        found = connection.exec_driver_sql(
+            f"SELECT to_regclass('{PG_INDEX}')"
+        ).scalar()
+        return [] if found else [f"index {PG_INDEX} on challenges"]
+    return []
+
+
+def _get_mode(db: Session) -> str:
+    bind = db.get_bind()
+    if bind not in _mode:
+        with bind.connect() as connection:
+            missing = missing_objects(connection)
+            if missing or connection.dialect.name not in ("sqlite", "postgresql"):
+                mode = "like"
+            elif connection.dialect.name == "sqlite":
+                mode = "fts5" if _sqlite_supported(connection) else "like"
+            else:
+                mode = "tsvector"
+        _mode[bind] = mode
+    return _mode[bind]
+
+
+# Shortest term the trigram index can match
+MIN_TERM_LENGTH = 3
+
+
+def fts5_query(terms) -> str:
+    """Every term must appear as a substring; quotes are escaped FTS5-style"""
+    return " AND ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def _like_any_column(term: str):
+    pattern = f"%{term}%"
+    return or_(
+        models.Challenge.title.ilike(pattern),
+        models.Challenge.goal.ilike(pattern),
+        models.Challenge.description.ilike(pattern),
+    )
+
+
+def search_challenges(db: Session, keyword: str, skip: int = 0, limit: int = 100):
+    """Challenges matching ``keyword`` in title, goal or description, best first"""
+    terms = keyword.split()
+    if not terms:
+        return []
+    mode = _get_mode(db)
+    query = db.query(models.Challenge).options(joinedload(models.Challenge.creator))
+
+    if mode == "tsvector":
+        document = literal_column(_PG_DOCUMENT)
+        ts_query = func.websearch_to_tsquery("simple", keyword)
+        query = query.filter(document.op("@@")(ts_query)).order_by(
+            func.ts_rank(document, ts_query).desc(), models.Challenge.id
+        )
+        return query.offset(skip).limit(limit).all()
+
+    indexed = [term for term in terms if len(term) >= MIN_TERM_LENGTH]
+    if mode == "fts5" and indexed:
+        query = (
+            query.join(challenges_fts, challenges_fts.c.rowid == models.Challenge.id)
+            .filter(text(f"{FTS_TABLE} MATCH :match"))
+            .params(match=fts5_query(indexed))
+            # bm25() is lower for better matches
+            .order_by(literal_column(f"bm25({FTS_TABLE})"), models.Challenge.id)
+        )
+        terms = [term for term in terms if len(term) < MIN_TERM_LENGTH]
+    else:
+        query = query.order_by(models.Challenge.id)
+
+    for term in terms:
+        query = query.filter(_like_any_column(term))
+    return query.offset(skip).limit(limit).all()
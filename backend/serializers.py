@@ -0,0 +1,94 @@
+"""
+Fast JSON serialization for the high-volume list endpoints.
+
+With HEALTHTRACK_FAST_JSON=1:
+
+- `FastJSONResponse` becomes the app's default response class. It encodes
+  with orjson when it is installed (``pip install .[fast-json]``) and with
+  pydantic-core's encoder otherwise.
+- /appointments/user/{id}, /providers-availability/all/available and
+  /challenges/ build plain dicts straight from the rows with the functions
+  below and return them in a `FastJSONResponse`. This skips the
+  response_model validation pass, so each function must produce exactly what
+  its schema would.
+"""
+
+from datetime import datetime
+
+import pydantic_core
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return pydantic_core.to_json(content)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def list_response(items: list, response) -> FastJSONResponse:
+    """Wrap ``items``, keeping headers such as X-Next-Cursor set on ``response``"""
+    return FastJSONResponse(items, headers=response.headers)
+
+
+def _as_date(value):
+    # Challenge dates are DateTime columns but date fields in the schema
+    return value.date() if isinstance(value, datetime) else value
+
+
+def appointment_row(appointment, provider_name, provider_specialty) -> dict:
+    """schemas.AppointmentExpand of a get_user_appointments row"""
+    return {
+        "provider_id": appointment.provider_id,
+        "date_time": appointment.date_time,
+        "user_name": appointment.user_name,
+        "provider_name": provider_name,
+        "consultation_type": appointment.consultation_type,
+        "notes": appointment.notes,
+        "id": appointment.id,
+        "user_id": appointment.user_id,
+        "cancelled": bool(appointment.cancelled),
+        "cancellation_reason": appointment.cancellation_reason,
+        "created_at": appointment.created_at,
+        "provider_specialty": provider_specialty,
+    }
+
+
+def slot_row(slot, name, specialty) -> dict:
+    """schemas.ProviderAvailabilityExpand of a (slot, provider name, specialty) row"""
+    return {
+        "provider_id": slot.provider_id,
+        "start_time": slot.start_time,
+        "end_time": slot.end_time,
+        "is_booked": bool(slot.is_booked),
+        "id": slot.id,
+        "created_at": slot.created_at,
+        "name": name,
+        "specialty": specialty,
+    }
+
+
+def challenge_row(challenge) -> dict:
+    """schemas.Challenge"""
+    return {
+        "challenge_id": challenge.challenge_id,
+        "goal": challenge.goal,
+        "start_date": _as_date(challenge.start_date),
+        "end_date": _as_date(challenge.end_date),
+        "title": challenge.title,
+        "description": challenge.description,
+        "id": challenge.id,
+        "creator_id": challenge.creator_id,
+        "created_at": challenge.created_at,
+        "progress": challenge.progress,
+        "participant_count": challenge.participant_count,
+    }
@@ -0,0 +1,40 @@
+"""
+Periodic background jobs run by the API process.
+
+main.py starts `run_invitation_sweeper` from the app lifespan. Every process
+runs its own copy. The sweep is an idempotent bulk UPDATE, so several workers
+sweeping at once only repeat each other's work.
+"""
+
+import asyncio
+import logging
+
+from starlette.concurrency import run_in_threadpool
+
+import config
+import crud
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def sweep_expired_invitations() -> int:
+    db = SessionLocal()
+    try:
+        return crud.expire_invitations(db)
+    finally:
+        db.close()
+
+
+async def run_invitation_sweeper(interval: int = None):
+    """Mark expired invitations every ``interval`` seconds until cancelled"""
+    interval = interval or config.INVITATION_SWEEP_INTERVAL_SECONDS
+    while True:
+        try:
+            expired = await run_in_threadpool(sweep_expired_invitations)
+            if expired:
+                logger.info("Marked %d invitations as expired", expired)
+        except Exception:
+            # A failed sweep is retried on the next run
+            logger.exception("Invitation sweep failed")
+        await asyncio.sleep(interval)
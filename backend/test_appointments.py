@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import crud
+import models
+
+START = datetime(2030, 1, 7, 9, 0)
+
+
+@pytest.fixture
+def client(client, session_factory):
+    """
+    Client on an in-memory database where user 1's feed holds 20 appointments.
+
+    Every date_time is shared by two appointments so pages split ties, and
+    user 1 is linked to provider 1, so the feed mixes their own appointments
+    with other users' appointments at that provider.
+    """
+    db = session_factory()
+    users = [
+        models.User(health_id=f"{i:08d}", name=f"User {i}", phone_number=str(i))
+        for i in (1, 2)
+    ]
+    providers = [
+        models.Provider(name=f"Dr. {i}", specialty="General") for i in (1, 2)
+    ]
+    users[0].providers.append(providers[0])
+    db.add_all(users + providers)
+    db.flush()
+    feed = [
+        # User 1 at either provider, user 2 only at user 1's provider
+        (users[0], providers[i % 4 // 2]) if i % 2 else (users[1], providers[0])
+        for i in range(20)
+    ]
+    # Not in user 1's feed
+    elsewhere = [(users[1], providers[1])]
+    for i, (user, provider) in enumerate(feed + elsewhere):
+        db.add(
+            models.Appointment(
+                user_id=user.id,
+                provider_id=provider.id,
+                user_name=user.name,
+                provider_name=provider.name,
+                date_time=START + timedelta(hours=i // 2),
+                consultation_type="online",
+            )
+        )
+    db.commit()
+    db.close()
+    return client
+
+
+def test_feed_pages_have_no_gaps_or_duplicates(client):
+    everything = client.get("/appointments/user/1", params={"limit": 1000}).json()
+    assert len(everything) == 20
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/appointments/user/1", params=params)
+        seen.extend(appointment["id"] for appointment in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert seen == [appointment["id"] for appointment in everything]
+    keys = [(a["date_time"], a["id"]) for a in everything]
+    assert keys == sorted(keys)
+
+
+def test_a_malformed_cursor_is_400(client):
+    response = client.get("/appointments/user/1", params={"cursor": "yesterday"})
+    assert response.status_code == 400
+
+
+def test_many_providers_share_one_arm(client, monkeypatch):
+    per_provider = client.get("/appointments/user/1", params={"limit": 7}).json()
+    monkeypatch.setattr(crud, "FEED_PROVIDER_ARMS", 0)
+    shared = client.get("/appointments/user/1", params={"limit": 7}).json()
+    assert shared == per_provider
@@ -0,0 +1,159 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+import migrations
+import models
+from database import get_async_db
+
+pytest.importorskip("aiosqlite")
+
+MONDAY = "2030-01-07"
+USER = {"name": "A", "phone_number": "+1", "password": "secret"}
+
+
+@pytest.fixture
+def engine(tmp_path):
+    # A file database, so the sync and the async engine see the same rows
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'routes.db'}", connect_args={"check_same_thread": False}
+    )
+    migrations.upgrade(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def client(client, session_factory):
+    """Sync client with one user and two providers with free slots"""
+    user_id = client.post("/users/", json=USER).json()["id"]
+    db = session_factory()
+    db.add_all(
+        models.Provider(license_number=f"L{i}", name=f"Dr. {name}", specialty=specialty)
+        for i, (name, specialty) in enumerate([("A", "General"), ("B", "Dermatology")])
+    )
+    db.commit()
+    db.close()
+    for provider_id in (1, 2):
+        client.post(f"/users/{user_id}/providers/{provider_id}")
+        response = client.post(
+            "/providers-availability/bulk",
+            json={
+                "provider_id": provider_id,
+                "recurrence": {
+                    "weekdays": [0, 2],
+                    "day_start": "09:00",
+                    "day_end": "11:00",
+                    "slot_minutes": 30,
+                    "start_date": MONDAY,
+                    "weeks": 1,
+                },
+            },
+        )
+        assert response.status_code == 200
+    return client
+
+
+@pytest.fixture
+def async_client(engine, client):
+    """Client for the async routes only, on an async engine over the same file"""
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    from routers import async_hot_paths
+
+    async_engine = create_async_engine(
+        engine.url.set(drivername="sqlite+aiosqlite"), poolclass=NullPool
+    )
+    AsyncSession = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+
+    async def override():
+        async with AsyncSession() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(async_hot_paths.router)
+    app.dependency_overrides[get_async_db] = override
+    with TestClient(app) as async_client:
+        yield async_client
+
+
+def book(client, provider_id, hour):
+    return client.post(
+        "/appointments/?user_id=1",
+        json={
+            "provider_id": provider_id,
+            "date_time": f"{MONDAY}T{hour}",
+            "user_name": "A",
+            "provider_name": f"Dr. {'AB'[provider_id - 1]}",
+            "consultation_type": "online",
+        },
+    )
+
+
+def test_login(client, async_client):
+    response = async_client.post("/auth/login", json=USER)
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    me = client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+    assert me.json()["name"] == "A"
+
+    wrong = {**USER, "password": "wrong"}
+    assert async_client.post("/auth/login", json=wrong).status_code == 401
+    assert client.post("/auth/login", json=wrong).status_code == 401
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {},
+        {"specialty": "Dermatology"},
+        {"limit": 3},
+        {"limit": 3, "from": f"{MONDAY}T09:30:00"},
+    ],
+)
+def test_search_matches_the_sync_route(client, async_client, params):
+    params = {"from": f"{MONDAY}T00:00:00", "to": "2030-01-14T00:00:00", **params}
+    url = "/providers-availability/search"
+    sync_page = client.get(url, params=params)
+    async_page = async_client.get(url, params=params)
+    assert async_page.status_code == 200
+    assert async_page.json() == sync_page.json()
+    cursor = async_page.headers.get("X-Next-Cursor")
+    assert cursor == sync_page.headers.get("X-Next-Cursor")
+    if cursor:
+        params["cursor"] = cursor
+        assert async_client.get(url, params=params).json() == client.get(
+            url, params=params
+        ).json()
+
+
+def test_booking(client, async_client):
+    response = book(async_client, 1, "09:00:00")
+    assert response.status_code == 200
+    assert response.json()["provider_id"] == 1
+    # The slot is taken for both implementations
+    taken = book(async_client, 1, "09:00:00")
+    assert taken.status_code == 400
+    assert book(client, 1, "09:00:00").json() == taken.json()
+    assert book(async_client, 1, "09:30:00").status_code == 200
+    assert book(async_client, 1, "18:00:00").json() == taken.json()
+
+
+def test_feed_matches_the_sync_route(client, async_client):
+    for provider_id, hour in [(1, "09:00:00"), (2, "09:30:00"), (1, "10:00:00")]:
+        assert book(async_client, provider_id, hour).status_code == 200
+    url = "/appointments/user/1"
+    assert len(async_client.get(url).json()) == 3
+    for params in [{}, {"limit": 2}]:
+        sync_page = client.get(url, params=params)
+        async_page = async_client.get(url, params=params)
+        assert async_page.json() == sync_page.json()
+        cursor = async_page.headers.get("X-Next-Cursor")
+        assert cursor == sync_page.headers.get("X-Next-Cursor")
+    following = async_client.get(url, params={"limit": 2, "cursor": cursor})
+    assert [a["date_time"] for a in following.json()] == [f"{MONDAY}T10:00:00"]
+    assert async_client.get("/appointments/user/99").status_code == 404
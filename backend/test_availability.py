@@ -0,0 +1,244 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import crud
+import migrations
+import models
+
+MONDAY = "2030-01-07"
+
+
+@pytest.fixture
+def client(client, session_factory):
+    """Client on an in-memory database with one provider"""
+    db = session_factory()
+    db.add(models.Provider(name="Dr. Who", specialty="General"))
+    db.commit()
+    db.close()
+    return client
+
+
+def bulk(client, **request):
+    return client.post(
+        "/providers-availability/bulk", json={"provider_id": 1, **request}
+    )
+
+
+def recurrence(**fields):
+    rule = {
+        "weekdays": [0, 2],
+        "day_start": "09:00",
+        "day_end": "10:00",
+        "slot_minutes": 30,
+        "start_date": MONDAY,
+        "weeks": 2,
+    }
+    rule.update(fields)
+    return rule
+
+
+def test_recurrence_creates_weekly_slots(client):
+    response = bulk(client, recurrence=recurrence())
+    assert response.status_code == 200
+    assert response.json()["created"] == 8
+
+
+@pytest.mark.parametrize(
+    "fields",
+    [
+        {"weekdays": []},
+        {"weeks": 10**9},
+        {"weeks": 0},
+        {"slot_minutes": 90},
+        {"day_start": "10:00", "day_end": "09:00"},
+    ],
+)
+def test_unbounded_recurrences_are_rejected(client, fields):
+    assert bulk(client, recurrence=recurrence(**fields)).status_code == 422
+
+
+def slot(start, end):
+    return {"start_time": f"{MONDAY}T{start}", "end_time": f"{MONDAY}T{end}"}
+
+
+def test_adjacent_slots_do_not_overlap(client):
+    response = bulk(client, slots=[slot("09:30", "10:00"), slot("09:00", "09:30")])
+    assert response.json()["created"] == 2
+
+
+def test_overlapping_slots_in_one_request_are_rejected(client):
+    response = bulk(client, slots=[slot("09:00", "09:45"), slot("09:30", "10:00")])
+    assert response.status_code == 400
+    assert client.get("/providers-availability/1").json() == []
+
+
+def test_slots_overlapping_existing_ones_are_rejected(client):
+    assert bulk(client, slots=[slot("09:00", "09:30")]).json()["created"] == 1
+    # The recurrence's first Monday slot collides with the existing one
+    response = bulk(client, slots=[slot("11:00", "11:30")], recurrence=recurrence())
+    assert response.status_code == 400
+    assert len(client.get("/providers-availability/1").json()) == 1
+
+
+def test_single_slots_overlapping_existing_ones_are_rejected(client):
+    assert bulk(client, slots=[slot("09:00", "09:30")]).json()["created"] == 1
+    response = client.post(
+        "/providers-availability/", json={"provider_id": 1, **slot("09:15", "09:45")}
+    )
+    assert response.status_code == 400
+    response = client.post(
+        "/providers-availability/", json={"provider_id": 1, **slot("09:30", "10:00")}
+    )
+    assert response.status_code == 200
+
+
+def test_concurrent_bulk_requests_cannot_both_pass_the_check(tmp_path, monkeypatch):
+    # A file database so every request gets its own connection, like separate workers
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'slots.db'}", connect_args={"check_same_thread": False}
+    )
+    migrations.upgrade(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    with Session() as db:
+        db.add(models.Provider(name="Dr. Who", specialty="General"))
+        db.commit()
+
+    # Both requests start before either of them takes the provider lock
+    barrier = threading.Barrier(2)
+    lock_provider_schedule = crud._lock_provider_schedule
+
+    def wait_then_lock(*args):
+        barrier.wait(timeout=10)
+        lock_provider_schedule(*args)
+
+    monkeypatch.setattr(crud, "_lock_provider_schedule", wait_then_lock)
+    start = datetime.fromisoformat(f"{MONDAY}T09:00")
+
+    def create(minutes):
+        with Session() as db:
+            try:
+                return crud.create_provider_availabilities_bulk(
+                    db, 1, [(start, start + timedelta(minutes=minutes))]
+                )
+            except ValueError:
+                return 0
+
+    with ThreadPoolExecutor(2) as pool:
+        created = list(pool.map(create, [30, 45]))
+
+    assert sorted(created) == [0, 1]
+    with Session() as db:
+        assert db.query(models.ProviderAvailability).count() == 1
+    engine.dispose()
+
+
+def free_slots(client, **params):
+    """Every page of GET /all/available, following X-Next-Cursor"""
+    slots, cursor = [], None
+    while True:
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/providers-availability/all/available", params=params)
+        assert response.status_code == 200
+        slots.extend(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return slots
+
+
+@pytest.fixture
+def schedules(client):
+    """Two providers with the same weekly schedule, so start times tie"""
+    client.post(
+        "/providers/",
+        json={"license_number": "L2", "name": "Dr. No", "specialty": "General"},
+    )
+    for provider_id in (1, 2):
+        client.post(
+            "/providers-availability/bulk",
+            json={"provider_id": provider_id, "recurrence": recurrence(weeks=3)},
+        )
+    return client
+
+
+@pytest.mark.parametrize(
+    "window", [{}, {"from": f"{MONDAY}T09:30:00", "to": "2030-01-21T09:30:00"}]
+)
+def test_free_slot_pages_have_no_gaps_or_duplicates(schedules, window):
+    everything = free_slots(schedules, limit=1000, **window)
+    assert len(everything) == (24 if not window else 16)
+    keys = [(slot["start_time"], slot["id"]) for slot in everything]
+    assert keys == sorted(keys)
+
+    paged = free_slots(schedules, limit=4, **window)
+    assert [slot["id"] for slot in paged] == [slot["id"] for slot in everything]
+
+
+def test_streamed_slots_match_the_pages(schedules):
+    response = schedules.get(
+        "/providers-availability/all/available", params={"stream": "true"}
+    )
+    streamed = [json.loads(line) for line in response.text.splitlines()]
+    assert streamed == free_slots(schedules, limit=5)
+
+
+def test_a_malformed_slot_cursor_is_400(client):
+    response = client.get(
+        "/providers-availability/all/available", params={"cursor": "42"}
+    )
+    assert response.status_code == 400
+
+
+def search(client, **params):
+    """Every page of GET /search, following X-Next-Cursor"""
+    slots, cursor = [], None
+    while True:
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/providers-availability/search", params=params)
+        assert response.status_code == 200
+        slots.extend(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return slots
+
+
+def test_search_pages_have_no_gaps_or_duplicates(schedules):
+    window = {"from": f"{MONDAY}T09:30:00", "to": "2030-01-21T09:30:00"}
+    everything = search(schedules, limit=1000, **window)
+    assert len(everything) == 16
+    assert all(slot["start_time"] >= window["from"] for slot in everything)
+    assert all(slot["end_time"] <= window["to"] for slot in everything)
+    keys = [(slot["start_time"], slot["id"]) for slot in everything]
+    assert keys == sorted(keys)
+
+    paged = search(schedules, limit=3, **window)
+    assert [slot["id"] for slot in paged] == [slot["id"] for slot in everything]
+    by_offset = schedules.get(
+        "/providers-availability/search", params={"skip": 3, "limit": 3, **window}
+    ).json()
+    assert by_offset == paged[3:6]
+
+
+def test_search_filters_by_specialty(schedules):
+    schedules.post(
+        "/providers/",
+        json={"license_number": "L3", "name": "Dr. Bones", "specialty": "Surgery"},
+    )
+    schedules.post(
+        "/providers-availability/bulk",
+        json={"provider_id": 3, "recurrence": recurrence(weeks=1)},
+    )
+    window = {"from": f"{MONDAY}T00:00:00", "to": "2030-02-01T00:00:00"}
+    surgery = search(schedules, specialty="Surgery", **window)
+    assert len(surgery) == 4
+    assert {slot["name"] for slot in surgery} == {"Dr. Bones"}
+    assert schedules.get(
+        "/providers-availability/search", params={"cursor": "nope", **window}
+    ).status_code == 400
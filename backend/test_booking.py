@@ -0,0 +1,74 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+
+import crud
+import migrations
+import models
+
+BOOKERS = 4
+START = "2030-01-07T09:00:00"
+
+
+@pytest.fixture
+def engine(tmp_path):
+    # A file database so every request gets its own connection, like separate workers
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'race.db'}", connect_args={"check_same_thread": False}
+    )
+    migrations.upgrade(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_only_one_concurrent_booking_wins(client, session_factory, monkeypatch):
+    db = session_factory()
+    db.add(models.Provider(name="Dr. Who", specialty="General"))
+    db.add_all(
+        models.User(health_id=f"{i:08d}", name=f"User {i}", phone_number=str(i))
+        for i in range(1, BOOKERS + 1)
+    )
+    db.add(
+        models.ProviderAvailability(
+            provider_id=1,
+            start_time=datetime.fromisoformat(START),
+            end_time=datetime.fromisoformat("2030-01-07T09:30:00"),
+        )
+    )
+    db.commit()
+    db.close()
+
+    # Every request sees the slot free before any of them claims it
+    barrier = threading.Barrier(BOOKERS)
+    find_covering_slot = crud.find_covering_slot
+
+    def find_then_wait(*args, **kwargs):
+        slot = find_covering_slot(*args, **kwargs)
+        barrier.wait(timeout=10)
+        return slot
+
+    monkeypatch.setattr(crud, "find_covering_slot", find_then_wait)
+
+    def book(user_id):
+        return client.post(
+            f"/appointments/?user_id={user_id}",
+            json={
+                "provider_id": 1,
+                "date_time": START,
+                "user_name": f"User {user_id}",
+                "provider_name": "Dr. Who",
+                "consultation_type": "online",
+            },
+        ).status_code
+
+    with ThreadPoolExecutor(BOOKERS) as pool:
+        statuses = sorted(pool.map(book, range(1, BOOKERS + 1)))
+
+    assert statuses == [200] + [409] * (BOOKERS - 1)
+    db = session_factory()
+    assert db.query(models.Appointment).count() == 1
+    assert db.query(models.ProviderAvailability).one().is_booked
+    db.close()
@@ -0,0 +1,192 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+import cache
+import crud
+import models
+import schemas
+
+START = datetime(2024, 1, 1, 9, 0)
+
+
+@pytest.fixture(params=["local", "shared"])
+def db(request, session_factory, monkeypatch):
+    """Session on an in-memory database, with each directory cache backend"""
+    if request.param == "local":
+        backend = cache.TTLCache(1000, 60)
+    else:
+        backend = cache.SharedCache(cache.MemoryClient(), 60)
+    monkeypatch.setattr(cache, "directory_cache", backend)
+
+    session = session_factory()
+    crud.create_provider(
+        session,
+        schemas.ProviderCreate(license_number="L1", name="Dr. A", specialty="GP"),
+    )
+    session.close()
+    db = session_factory()
+    yield db
+    db.close()
+
+
+def statements(db, call):
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append(statement)
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        result = call()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    return result, len(captured)
+
+
+def add_slot(db, hours=0):
+    return crud.create_provider_availability(
+        db,
+        schemas.ProviderAvailabilityCreate(
+            provider_id=1,
+            start_time=START + timedelta(hours=hours),
+            end_time=START + timedelta(hours=hours, minutes=30),
+        ),
+    )
+
+
+def test_provider_reads_hit_the_cache(db):
+    crud.get_provider(db, 1)
+    db.expunge_all()
+    provider, count = statements(db, lambda: crud.get_provider(db, 1))
+    assert count == 0
+    assert provider.name == "Dr. A"
+    # The cached copy is attached to the session and lazy-loads relationships
+    assert provider.users == []
+    assert cache.directory_cache.stats()["hits"] >= 1
+
+
+def test_creating_a_provider_invalidates_the_list(db):
+    assert len(crud.get_providers(db)) == 1
+    crud.create_provider(
+        db, schemas.ProviderCreate(license_number="L2", name="Dr. B", specialty="GP")
+    )
+    assert [p.name for p in crud.get_providers(db)] == ["Dr. A", "Dr. B"]
+
+
+def test_deleting_a_provider_invalidates_it(db):
+    crud.get_provider(db, 1)
+    assert crud.delete_provider(db, 1)
+    db.expunge_all()
+    assert crud.get_provider(db, 1) is None
+    assert crud.get_providers(db) == []
+
+
+def test_slot_writes_invalidate_the_free_slot_lists(db):
+    assert crud.get_available_provider_slots(db, 1) == []
+    assert crud.get_all_providers_available_slots(db) == []
+
+    slot = add_slot(db)
+    assert [s.id for s in crud.get_available_provider_slots(db, 1)] == [slot.id]
+    assert len(crud.get_all_providers_available_slots(db)) == 1
+
+    crud.book_provider_slot(db, slot.id)
+    assert crud.get_available_provider_slots(db, 1) == []
+    assert crud.get_all_providers_available_slots(db) == []
+
+    other = add_slot(db, hours=1)
+    assert len(crud.get_all_providers_available_slots(db)) == 1
+    crud.delete_provider_availability(db, other.id)
+    assert crud.get_all_providers_available_slots(db) == []
+
+
+def test_appointments_invalidate_the_free_slot_lists(db):
+    add_slot(db)
+    user = models.User(health_id="00000001", name="U", phone_number="1")
+    db.add(user)
+    db.commit()
+    assert len(crud.get_all_providers_available_slots(db)) == 1
+
+    appointment = crud.create_appointment(
+        db,
+        schemas.AppointmentCreate(
+            provider_id=1,
+            date_time=START,
+            user_name="U",
+            provider_name="Dr. A",
+            consultation_type="online",
+        ),
+        user_id=user.id,
+    )
+    assert crud.get_all_providers_available_slots(db) == []
+
+    crud.cancel_appointment(db, appointment.id, reason="sick")
+    assert len(crud.get_available_provider_slots(db, 1)) == 1
+    assert len(crud.get_all_providers_available_slots(db)) == 1
+
+
+def test_streaming_every_slot_does_not_fill_the_cache(db, monkeypatch):
+    for hours in range(25):
+        add_slot(db, hours=hours)
+    stored = []
+    original = cache.directory_cache.set
+
+    def record(key, value, ttl=None):
+        stored.append(key)
+        original(key, value, ttl=ttl)
+
+    monkeypatch.setattr(cache.directory_cache, "set", record)
+    rows = list(crud.iter_all_providers_available_slots(db, batch_size=10))
+    assert len(rows) == 25
+    assert stored == []
+
+    # Paging through the API caches the first page only
+    first = crud.get_all_providers_available_slots(db, limit=10)
+    crud.get_all_providers_available_slots(
+        db, cursor=crud.encode_slot_cursor(first[-1][0]), limit=10
+    )
+    assert len(stored) == 1
+
+
+@pytest.mark.parametrize("backend", ["local", "shared"])
+def test_user_changes_invalidate_cached_tokens(client, monkeypatch, backend):
+    if backend == "local":
+        token_cache = cache.TTLCache(100, 60)
+    else:
+        token_cache = cache.SharedCache(cache.MemoryClient(), 60)
+    monkeypatch.setattr(cache, "token_cache", token_cache)
+    user = {"name": "A", "phone_number": "+1", "password": "secret"}
+    user_id = client.post("/users/", json=user).json()["id"]
+    token = client.post("/auth/login", json=user).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/auth/me", headers=headers).json()["name"] == "A"
+    assert cache.get_token_user(token)["name"] == "A"
+
+    renamed = {"health_id": "00000001", "name": "B", "phone_number": "+1"}
+    client.put(f"/users/{user_id}", json=renamed)
+    assert client.get("/auth/me", headers=headers).json()["name"] == "B"
+
+    # The token names the old phone number, so it no longer finds a user
+    client.put(f"/users/{user_id}/phone/+2")
+    assert client.get("/auth/me", headers=headers).status_code == 401
+
+
+def test_token_invalidation_reaches_every_worker(monkeypatch):
+    store = cache.MemoryClient()
+    first, second = cache.SharedCache(store, 60), cache.SharedCache(store, 60)
+
+    monkeypatch.setattr(cache, "token_cache", first)
+    cache.set_token_user("token", {"id": 1, "name": "A"})
+    cache.set_token_user("other", {"id": 2, "name": "B"})
+    # Another worker invalidates the user with a single write
+    monkeypatch.setattr(cache, "token_cache", second)
+    assert cache.get_token_user("token") == {"id": 1, "name": "A"}
+    cache.invalidate_user(1)
+
+    monkeypatch.setattr(cache, "token_cache", first)
+    assert cache.get_token_user("token") is None
+    assert cache.get_token_user("other") == {"id": 2, "name": "B"}
+    # Only a digest of the token reaches the store
+    assert not any(name.endswith(":token") for name in store._data)
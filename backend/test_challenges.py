@@ -0,0 +1,66 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+import crud
+import migrations
+import models
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Session on a file database with one challenge and two users"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'challenges.db'}")
+    migrations.upgrade(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    with Session() as db:
+        db.add_all(
+            models.User(health_id=f"{i:08d}", name=f"User {i}", phone_number=str(i))
+            for i in (1, 2)
+        )
+        db.add(
+            models.Challenge(
+                challenge_id="walk",
+                title="Walk",
+                goal="Walk 100 miles",
+                start_date=date(2030, 1, 1),
+                end_date=date(2030, 1, 31),
+            )
+        )
+        db.commit()
+    db = Session()
+    yield db
+    db.close()
+    engine.dispose()
+
+
+def membership(db):
+    """(participant user ids, participant_count) of the challenge, as committed"""
+    db.rollback()
+    participants = models.challenge_participant_association
+    user_ids = db.execute(
+        select(participants.c.user_id).order_by(participants.c.user_id)
+    ).scalars()
+    count = db.query(models.Challenge.participant_count).scalar()
+    return list(user_ids), count
+
+
+def test_join(db):
+    assert crud.add_participant_to_challenge(db, 1, 1)
+    assert crud.add_participant_to_challenge(db, 1, 2)
+    assert membership(db) == ([1, 2], 2)
+
+
+def test_duplicate_join(db):
+    assert crud.add_participant_to_challenge(db, 1, 1)
+    assert not crud.add_participant_to_challenge(db, 1, 1)
+    assert membership(db) == ([1], 1)
+
+
+def test_rolled_back_join_leaves_nothing(db):
+    # The caller's transaction fails after the participant was added
+    assert crud._add_participant(db, 1, 1)
+    db.rollback()
+    assert membership(db) == ([], 0)
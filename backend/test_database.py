@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+import database
+
+# Counts to a hundred million; takes far longer than any timeout below
+SLOW_QUERY = text(
+    "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n "
+    "WHERE i < 100000000) SELECT count(*) FROM n"
+)
+
+
+def test_sqlite_statement_timeout():
+    engine = create_engine("sqlite://")
+    database.install_sqlite_statement_timeout(engine, 50)
+    with engine.connect() as connection:
+        with pytest.raises(OperationalError, match="interrupted"):
+            connection.execute(SLOW_QUERY)
+        # The clock is per statement; the connection stays usable
+        assert connection.execute(text("SELECT 1")).scalar() == 1
+
+
+def test_async_engine_gets_the_statement_timeout(monkeypatch):
+    pytest.importorskip("aiosqlite")
+    monkeypatch.setattr(database.config, "DB_STATEMENT_TIMEOUT_MS", 50)
+    monkeypatch.setattr(database, "SQLALCHEMY_DATABASE_URL", "sqlite://")
+    monkeypatch.setattr(database, "_async_engine", None)
+    monkeypatch.setattr(database, "_AsyncSessionLocal", None)
+
+    async def run():
+        engine = database.get_async_engine()
+        try:
+            async with engine.connect() as connection:
+                with pytest.raises(OperationalError, match="interrupted"):
+                    await connection.execute(SLOW_QUERY)
+                assert (await connection.execute(text("SELECT 1"))).scalar() == 1
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+def test_postgres_pool_options(monkeypatch):
+    monkeypatch.setattr(database.config, "DB_POOL_SIZE", 20)
+    monkeypatch.setattr(database.config, "DB_MAX_OVERFLOW", 5)
+    monkeypatch.setattr(database.config, "DB_POOL_PRE_PING", True)
+    monkeypatch.setattr(database.config, "DB_STATEMENT_TIMEOUT_MS", 0)
+    options = database.engine_options("postgresql+psycopg://u:p@db/healthtrack")
+    assert options["pool_size"] == 20
+    assert options["max_overflow"] == 5
+    assert options["pool_pre_ping"] is True
+    assert "connect_args" not in options
+
+
+# Checks the options only, so no PostgreSQL server or driver is needed
+@pytest.mark.parametrize(
+    "url, connect_args",
+    [
+        (
+            "postgresql+psycopg://u:p@db/healthtrack",
+            {"options": "-c statement_timeout=1500"},
+        ),
+        (
+            "postgresql+psycopg2://u:p@db/healthtrack",
+            {"options": "-c statement_timeout=1500"},
+        ),
+        (
+            "postgresql+asyncpg://u:p@db/healthtrack",
+            {"server_settings": {"statement_timeout": "1500"}},
+        ),
+    ],
+)
+def test_postgres_statement_timeout(monkeypatch, url, connect_args):
+    monkeypatch.setattr(database.config, "DB_STATEMENT_TIMEOUT_MS", 1500)
+    assert database.engine_options(url)["connect_args"] == connect_args
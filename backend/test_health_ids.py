@@ -0,0 +1,66 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import health_ids
+import migrations
+import models
+
+
+def test_permute_is_a_bijection(monkeypatch):
+    # The Feistel network is a bijection for any half size; check all of a small one
+    monkeypatch.setattr(health_ids, "HALF", 100)
+    monkeypatch.setattr(health_ids, "SPACE", 100 * 100)
+    images = sorted(health_ids.permute(i, key="test") for i in range(100 * 100))
+    assert images == list(range(100 * 100))
+
+
+def test_permute_stays_in_range():
+    ids = {health_ids.permute(i, key="test") for i in range(0, health_ids.SPACE, 9973)}
+    assert len(ids) == len(range(0, health_ids.SPACE, 9973))
+    assert all(0 <= value < health_ids.SPACE for value in ids)
+
+
+def test_reserved_blocks_never_overlap(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'ids.db'}", connect_args={"check_same_thread": False}
+    )
+    migrations.upgrade(engine)
+    Session = sessionmaker(bind=engine)
+
+    def block(size):
+        with Session() as db:
+            start = health_ids.reserve_block(db, size)
+        return range(start, start + size)
+
+    sizes = [1, 7, 100, 3] * 10
+    with ThreadPoolExecutor(8) as pool:
+        blocks = list(pool.map(block, sizes))
+
+    counters = [counter for reserved in blocks for counter in reserved]
+    assert sorted(counters) == list(range(sum(sizes)))
+    engine.dispose()
+
+
+def test_allocations_span_block_reservations(session_factory, monkeypatch):
+    # A fresh process: nothing reserved yet, blocks of five
+    monkeypatch.setattr(health_ids, "_next", 0)
+    monkeypatch.setattr(health_ids, "_end", 0)
+    monkeypatch.setattr(health_ids.config, "HEALTH_ID_BLOCK_SIZE", 5)
+    db = session_factory()
+
+    first = health_ids.allocate_many(db, 3)
+    # Another process reserves the next block in between
+    assert health_ids.reserve_block(db, 5) == 5
+    # Two values left in this process's block, the rest from a new one
+    second = health_ids.allocate_many(db, 4)
+
+    ids = first + second
+    counters = [0, 1, 2, 3, 4, 10, 11]
+    assert ids == [health_ids.format_health_id(counter) for counter in counters]
+    assert len(set(ids)) == len(counters)
+    assert all(len(health_id) == 8 and health_id.isdigit() for health_id in ids)
+    next_value = db.query(models.IdSequence.next_value).scalar()
+    assert next_value == 15
+    db.close()
@@ -0,0 +1,68 @@
+import json
+import logging
+import sys
+
+import pytest
+
+import logging_setup
+
+
+def test_json_lines_carry_the_extra_fields():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logging.getLogger("healthtrack.test").makeRecord(
+            "healthtrack.test",
+            logging.ERROR,
+            __file__,
+            1,
+            "Sweep of %d invitations failed",
+            (3,),
+            sys.exc_info(),
+            extra={"route": "/users/", "statements": 2},
+        )
+    entry = json.loads(logging_setup.JSONFormatter().format(record))
+    assert entry["level"] == "ERROR"
+    assert entry["logger"] == "healthtrack.test"
+    assert entry["message"] == "Sweep of 3 invitations failed"
+    assert entry["route"] == "/users/"
+    assert entry["statements"] == 2
+    assert "ValueError: boom" in entry["exception"]
+    assert "args" not in entry and "msg" not in entry
+
+
+@pytest.fixture
+def root_logger():
+    root = logging.getLogger()
+    level, handlers = root.level, list(root.handlers)
+    yield root
+    logging_setup.shutdown()
+    root.setLevel(level)
+    root.handlers[:] = handlers
+
+
+def test_records_reach_stderr_through_the_queue(root_logger, capsys, monkeypatch):
+    # Importing the app does not touch logging; the lifespan hook does
+    import main  # noqa: F401
+
+    assert logging_setup._listener is None
+
+    monkeypatch.setattr(logging_setup.config, "LOG_FORMAT", "json")
+    monkeypatch.setattr(logging_setup.config, "LOG_LEVEL", "INFO")
+    handlers = len(root_logger.handlers)
+    logging_setup.configure()
+    logging_setup.configure()
+    assert len(root_logger.handlers) == handlers + 1
+
+    logger = logging.getLogger("healthtrack.test")
+    logger.debug("below the level")
+    logger.info("Booked slot %d", 7, extra={"provider_id": 1})
+    # Stopping the listener writes out everything still queued
+    logging_setup.shutdown()
+    assert len(root_logger.handlers) == handlers
+
+    lines = capsys.readouterr().err.splitlines()
+    assert len(lines) == 1
+    entry = json.loads(lines[0])
+    assert entry["message"] == "Booked slot 7"
+    assert entry["provider_id"] == 1
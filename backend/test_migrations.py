@@ -0,0 +1,156 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.schema import CreateIndex
+
+import migrations
+import models
+import search
+
+
+@pytest.fixture
+def engine():
+    return create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+
+
+def test_check_refuses_an_unmigrated_database(engine):
+    assert migrations.pending(engine) == list(migrations.versions())
+    with pytest.raises(migrations.SchemaOutOfDate):
+        migrations.check(engine)
+    # Checking must not create anything
+    assert inspect(engine).get_table_names() == []
+
+
+def test_upgrade_applies_every_migration_once(engine):
+    assert migrations.upgrade(engine) == list(migrations.versions())
+    assert migrations.pending(engine) == []
+    migrations.check(engine)
+    assert migrations.upgrade(engine) == []
+
+    indexes = {index["name"] for index in inspect(engine).get_indexes("invitations")}
+    assert "ix_invitations_expiry" in indexes
+
+
+def schema(engine):
+    """Columns and indexes of every table in ``models``"""
+    inspector = inspect(engine)
+    return {
+        table.name: (
+            [
+                (column["name"], str(column["type"]), column["nullable"])
+                for column in inspector.get_columns(table.name)
+            ],
+            sorted(
+                (index["name"], tuple(index["column_names"]), bool(index["unique"]))
+                for index in inspector.get_indexes(table.name)
+            ),
+        )
+        for table in models.Base.metadata.sorted_tables
+    }
+
+
+def test_a_first_release_database_upgrades_to_the_new_schema(engine):
+    # The first release created its tables without any version history
+    baseline = migrations.available()[0][2]
+    with engine.begin() as connection:
+        baseline.upgrade(connection)
+        connection.execute(
+            text(
+                "INSERT INTO challenges (id, challenge_id, title) VALUES (1, 'c', 'C')"
+            )
+        )
+        connection.execute(
+            text(
+                "INSERT INTO challenge_participants (challenge_id, user_id) "
+                "VALUES (1, 1), (1, 1), (1, 2)"
+            )
+        )
+    migrations.upgrade(engine)
+
+    fresh = create_engine("sqlite://")
+    migrations.upgrade(fresh)
+    assert schema(engine) == schema(fresh)
+    for table in models.Base.metadata.sorted_tables:
+        columns = [column[0] for column in schema(fresh)[table.name][0]]
+        assert columns == [column.name for column in table.columns], table.name
+    with engine.connect() as connection:
+        count = connection.execute(text("SELECT participant_count FROM challenges"))
+        assert count.scalar() == 2
+
+
+def test_index_only_migrations_run_outside_a_transaction():
+    for version, name, module in migrations.available():
+        if name.endswith("indexes") or name == "challenge_search":
+            assert module.TRANSACTIONAL is False, name
+
+
+def test_online_index_statement():
+    index = next(
+        index
+        for index in models.Base.metadata.tables["invitations"].indexes
+        if index.name == "ix_invitations_expiry"
+    )
+    options = index.dialect_options["postgresql"]
+    options["concurrently"] = True
+    try:
+        sql = str(
+            CreateIndex(index, if_not_exists=True).compile(
+                dialect=postgresql.dialect()
+            )
+        )
+    finally:
+        options["concurrently"] = False
+    assert sql.startswith("CREATE INDEX CONCURRENTLY IF NOT EXISTS")
+
+
+def test_online_search_index_statement():
+    statements = []
+
+    class Connection:
+        dialect = postgresql.dialect()
+
+        def exec_driver_sql(self, statement):
+            statements.append(statement)
+
+    assert search.install(Connection(), concurrently=True) == "tsvector"
+    assert statements[0].startswith(
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {search.PG_INDEX}"
+    )
+
+
+def test_database_uses_the_models_base():
+    import database
+
+    assert database.Base is models.Base
+
+
+def test_verify_reports_missing_tables_and_indexes(engine):
+    assert "table users" in migrations.missing_objects(engine)
+
+    migrations.upgrade(engine)
+    assert migrations.verify(engine, strict=True) == []
+
+    with engine.begin() as connection:
+        connection.exec_driver_sql("DROP INDEX ix_appointments_user_date")
+    missing = ["index ix_appointments_user_date on appointments"]
+    assert migrations.verify(engine) == missing
+    with pytest.raises(migrations.SchemaOutOfDate, match="ix_appointments_user_date"):
+        migrations.verify(engine, strict=True)
+
+
+def test_verify_reports_a_missing_search_index(engine):
+    migrations.upgrade(engine)
+    assert "challenges_fts" in inspect(engine).get_table_names()
+
+    with engine.begin() as connection:
+        connection.exec_driver_sql("DROP TABLE challenges_fts")
+    assert migrations.missing_objects(engine) == ["table challenges_fts"]
+
+    # Searching falls back to LIKE instead of creating the index
+    session = sessionmaker(bind=engine)()
+    assert search.search_challenges(session, "walk") == []
+    assert "challenges_fts" not in inspect(engine).get_table_names()
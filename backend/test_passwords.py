@@ -0,0 +1,103 @@
+import asyncio
+from concurrent.futures import Future
+
+import pytest
+
+import crud
+import database
+import passwords
+import schemas
+
+
+@pytest.fixture
+def db(session_factory):
+    db = session_factory()
+    yield db
+    db.close()
+
+
+def test_registration_hashes_outside_the_write_lock(db, monkeypatch):
+    monkeypatch.setattr(database, "SQLITE_PRODUCTION", True)
+    locked = []
+
+    def hash_password(password):
+        locked.append(database._write_lock.locked())
+        return "hashed"
+
+    monkeypatch.setattr(passwords, "hash_password", hash_password)
+    user = crud.create_user_with_password(
+        db,
+        schemas.UserCreateWithPassword(
+            health_id="", name="A", phone_number="+1", password="secret"
+        ),
+    )
+    assert locked == [False]
+    assert user.password_hash == "hashed"
+
+
+class BrokenPool:
+    def submit(self, func, *args):
+        raise passwords.BrokenProcessPool("worker died")
+
+    def shutdown(self, wait=True):
+        self.shut_down = True
+
+
+def test_a_broken_pool_is_rebuilt(monkeypatch):
+    monkeypatch.setattr(passwords.config, "PASSWORD_WORKERS", 1)
+    broken = BrokenPool()
+    monkeypatch.setattr(passwords, "_executor", broken)
+    try:
+        assert passwords.verify_password("x", passwords._hash("x"))
+        assert broken.shut_down
+        assert passwords._executor is not broken
+    finally:
+        if passwords._executor is not None and passwords._executor is not broken:
+            passwords._executor.shutdown()
+
+
+class DyingPool(BrokenPool):
+    """The worker dies while running the first job, which breaks the pool"""
+
+    def __init__(self):
+        self.submitted = 0
+
+    def submit(self, func, *args):
+        if self.submitted:
+            return super().submit(func, *args)
+        self.submitted += 1
+        future = Future()
+        future.set_exception(passwords.BrokenProcessPool("worker died"))
+        return future
+
+
+def verify(mode, password, hashed_password):
+    if mode == "async":
+        return asyncio.run(passwords.verify_password_async(password, hashed_password))
+    return passwords.verify_password(password, hashed_password)
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_a_job_whose_worker_dies_is_retried_on_a_new_pool(monkeypatch, mode):
+    monkeypatch.setattr(passwords.config, "PASSWORD_WORKERS", 1)
+    dying = DyingPool()
+    monkeypatch.setattr(passwords, "_executor", dying)
+    try:
+        assert verify(mode, "x", passwords._hash("x"))
+        assert dying.shut_down
+        assert passwords.stats()["in_flight"] == 0
+    finally:
+        if passwords._executor is not None and passwords._executor is not dying:
+            passwords._executor.shutdown()
+
+
+def test_a_full_queue_answers_503_with_retry_after(client, monkeypatch):
+    monkeypatch.setattr(passwords.config, "PASSWORD_WORKERS", 1)
+    monkeypatch.setattr(passwords.config, "PASSWORD_QUEUE_LIMIT", 0)
+    monkeypatch.setattr(passwords.config, "PASSWORD_RETRY_AFTER_SECONDS", 7)
+    response = client.post(
+        "/users/", json={"name": "A", "phone_number": "+1", "password": "secret"}
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "7"
+    assert passwords.stats()["in_flight"] == 0
@@ -0,0 +1,113 @@
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.pool import StaticPool
+
+import instrumentation
+import models
+
+GROUPS = 5
+MEMBERS_PER_GROUP = 20
+
+
+@pytest.fixture
+def client(client, session_factory):
+    """Client on an in-memory database where user 1 belongs to several big groups"""
+    db = session_factory()
+    users = [
+        models.User(health_id=f"{i:08d}", name=f"User {i}", phone_number=str(i))
+        for i in range(1, MEMBERS_PER_GROUP + 1)
+    ]
+    db.add_all(users)
+    db.flush()
+    for g in range(GROUPS):
+        group = models.FamilyGroup(name=f"Group {g}", owner_id=users[0].id)
+        db.add(group)
+        db.flush()
+        db.add_all(
+            models.FamilyGroupMember(
+                family_group_id=group.id, user_id=user.id, user_name=user.name
+            )
+            for user in users
+        )
+    db.commit()
+    db.close()
+    return client
+
+
+def count_statements(engine, call):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        response = call()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    return response, len(statements)
+
+
+def test_family_members_is_one_query(engine, client):
+    response, statements = count_statements(
+        engine, lambda: client.get("/family_groups/1/members")
+    )
+    assert response.status_code == 200
+    assert len(response.json()) == MEMBERS_PER_GROUP
+    assert response.json()[0]["user_name"] == "User 1"
+    assert statements == 1
+
+
+def test_family_groups_of_user_is_two_queries(engine, client):
+    response, statements = count_statements(
+        engine, lambda: client.get("/family_groups/user/1")
+    )
+    assert response.status_code == 200
+    assert len(response.json()) == GROUPS
+    assert all(
+        len(group["family_group_members"]) == MEMBERS_PER_GROUP
+        for group in response.json()
+    )
+    assert statements == 2
+
+
+def test_family_groups_of_unknown_user_is_404(client):
+    assert client.get("/family_groups/user/999").status_code == 404
+
+
+def test_metrics_count_statements_per_route(engine, client):
+    instrumentation.instrument_engine(engine)
+    client.get("/family_groups/1/members")
+    samples = dict(
+        line.rsplit(" ", 1)
+        for line in client.get("/metrics").text.splitlines()
+        if "{family_group_id}/members" in line
+    )
+    name = "healthtrack_db_statements_per_request"
+    route = "/family_groups/{family_group_id}/members"
+    labels = f'method="GET",route="{route}",status="200"'
+    # Every request to the route ran at most one statement
+    assert int(samples[f'{name}_bucket{{{labels},le="1"}}']) >= 1
+    assert samples[f'{name}_bucket{{{labels},le="1"}}'] == samples[
+        f"{name}_count{{{labels}}}"
+    ]
+
+
+def test_failed_statements_are_recorded_and_unwound():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    instrumentation.instrument_engine(engine)
+    stats = instrumentation.RequestStats()
+    token = instrumentation._current.set(stats)
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY)"))
+            conn.execute(text("INSERT INTO t VALUES (1)"))
+            with pytest.raises(IntegrityError):
+                conn.execute(text("INSERT INTO t VALUES (1)"))
+            assert conn.info["instrumentation_started"] == []
+            conn.execute(text("SELECT 1"))
+            assert conn.info["instrumentation_started"] == []
+    finally:
+        instrumentation._current.reset(token)
+    assert stats.statements == 4
@@ -0,0 +1,186 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import crud
+import migrations
+import models
+
+
+def make_session():
+    """In-memory database with the migrated schema and a few years of challenges"""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    migrations.upgrade(engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    first = datetime(2020, 1, 1)
+    db.add_all(
+        models.Challenge(
+            challenge_id=f"C{i}",
+            title=f"Challenge {i}",
+            goal="Walk",
+            start_date=first + timedelta(days=i),
+            end_date=first + timedelta(days=i + 30),
+        )
+        for i in range(1000)
+    )
+    db.commit()
+    return engine, db
+
+
+def query_plan(engine, db, run):
+    """EXPLAIN QUERY PLAN of the single SELECT issued by ``run(db)``"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        run(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    assert len(statements) == 1
+    statement, parameters = statements[0]
+    rows = db.connection().exec_driver_sql(
+        "EXPLAIN QUERY PLAN " + statement, parameters
+    )
+    return "\n".join(row[-1] for row in rows)
+
+
+def test_date_range_filter_uses_start_date_index():
+    engine, db = make_session()
+    plan = query_plan(
+        engine,
+        db,
+        lambda db: crud.filter_challenges_by_date_range(
+            db, start_date=datetime(2021, 6, 1), limit=20
+        ),
+    )
+    assert "ix_challenges_start_date_id" in plan
+    # The index already returns rows in (start_date, id) order
+    assert "TEMP B-TREE" not in plan
+
+
+def test_date_range_keyset_page_uses_start_date_index():
+    engine, db = make_session()
+    first_page = crud.filter_challenges_by_date_range(db, limit=20)
+    cursor = crud.encode_challenge_cursor(first_page[-1])
+    plan = query_plan(
+        engine,
+        db,
+        lambda db: crud.filter_challenges_by_date_range(db, limit=20, cursor=cursor),
+    )
+    assert "ix_challenges_start_date_id" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_keyset_pages_follow_offset_pages():
+    engine, db = make_session()
+    by_offset = crud.filter_challenges_by_date_range(db, skip=20, limit=20)
+    first_page = crud.filter_challenges_by_date_range(db, limit=20)
+    by_cursor = crud.filter_challenges_by_date_range(
+        db, limit=20, cursor=crud.encode_challenge_cursor(first_page[-1])
+    )
+    assert [c.id for c in by_cursor] == [c.id for c in by_offset]
+
+
+def test_invitation_inbox_uses_recipient_indexes():
+    engine, db = make_session()
+    user = models.User(health_id="00000001", name="A", phone_number="555")
+    user.emails.append(models.Email(email_address="a@example.com"))
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    plan = query_plan(
+        engine, db, lambda db: crud.get_user_invitations(db, user_id=user_id)
+    )
+    assert "ix_invitations_recipient_email" in plan
+    assert "ix_invitations_recipient_phone" in plan
+    assert "SCAN invitations" not in plan
+
+
+def statement_plan(db, statement):
+    """EXPLAIN QUERY PLAN rows (id, parent, detail) of a Core statement"""
+    compiled = statement.compile(db.get_bind())
+    rows = db.connection().exec_driver_sql(
+        "EXPLAIN QUERY PLAN " + str(compiled),
+        tuple(compiled.params[name] for name in compiled.positiontup),
+    )
+    return [(row[0], row[1], row[-1]) for row in rows]
+
+
+def test_appointment_feed_walks_each_index_without_sorting_it():
+    engine, db = make_session()
+    cursor = crud.encode_cursor(datetime(2021, 1, 1), 5)
+    for page_cursor in (None, cursor):
+        plan = statement_plan(
+            db, crud.user_appointments_statement(1, [1, 2], page_cursor, limit=20)
+        )
+        details = "\n".join(detail for _, _, detail in plan)
+        assert "MULTI-INDEX OR" not in details
+        assert details.count("USING INDEX ix_appointments_user_date") == 1
+        assert details.count("USING INDEX ix_appointments_provider_date") == 2
+        # Every arm reads its index in keyset order; the only sorts are over
+        # the at most ``limit`` rows an arm returned
+        arms = {
+            parent
+            for _, parent, detail in plan
+            if detail.startswith("SEARCH appointments")
+        }
+        assert len(arms) == 3
+        assert not [
+            detail
+            for _, parent, detail in plan
+            if parent in arms and "TEMP B-TREE" in detail
+        ]
+
+
+def test_free_slot_pages_use_the_start_time_keyset_index():
+    engine, db = make_session()
+    cursor = crud.encode_cursor(datetime(2030, 1, 1), 5)
+    for page_cursor in (None, cursor):
+        for window in ({}, {"start_time": datetime(2030, 1, 1)}):
+            plan = query_plan(
+                engine,
+                db,
+                lambda db: crud._available_slots_page(
+                    db,
+                    page_cursor,
+                    100,
+                    window.get("start_time"),
+                    window.get("start_time") and datetime(2030, 2, 1),
+                ),
+            )
+            assert "ix_provider_availabilities_booked_start_id" in plan
+            # Already in (start_time, id) order: a page stops after ``limit`` rows
+            assert "TEMP B-TREE" not in plan
+
+
+def test_slot_search_pages_use_the_start_time_keyset_index():
+    engine, db = make_session()
+    window = (datetime(2030, 1, 1), datetime(2030, 2, 1))
+    cursor = crud.encode_cursor(datetime(2030, 1, 10), 5)
+    for options in ({}, {"specialty": "GP"}, {"cursor": cursor}):
+        plan = query_plan(
+            engine,
+            db,
+            lambda db: crud.search_available_slots(db, *window, limit=20, **options),
+        )
+        assert "ix_provider_availabilities_booked_start_id" in plan
+        assert "TEMP B-TREE" not in plan
+
+
+def test_covering_slot_lookup_uses_the_provider_schedule_index():
+    engine, db = make_session()
+    plan = query_plan(
+        engine,
+        db,
+        lambda db: crud.find_covering_slot(db, 1, datetime(2030, 1, 7, 9, 15)),
+    )
+    assert "ix_provider_availabilities_provider_booked_end" in plan
+    assert "provider_id=? AND is_booked=? AND end_time>?" in plan
+    assert "TEMP B-TREE" not in plan
@@ -0,0 +1,91 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+import models
+import search
+
+
+@pytest.fixture
+def db(session_factory):
+    db = session_factory()
+    if search._get_mode(db) != "fts5":
+        pytest.skip("SQLite without FTS5 or the trigram tokenizer")
+    for title, goal in [
+        ("Morning walk", "Walk 5k every day"),
+        ("Marathon", "Run 42k"),
+        ("每日步行", "每天走一万步"),
+    ]:
+        db.add(
+            models.Challenge(
+                challenge_id=title,
+                title=title,
+                goal=goal,
+                description="",
+                start_date=date(2030, 1, 1),
+                end_date=date(2030, 1, 31),
+            )
+        )
+    db.commit()
+    yield db
+    db.close()
+
+
+def titles(db, keyword):
+    return [challenge.title for challenge in search.search_challenges(db, keyword)]
+
+
+def matched_with_fts(db, keyword):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        search.search_challenges(db, keyword)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    return any("MATCH" in statement for statement in statements)
+
+
+def test_substrings_match(db):
+    assert titles(db, "alk") == ["Morning walk"]
+    assert titles(db, "步行") == ["每日步行"]
+    assert titles(db, "一万步") == ["每日步行"]
+
+
+def test_the_index_follows_updates(db):
+    challenge = db.query(models.Challenge).filter_by(title="Marathon").one()
+    challenge.title = "Half marathon"
+    challenge.goal = "Run 21k"
+    db.commit()
+    assert titles(db, "42k") == []
+    assert titles(db, "Half") == ["Half marathon"]
+
+
+def test_the_index_follows_deletes(db):
+    db.delete(db.query(models.Challenge).filter_by(title="Marathon").one())
+    db.commit()
+    assert titles(db, "marathon") == []
+
+
+def test_short_terms_fall_back_to_like(db):
+    # Too short for a trigram on its own: a LIKE scan
+    assert titles(db, "5k") == ["Morning walk"]
+    assert not matched_with_fts(db, "5k")
+    # Mixed with a long term: the index narrows, LIKE checks the short term
+    assert titles(db, "walk 5k") == ["Morning walk"]
+    assert titles(db, "walk 42") == []
+    assert matched_with_fts(db, "walk 5k")
+
+
+def test_without_the_index_every_term_is_a_like_scan(db, monkeypatch):
+    monkeypatch.setitem(search._mode, db.get_bind(), "like")
+    assert titles(db, "5k") == ["Morning walk"]
+    assert titles(db, "walk 5k") == ["Morning walk"]
+    assert titles(db, "每日") == ["每日步行"]
+    assert titles(db, "walk 42") == []
+    assert not matched_with_fts(db, "walk 5k")
@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import config
+import models
+
+
+@pytest.fixture
+def client(client, session_factory):
+    """Client on an in-memory database with a few rows of every list endpoint"""
+    db = session_factory()
+    user = models.User(health_id="00000001", name="用户", phone_number="1")
+    provider = models.Provider(name="Dr. Who", specialty="General")
+    db.add_all([user, provider])
+    db.flush()
+    first = datetime(2024, 1, 1, 9, 0)
+    for i in range(5):
+        db.add(
+            models.Appointment(
+                user_id=user.id,
+                provider_id=provider.id,
+                user_name=user.name,
+                provider_name=provider.name,
+                date_time=first + timedelta(days=i, microseconds=i),
+                consultation_type="online",
+                notes=None if i % 2 else "注意",
+            )
+        )
+        db.add(
+            models.ProviderAvailability(
+                provider_id=provider.id,
+                start_time=first + timedelta(hours=i),
+                end_time=first + timedelta(hours=i, minutes=30),
+            )
+        )
+        db.add(
+            models.Challenge(
+                challenge_id=f"C{i}",
+                creator_id=user.id,
+                title=f"Challenge {i}",
+                goal="Walk",
+                start_date=datetime(2024, 2, 1) + timedelta(days=i),
+                end_date=datetime(2024, 3, 1) + timedelta(days=i),
+            )
+        )
+    db.commit()
+    db.close()
+    return client
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/appointments/user/1?limit=2",
+        "/providers-availability/all/available?limit=2",
+        "/challenges/",
+    ],
+)
+def test_fast_json_matches_response_model(client, monkeypatch, url):
+    expected = client.get(url)
+    monkeypatch.setattr(config, "FAST_JSON", True)
+    fast = client.get(url)
+    assert fast.status_code == expected.status_code == 200
+    assert fast.json() == expected.json()
+    for header in ("x-next-cursor", "x-next-after-id"):
+        assert fast.headers.get(header) == expected.headers.get(header)
@@ -0,0 +1,47 @@
+import json
+import os
+import subprocess
+import sys
+
+# Wall time of `import main` in a fresh interpreter, best of three. Most of it
+# is FastAPI, Pydantic and SQLAlchemy; raise it on a slow machine.
+IMPORT_BUDGET_MS = int(os.getenv("HEALTHTRACK_IMPORT_BUDGET_MS", "2000"))
+
+# Heavy modules that are loaded on first use, never by importing the app
+DEFERRED = ["jose", "passlib", "bcrypt", "uvicorn", "sqlalchemy.ext.asyncio"]
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import main
+elapsed = (time.perf_counter() - started) * 1000
+print(json.dumps({"ms": elapsed, "modules": sorted(sys.modules)}))
+"""
+
+
+def import_main() -> dict:
+    env = dict(
+        os.environ,
+        HEALTHTRACK_DATABASE_URL="sqlite://",
+        HEALTHTRACK_PASSWORD_WORKERS="0",
+        HEALTHTRACK_ASYNC_DB="0",
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def test_importing_the_app_defers_heavy_modules():
+    modules = set(import_main()["modules"])
+    assert [name for name in DEFERRED if name in modules] == []
+
+
+def test_import_time_budget():
+    best = min(import_main()["ms"] for _ in range(3))
+    assert best < IMPORT_BUDGET_MS, f"import main took {best:.0f} ms"
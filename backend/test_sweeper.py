@@ -0,0 +1,87 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+import crud
+import models
+import sweeper
+
+
+@pytest.fixture
+def session_factory(session_factory):
+    """Five invitations waiting to be swept, one already swept, two still open"""
+    db = session_factory()
+    now = datetime.utcnow()
+    expiries = [now - timedelta(days=i) for i in range(1, 7)] + [
+        now + timedelta(days=i) for i in (1, 2)
+    ]
+    db.add_all(
+        models.Invitation(
+            sender_id=1,
+            invitation_type="challenge",
+            expired_at=expired_at,
+            is_expired=i == 5,
+        )
+        for i, expired_at in enumerate(expiries)
+    )
+    db.commit()
+    db.close()
+    return session_factory
+
+
+def expired_flags(session_factory):
+    with session_factory() as db:
+        invitations = db.query(models.Invitation).order_by(models.Invitation.id)
+        return [invitation.is_expired for invitation in invitations]
+
+
+def test_each_batch_is_its_own_transaction(session_factory):
+    commits = []
+    db = session_factory()
+    event.listen(db, "after_commit", commits.append)
+    assert crud.expire_invitations(db, batch_size=2) == 5
+    db.close()
+    # Two full batches and the last one, which is short
+    assert len(commits) == 3
+    assert expired_flags(session_factory) == [True] * 6 + [False] * 2
+
+
+def test_the_sweeper_runs_every_interval_until_cancelled(
+    session_factory, monkeypatch
+):
+    monkeypatch.setattr(sweeper, "SessionLocal", session_factory)
+    sweeps, intervals = [], []
+    sweep = sweeper.sweep_expired_invitations
+
+    def sweep_and_count():
+        expired = sweep()
+        sweeps.append(expired)
+        return expired
+
+    monkeypatch.setattr(sweeper, "sweep_expired_invitations", sweep_and_count)
+
+    async def run():
+        parked = asyncio.Event()
+
+        async def sleep(seconds):
+            intervals.append(seconds)
+            if len(intervals) == 2:
+                # Park the loop after its second sweep so the test can stop it
+                parked.set()
+                await asyncio.Event().wait()
+
+        monkeypatch.setattr(sweeper.asyncio, "sleep", sleep)
+        task = asyncio.create_task(sweeper.run_invitation_sweeper(interval=30))
+        await parked.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+
+    # The first run expires everything due, the second finds nothing left
+    assert sweeps == [5, 0]
+    assert intervals == [30, 30]
+    assert expired_flags(session_factory) == [True] * 6 + [False] * 2
@@ -0,0 +1,68 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+import database
+import models
+
+
+@pytest.fixture
+def client(client, session_factory, monkeypatch):
+    """Client in production SQLite mode that records whether commits hold the lock"""
+    db = session_factory()
+    db.add(models.User(health_id="00000001", name="Owner", phone_number="1"))
+    db.add(models.User(health_id="00000002", name="Member", phone_number="2"))
+    db.commit()
+    db.close()
+
+    commits = []
+
+    def record(session):
+        commits.append(database._write_lock.locked())
+
+    monkeypatch.setattr(database, "SQLITE_PRODUCTION", True)
+    event.listen(Session, "before_commit", record)
+    yield client, commits
+    event.remove(Session, "before_commit", record)
+
+
+def test_family_group_writes_hold_the_write_lock(client):
+    client, commits = client
+    group = client.post("/family_groups/1", json={"name": "Home"}).json()
+    assert [member["role"] for member in group["family_group_members"]] == ["admin"]
+
+    response = client.delete(f"/family_groups/{group['id']}/members/1")
+    assert response.status_code == 200
+    assert client.delete(f"/family_groups/{group['id']}/members/1").status_code == 404
+    assert commits and all(commits)
+
+
+def test_email_writes_hold_the_write_lock(client):
+    client, commits = client
+    email = {"email_address": "a@example.com"}
+    assert client.post("/users/1/emails", json=email).status_code == 200
+    assert client.post("/users/1/emails", json=email).status_code == 400
+    assert client.get("/users/1/emails/").json()[0]["email_address"] == "a@example.com"
+
+    assert client.delete("/users/1/emails/a@example.com").status_code == 200
+    assert client.get("/users/1/emails/").json() == []
+    assert commits and all(commits)
+
+
+def test_deleting_a_user_leaves_their_challenges(client):
+    client, commits = client
+    challenge = {
+        "challenge_id": "walk",
+        "goal": "Walk 100 miles",
+        "start_date": "2030-01-01",
+        "end_date": "2030-01-31",
+        "title": "Walk",
+    }
+    challenge_id = client.post("/challenges/?creator_id=1", json=challenge).json()["id"]
+    for user_id in (1, 2):
+        client.post(f"/challenges/{challenge_id}/participants/{user_id}")
+    assert client.get(f"/challenges/{challenge_id}").json()["participant_count"] == 2
+
+    assert client.delete("/users/phone/2").status_code == 200
+    assert client.get(f"/challenges/{challenge_id}").json()["participant_count"] == 1
+    assert commits and all(commits)
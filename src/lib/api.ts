@@ -29,6 +29,35 @@ const getAuthFetchOptions = (options: RequestInit = {}) => {
   };
 };
 
+// 分页列表：按响应头 X-Next-Cursor 给出的游标 (?cursor=...) 依次请求下一页，
+// 直到没有下一页
+const PAGE_SIZE = 1000;
+
+const fetchAllPages = async <T>(path: string): Promise<T[]> => {
+  const items: T[] = [];
+  let next: string | null = null;
+  do {
+    const params = new URLSearchParams({ limit: String(PAGE_SIZE) });
+    if (next !== null) {
+      params.set("cursor", next);
+    }
+    const response = await fetch(
+      `${API_BASE_URL}${path}?${params}`,
+      getAuthFetchOptions({
+        method: "GET",
+      }),
+    );
+
+    if (!response.ok) {
+      await handleApiError(response);
+    }
+
+    items.push(...(await response.json()));
+    next = response.headers.get("X-Next-Cursor");
+  } while (next !== null);
+  return items;
+};
+
 // User API
 export const createUser = async (userData: Partial<User>) => {
   const response = await fetch(
@@ -307,33 +336,9 @@ export const createAppointment = async (
   return response.json();
 };
 
+// 按预约时间从早到晚排序，包含用户自己和其医生的预约
 export const getUserAppointments = async (userId: number) => {
-  const response = await fetch(
-    `${API_BASE_URL}/appointments/user/${userId}`,
-    getAuthFetchOptions({
-      method: "GET",
-    }),
-  );
-
-  if (!response.ok) {
-    await handleApiError(response);
-  }
-
-  const appointmentsData = await response.json();
-  return appointmentsData;
-  // return appointmentsData.map((appointment: any) => ({
-  //   id: appointment.id,
-  //   appointment_id: appointment.appointment_id,
-  //   user_id: appointment.user_id,
-  //   provider_id: appointment.provider_id,
-  //   date_time: appointment.date_time,
-  //   consultation_type: appointment.consultation_type,
-  //   notes: appointment.notes,
-  //   cancelled: appointment.cancelled,
-  //   cancellation_reason: appointment.cancellation_reason,
-  //   created_at: appointment.created_at,
-  //   provider: appointment.provider,
-  // }));
+  return fetchAllPages<any>(`/appointments/user/${userId}`);
 };
 
 export const cancelAppointment = async (
@@ -731,18 +736,7 @@ export const getAvailableProviderSlots = async (providerId: number) => {
 };
 
 export const getAllProvidersAvailableSlots = async () => {
-  const response = await fetch(
-    `${API_BASE_URL}/providers-availability/all/available`,
-    getAuthFetchOptions({
-      method: "GET",
-    }),
-  );
-
-  if (!response.ok) {
-    await handleApiError(response);
-  }
-
-  return response.json();
+  return fetchAllPages<any>("/providers-availability/all/available");
 };
 
 export const deleteProviderAvailability = async (availabilityId: number) => {